@@ -0,0 +1,194 @@
+"""
+Render many bulletins into PDF reports in parallel.
+
+Input can be a directory of .txt files, a JSONL file (one object per line
+with "text" and optional "name" and "date" fields) or a zip of .txt files.
+Output can be a directory or a .zip file.
+
+Bulletins without a "date" are dated by their name (e.g. 2025-02-06.txt or
+06-02-2025.txt) or by the first dd/mm/yyyy date in their text; those with
+no date at all are reported as failed rather than stamped with today's.
+
+Example:
+    python batch_report.py boletins_janeiro.zip relatorios_janeiro.zip
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from hospital_parser import HospitalDataParser
+from templates.template_manager import TemplateManager
+
+logger = logging.getLogger(__name__)
+
+# Per-process state created by _init_worker
+_parser = None
+_templates = None
+
+# (pattern, strptime format of the joined groups) tried in order
+_NAME_DATES = [
+    (re.compile(r'(?<!\d)(\d{4})[-_.]?(\d{2})[-_.]?(\d{2})(?!\d)'), '%Y%m%d'),
+    (re.compile(r'(?<!\d)(\d{2})[-_.](\d{2})[-_.](\d{4})(?!\d)'), '%d%m%Y'),
+]
+_TEXT_DATE = re.compile(r'(?<!\d)(\d{2})/(\d{2})/(\d{4})(?!\d)')
+
+
+def bulletin_date(name: str, text: str) -> Optional[str]:
+    """Date of a bulletin as dd/mm/yyyy, from its name or else its text; None if neither has one."""
+    candidates = [(pattern.search(name), fmt) for pattern, fmt in _NAME_DATES]
+    candidates.append((_TEXT_DATE.search(text), '%d%m%Y'))
+    for match, fmt in candidates:
+        if match is None:
+            continue
+        try:
+            return datetime.strptime(''.join(match.groups()), fmt).strftime('%d/%m/%Y')
+        except ValueError:
+            continue
+    return None
+
+
+def iter_bulletins(path: str) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """Yield (name, text, date) for each bulletin found at ``path``; date is None when unknown."""
+    if os.path.isdir(path):
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith('.txt'):
+                with open(os.path.join(path, filename), encoding='utf-8') as f:
+                    name, text = os.path.splitext(filename)[0], f.read()
+                    yield name, text, bulletin_date(name, text)
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in sorted(archive.namelist()):
+                if member.endswith('.txt'):
+                    name = os.path.splitext(os.path.basename(member))[0]
+                    text = archive.read(member).decode('utf-8')
+                    yield name, text, bulletin_date(name, text)
+    else:
+        with open(path, encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if isinstance(record, str):
+                    record = {'text': record}
+                name = record.get('name') or f"boletim_{number:05d}"
+                yield name, record['text'], record.get('date') or bulletin_date(name, record['text'])
+
+
+def _init_worker() -> None:
+    global _parser, _templates
+    _parser = HospitalDataParser()
+    _templates = TemplateManager()
+
+
+def render_bulletin(name: str, text: str, date: Optional[str],
+                    template_name: Optional[str]) -> Tuple[str, Optional[bytes], Optional[str]]:
+    """Parse and render one bulletin; returns (name, pdf bytes, error message)."""
+    try:
+        data = _parser.parse_message(text)
+        if not _parser.validate_data(data):
+            return name, None, "formato inválido"
+        if not date:
+            # The parser would date it today, which is wrong for a past bulletin
+            return name, None, "data do boletim não encontrada"
+        data['date'] = date
+        pdf = _templates.get_template(template_name).generate_pdf(data).getvalue()
+        return name, pdf, None
+    except Exception as e:
+        return name, None, str(e)
+
+
+class OutputWriter:
+    """Writes reports to a directory or streams them into a zip file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip = None
+        if path.endswith('.zip'):
+            # PDFs are already compressed, store them as-is
+            self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED)
+        else:
+            os.makedirs(path, exist_ok=True)
+
+    def write(self, name: str, pdf: bytes) -> None:
+        filename = f"{name}.pdf"
+        if self._zip is not None:
+            self._zip.writestr(filename, pdf)
+        else:
+            with open(os.path.join(self.path, filename), 'wb') as f:
+                f.write(pdf)
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+
+
+def run_batch(source: str, destination: str, workers: Optional[int] = None,
+              template_name: Optional[str] = None) -> Dict[str, float]:
+    """
+    Render every bulletin from ``source`` into ``destination``.
+
+    At most two jobs per worker are in flight, so memory stays flat no
+    matter how large the input is.
+
+    Returns:
+        Dict with throughput statistics
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = {'rendered': 0, 'failed': 0, 'bytes': 0}
+    writer = OutputWriter(destination)
+    started = time.perf_counter()
+
+    def collect(done):
+        for future in done:
+            name, pdf, error = future.result()
+            if pdf is None:
+                stats['failed'] += 1
+                logger.warning(f"{name}: {error}")
+            else:
+                writer.write(name, pdf)
+                stats['rendered'] += 1
+                stats['bytes'] += len(pdf)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            pending = set()
+            for name, text, date in iter_bulletins(source):
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(executor.submit(render_bulletin, name, text, date, template_name))
+            collect(wait(pending)[0])
+    finally:
+        writer.close()
+
+    stats['seconds'] = time.perf_counter() - started
+    stats['reports_per_second'] = stats['rendered'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gera relatórios PDF em lote a partir de boletins.")
+    parser.add_argument('source', help="diretório de .txt, arquivo .jsonl ou .zip com os boletins")
+    parser.add_argument('destination', help="diretório ou arquivo .zip de saída")
+    parser.add_argument('--workers', type=int, default=None, help="processos de renderização (padrão: núcleos da CPU)")
+    parser.add_argument('--template', default=None, help="modelo de relatório")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    stats = run_batch(args.source, args.destination, args.workers, args.template)
+    print(f"{stats['rendered']} relatórios gerados, {stats['failed']} com erro, "
+          f"{stats['bytes'] / 1e6:.1f} MB em {stats['seconds']:.1f}s "
+          f"({stats['reports_per_second']:.1f} relatórios/s)")
+    return 0 if stats['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Throughput of the single-pass parser against the original implementation.
+
+Run from the project root:
+    python -m benchmarks.bench_parser
+"""
+
+import argparse
+import timeit
+
+from benchmarks import legacy_parser
+from benchmarks.corpus import detailed_bulletin, simple_bulletin
+from utils import BEDS_RE, clean_text, parse_bulletin
+
+
+def _comparable(data):
+    # The date is taken from the clock, not the message
+    data = {key: value for key, value in data.items() if key != 'date'}
+    # Units are now split into clinical and ICU with utils.is_icu_unit, which
+    # the legacy parser predates; only the totals are comparable
+    if 'summary' in data:
+        data['summary'] = {key: value for key, value in data['summary'].items() if key.startswith('total_')}
+    # Detailed unit names no longer keep the '(N leitos)' suffix
+    for hospital in data.get('hospitals', ()):
+        hospital['units'] = [dict(unit, name=clean_text(BEDS_RE.sub('', unit['name'])))
+                             for unit in hospital['units']]
+    return data
+
+
+def run(repeat: int = 5) -> None:
+    corpora = {
+        'simple 10 units': [simple_bulletin(10, seed) for seed in range(50)],
+        'simple 500 units': [simple_bulletin(500, seed) for seed in range(5)],
+        'detailed 5x10': [detailed_bulletin(5, 10, seed) for seed in range(50)],
+        'detailed 50x20': [detailed_bulletin(50, 20, seed) for seed in range(5)],
+    }
+
+    print(f"{'corpus':<20}{'legacy MB/s':>14}{'new MB/s':>12}{'speedup':>10}")
+    for label, messages in corpora.items():
+        for message in messages:
+            assert _comparable(parse_bulletin(message)) == _comparable(legacy_parser.parse_message(message)), \
+                f"Parser output differs for {label}"
+
+        size_mb = sum(len(message.encode('utf-8')) for message in messages) / 1e6
+
+        def legacy():
+            for message in messages:
+                legacy_parser.parse_message(message)
+
+        def compiled():
+            for message in messages:
+                parse_bulletin(message)
+
+        legacy_time = min(timeit.repeat(legacy, number=1, repeat=repeat))
+        new_time = min(timeit.repeat(compiled, number=1, repeat=repeat))
+        print(f"{label:<20}{size_mb / legacy_time:>14.2f}{size_mb / new_time:>12.2f}"
+              f"{legacy_time / new_time:>9.2f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5, help='timing repetitions per corpus')
+    run(parser.parse_args().repeat)
@@ -0,0 +1,139 @@
+"""Benchmarks for the parser, validator, renderer, the bot message pipeline and start-up."""
+import asyncio
+import io
+
+import pytest
+
+import config
+from benchmarks.bench_startup import start_bot
+from benchmarks.corpus import detailed_bulletin, simple_bulletin
+from hospital_parser import HospitalDataParser
+from pdf_generator import PDFGenerator
+from report_cache import ReportCache
+
+SIMPLE_SIZES = [10, 100, 1000, 5000]
+DETAILED_SIZES = [(5, 10), (50, 20), (250, 20)]  # hospitals x units per hospital
+RENDER_SIZES = [10, 100, 1000]
+
+
+def _uncached_generator():
+    return PDFGenerator(cache=ReportCache(max_entries=0))
+
+
+@pytest.mark.parametrize('units', SIMPLE_SIZES)
+def bench_parse_simple(bench, units):
+    message = simple_bulletin(units)
+    data = bench(lambda: HospitalDataParser.parse_message(message))
+    assert len(data['units']) == units
+
+
+@pytest.mark.parametrize('hospitals,units', DETAILED_SIZES)
+def bench_parse_detailed(bench, hospitals, units):
+    message = detailed_bulletin(hospitals, units)
+    data = bench(lambda: HospitalDataParser.parse_message(message))
+    assert len(data['hospitals']) == hospitals
+
+
+@pytest.mark.parametrize('units', SIMPLE_SIZES)
+def bench_validate_simple(bench, units):
+    data = HospitalDataParser.parse_message(simple_bulletin(units))
+    assert bench(lambda: HospitalDataParser.validate_data(data), rounds=50)
+
+
+@pytest.mark.parametrize('hospitals,units', DETAILED_SIZES)
+def bench_validate_detailed(bench, hospitals, units):
+    data = HospitalDataParser.parse_message(detailed_bulletin(hospitals, units))
+    assert bench(lambda: HospitalDataParser.validate_data(data), rounds=50)
+
+
+@pytest.mark.parametrize('units', RENDER_SIZES)
+def bench_generate_pdf(bench, units):
+    data = HospitalDataParser.parse_message(simple_bulletin(units))
+    generator = _uncached_generator()
+    rounds = 20 if units <= 100 else 3
+    buffer = bench(lambda: generator.generate_pdf(data), rounds=rounds)
+    assert buffer.getvalue().startswith(b'%PDF')
+
+
+def bench_generate_pdf_cached(bench):
+    data = HospitalDataParser.parse_message(simple_bulletin(100))
+    generator = PDFGenerator()
+    bench(lambda: generator.generate_pdf(data), rounds=200)
+    assert generator.cache.hits >= 200
+
+
+class _FakeMessage:
+    chat_id = 123456
+    message_id = 1
+
+    def __init__(self, text=None):
+        self.text = text
+        self.document = type('Document', (), {'file_id': 'file-id'})()
+
+    async def reply_text(self, text):
+        return _FakeMessage(text)
+
+    async def edit_text(self, text):
+        return self
+
+    async def delete(self):
+        return True
+
+
+class _FakeBot:
+    def __init__(self):
+        self.documents = 0
+
+    async def send_document(self, chat_id, document, filename=None, caption=None):
+        if isinstance(document, io.BytesIO):
+            document.getvalue()
+        self.documents += 1
+        return _FakeMessage()
+
+
+@pytest.fixture
+def hospital_bot(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.REPORT_STORE, 'path', str(tmp_path / 'reports.sqlite3'))
+    monkeypatch.setitem(config.TIMESERIES, 'path', str(tmp_path / 'occupancy.sqlite3'))
+    monkeypatch.setitem(config.STATE, 'path', str(tmp_path / 'state.sqlite3'))
+    monkeypatch.setitem(config.EMAIL, 'transport', 'smtp')  # never connects in this benchmark
+    # Measure the pipeline, not Telegram's per-chat limit
+    monkeypatch.setitem(config.TELEGRAM_LIMITS, 'chat_rate', 1e6)
+    monkeypatch.setitem(config.TELEGRAM_LIMITS, 'global_rate', 1e6)
+    from bot import HospitalBot
+    hospital_bot = HospitalBot()
+    hospital_bot.pdf_generator.cache = ReportCache(max_entries=0)
+    yield hospital_bot
+    hospital_bot.pdf_generator.shutdown()
+    hospital_bot.user_reports.close()
+    hospital_bot.history.close()
+    hospital_bot.state.close()
+
+
+@pytest.mark.parametrize('units', [10, 100])
+def bench_process_message(bench, hospital_bot, units):
+    """End to end: parse, validate, render in the pool, store and send with a mocked Telegram API."""
+    fake_bot = _FakeBot()
+    message = _FakeMessage(simple_bulletin(units))
+    update = type('Update', (), {
+        'message': message,
+        'effective_message': message,
+        'effective_chat': type('Chat', (), {'id': 123456})(),
+        'effective_user': type('User', (), {'id': 789012})(),
+    })()
+    context = type('Context', (), {'bot': fake_bot, 'args': []})()
+
+    loop = asyncio.new_event_loop()
+    try:
+        bench(lambda: loop.run_until_complete(hospital_bot.process_message(update, context)))
+    finally:
+        loop.run_until_complete(hospital_bot.scheduler.close())
+        loop.run_until_complete(hospital_bot.outbox.close())
+        loop.close()
+    assert fake_bot.documents > 0
+
+
+def bench_cold_start(bench):
+    """Fresh interpreter until the bot is ready to serve updates, then its first render."""
+    timings = bench(start_bot, rounds=5, warmup=0)
+    assert timings['ready'] > 0
@@ -0,0 +1,107 @@
+"""
+Cold start of the bot in a fresh interpreter, and where its import time goes.
+
+Run from the project root:
+    python -m benchmarks.bench_startup            # time each start-up phase
+    python -m benchmarks.bench_startup --profile  # import time by top-level package
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints the time of each phase in seconds
+_CHILD = """
+import json, time
+started = time.perf_counter()
+import bot
+imported = time.perf_counter()
+hospital_bot = bot.HospitalBot()
+application = bot.build_application(hospital_bot, token='123456:fake', api_url=None)
+ready = time.perf_counter()
+hospital_bot.pdf_generator.generate_pdf({'units': [
+    {'name': 'UTI HSJ', 'total_beds': 20, 'occupancy_rate': 100.0}]})
+rendered = time.perf_counter()
+hospital_bot.pdf_generator.shutdown()
+hospital_bot.user_reports.close()
+hospital_bot.history.close()
+hospital_bot.state.close()
+print(json.dumps({'import': imported - started, 'init': ready - imported,
+                  'ready': ready - started, 'first_render': rendered - ready}))
+"""
+
+PHASES = ['import', 'init', 'ready', 'first_render']
+
+
+def _environment(data_dir: str) -> Dict[str, str]:
+    env = dict(os.environ, DATA_DIR=data_dir, PYTHONDONTWRITEBYTECODE='1')
+    # Start-up must not depend on credentials being configured
+    env.pop('SENDGRID_API_KEY', None)
+    return env
+
+
+def start_bot() -> Dict[str, float]:
+    """Start the bot once in a fresh interpreter and return its phase timings."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        output = subprocess.run([sys.executable, '-c', _CHILD], cwd=ROOT, env=_environment(data_dir),
+                                capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_profile() -> Tuple[List[Tuple[str, float, float]], float]:
+    """
+    Import ``bot`` under ``-X importtime`` and add up self time per top-level package.
+
+    Returns:
+        (package, self seconds, share of total) sorted by cost, and the total seconds
+    """
+    with tempfile.TemporaryDirectory() as data_dir:
+        stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import bot'], cwd=ROOT,
+                                env=_environment(data_dir), capture_output=True, text=True,
+                                check=True).stderr
+    packages: Dict[str, float] = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        packages[name.strip().split('.')[0]] += int(self_us) / 1e6
+    total = sum(packages.values())
+    ranked = sorted(((name, seconds, seconds / total) for name, seconds in packages.items()),
+                    key=lambda row: row[1], reverse=True)
+    return ranked, total
+
+
+def run(rounds: int = 5) -> None:
+    timings = [start_bot() for _ in range(rounds)]
+    print(f"{'phase':<15}{'median':>12}{'min':>12}")
+    for phase in PHASES:
+        values = [timing[phase] for timing in timings]
+        print(f"{phase:<15}{statistics.median(values) * 1000:>10.1f}ms{min(values) * 1000:>10.1f}ms")
+
+
+def profile(top: int = 20) -> None:
+    ranked, total = import_profile()
+    print(f"{'package':<30}{'self time':>12}{'share':>8}")
+    for name, seconds, share in ranked[:top]:
+        print(f"{name:<30}{seconds * 1000:>10.1f}ms{share:>8.1%}")
+    print(f"{'total':<30}{total * 1000:>10.1f}ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--profile', action='store_true', help='report import time by package instead')
+    parser.add_argument('--top', type=int, default=20, help='packages listed by --profile')
+    args = parser.parse_args()
+    if args.profile:
+        profile(args.top)
+    else:
+        run(args.rounds)
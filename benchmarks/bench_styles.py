@@ -0,0 +1,67 @@
+"""
+Per-render cost of building template styles, rebuilt each time vs shared.
+
+Run from the project root:
+    python -m benchmarks.bench_styles
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import TableStyle
+
+from config import COLORS, FONT_SIZE_BODY, FONT_SIZE_SUBTITLE, FONT_SIZE_TITLE
+from templates.default_template import TABLE_STYLE_COMMANDS, DefaultTemplate
+
+
+def rebuilt_styles():
+    """What every render used to allocate: a stylesheet plus four TableStyles."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='CustomTitle', parent=styles['Heading1'], fontSize=FONT_SIZE_TITLE,
+                              spaceAfter=30, alignment=1, textColor=colors.HexColor(COLORS['white'])))
+    styles.add(ParagraphStyle(name='CustomSubtitle', parent=styles['Heading2'], fontSize=FONT_SIZE_SUBTITLE,
+                              spaceAfter=20, textColor=colors.HexColor(COLORS['primary'])))
+    styles.add(ParagraphStyle(name='CustomBody', parent=styles['Normal'], fontSize=FONT_SIZE_BODY,
+                              spaceAfter=12))
+    tables = {name: TableStyle(list(commands)) for name, commands in TABLE_STYLE_COMMANDS.items()}
+    return styles, tables
+
+
+def shared_styles(template):
+    """What a render does now: look up the shared compiled styles."""
+    return template.styles, template.table_styles
+
+
+def measure(label, func, iterations):
+    func()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated = peak - baseline
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed_us = (time.perf_counter() - started) / iterations * 1e6
+    print(f"{label:<10}{elapsed_us:>12.1f} us{allocated / 1024:>12.1f} KiB")
+    return elapsed_us
+
+
+def run(iterations: int = 2000) -> None:
+    template = DefaultTemplate()
+    print(f"{'styles':<10}{'time/render':>15}{'alloc/render':>16}")
+    before = measure('rebuilt', rebuilt_styles, iterations)
+    after = measure('shared', lambda: shared_styles(template), iterations)
+    print(f"speedup: {before / after:.0f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=2000)
+    run(parser.parse_args().iterations)
@@ -0,0 +1,106 @@
+"""
+Minimal pytest-benchmark style fixture with stored baselines.
+
+Run from the project root:
+    python -m pytest benchmarks                 # compare against stored baselines
+    python -m pytest benchmarks --bench-save    # record new baselines
+
+Baselines are machine specific and live in benchmarks/.baselines.json.
+A benchmark fails when its median exceeds the baseline by more than
+--bench-tolerance (default 50%).
+"""
+import json
+import os
+import statistics
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.baselines.json')
+
+
+def pytest_addoption(parser):
+    parser.addoption('--bench-save', action='store_true', help='store results as the new baselines')
+    parser.addoption('--bench-tolerance', type=float, default=0.5,
+                     help='allowed slowdown over the baseline median (0.5 = 50%%)')
+
+
+class _Results:
+    def __init__(self):
+        try:
+            with open(BASELINE_PATH, encoding='utf-8') as f:
+                self.baselines = json.load(f)
+        except (OSError, ValueError):
+            self.baselines = {}
+        self.current = {}
+
+
+_RESULTS_KEY = pytest.StashKey[_Results]()
+
+
+def pytest_configure(config):
+    config.stash[_RESULTS_KEY] = _Results()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.stash[_RESULTS_KEY]
+    if not results.current:
+        return
+    if config.getoption('--bench-save') or not results.baselines:
+        baselines = dict(results.baselines)
+        baselines.update(results.current)
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        terminalreporter.write_line(f"baselines saved to {BASELINE_PATH}")
+    terminalreporter.section('benchmarks')
+    terminalreporter.write_line(f"{'benchmark':<55}{'median':>12}{'baseline':>12}")
+    for name, stats in sorted(results.current.items()):
+        baseline = results.baselines.get(name, {}).get('median')
+        baseline_text = f"{baseline * 1000:.3f}ms" if baseline else '-'
+        terminalreporter.write_line(f"{name:<55}{stats['median'] * 1000:>10.3f}ms{baseline_text:>12}")
+
+
+class Benchmark:
+    """Callable fixture: ``bench(func, rounds=...)`` times ``func`` and checks the baseline."""
+
+    def __init__(self, name, results, tolerance, save):
+        self.name = name
+        self.results = results
+        self.tolerance = tolerance
+        self.save = save
+
+    def __call__(self, func, rounds=20, warmup=1):
+        for _ in range(warmup):
+            result = func()
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+
+        stats = {'median': statistics.median(timings), 'min': min(timings), 'rounds': rounds}
+        self.results.current[self.name] = stats
+
+        baseline = self.results.baselines.get(self.name)
+        if baseline and not self.save:
+            limit = baseline['median'] * (1 + self.tolerance)
+            assert stats['median'] <= limit, (
+                f"{self.name} regressed: median {stats['median'] * 1000:.3f}ms "
+                f"> {limit * 1000:.3f}ms (baseline {baseline['median'] * 1000:.3f}ms)"
+            )
+        return result
+
+
+@pytest.fixture
+def bench(request):
+    return Benchmark(
+        request.node.nodeid.split('::', 1)[-1],
+        request.config.stash[_RESULTS_KEY],
+        request.config.getoption('--bench-tolerance'),
+        request.config.getoption('--bench-save')
+    )
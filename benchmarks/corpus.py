@@ -0,0 +1,40 @@
+"""Synthetic bulletin generators for benchmarks."""
+
+import random
+from utils import CLINICAL_UNITS, ICU_UNITS, UNIT_MAPPINGS
+
+DISPLAY_NAMES = list(UNIT_MAPPINGS)
+DETAILED_UNIT_NAMES = list(CLINICAL_UNITS) + list(ICU_UNITS)
+
+
+def simple_bulletin(units: int, seed: int = 0) -> str:
+    """Bulletin in the 'Unidade (N leitos) - P%' format with ``units`` lines."""
+    rng = random.Random(seed)
+    lines = []
+    for index in range(units):
+        name = DISPLAY_NAMES[index % len(DISPLAY_NAMES)]
+        if index >= len(DISPLAY_NAMES):
+            name = f"{name} {index // len(DISPLAY_NAMES)}"
+        beds = rng.randint(5, 60)
+        rate = rng.randint(0, beds) * 100 / beds
+        lines.append(f"{name} ({beds} leitos) - {rate:.2f}%".replace('.', ','))
+    return '\n'.join(lines)
+
+
+def detailed_bulletin(hospitals: int, units_per_hospital: int, seed: int = 0) -> str:
+    """Bulletin in the detailed 🏥/🟢 format."""
+    rng = random.Random(seed)
+    lines = []
+    for h in range(hospitals):
+        lines.append(f"🏥 Hospital {h + 1}")
+        for u in range(units_per_hospital):
+            name = DETAILED_UNIT_NAMES[u % len(DETAILED_UNIT_NAMES)]
+            beds = rng.randint(5, 60)
+            occupied = rng.randint(0, beds)
+            blocked = rng.randint(0, beds - occupied)
+            lines.append(f"🟢 {name} ({beds} leitos)")
+            lines.append(f"Internados: {occupied}")
+            lines.append(f"Vagas: {beds - occupied - blocked}")
+            lines.append(f"Bloqueados: {blocked}")
+        lines.append('')
+    return '\n'.join(lines)
@@ -0,0 +1,111 @@
+"""
+Local stand-in for the Telegram Bot API, for load tests.
+
+Answers the methods the bot calls with plausible results and records when
+each chat received a document. Point the bot at it with
+BOT_API_URL=http://localhost:8081, or run it on its own:
+    python -m benchmarks.fake_telegram --port 8081
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import Counter
+from typing import Dict, Tuple
+from urllib.parse import parse_qs
+
+from webhook_server import HTTPServer
+
+_METHOD_RE = re.compile(r'^/bot[^/]+/(\w+)$')
+_MULTIPART_FIELD_RE = re.compile(rb'name="(\w+)"\r\n\r\n([^\r]*)\r\n')
+
+
+def _parameters(headers: Dict[str, str], body: bytes) -> Dict[str, str]:
+    content_type = headers.get('content-type', '')
+    if content_type.startswith('application/json'):
+        return json.loads(body or b'{}')
+    if content_type.startswith('multipart/form-data'):
+        # Only the short text fields; uploaded files are skipped
+        return {name.decode(): value.decode('utf-8', 'replace')
+                for name, value in _MULTIPART_FIELD_RE.findall(body)}
+    return {name: values[0] for name, values in parse_qs(body.decode('utf-8')).items()}
+
+
+class FakeTelegram(HTTPServer):
+    """
+    Fake Bot API server.
+
+    Args:
+        latency: Seconds added to every answer, like a round trip to Telegram
+        flood_rate: Fraction of calls answered with 429 Too Many Requests
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8081, latency: float = 0.0,
+                 flood_rate: float = 0.0):
+        super().__init__(host, port)
+        self.latency = latency
+        self.flood_rate = flood_rate
+        self.calls = Counter()
+        self.documents: Dict[int, float] = {}  # chat id -> time of its first document
+        self._message_ids = 0
+
+    def _message(self, chat_id: int, **fields) -> Dict:
+        self._message_ids += 1
+        return dict(message_id=self._message_ids, date=int(time.time()),
+                    chat={'id': chat_id, 'type': 'private' if chat_id > 0 else 'group'}, **fields)
+
+    async def handle(self, method: str, path: str, headers: Dict[str, str],
+                     body: bytes) -> Tuple[int, bytes]:
+        match = _METHOD_RE.match(path)
+        if match is None:
+            return 404, b'{"ok":false,"error_code":404,"description":"Not Found"}'
+        api_method = match.group(1)
+        params = _parameters(headers, body)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.flood_rate and api_method != 'getMe' and random.random() < self.flood_rate:
+            self.calls['429'] += 1
+            return 429, json.dumps({'ok': False, 'error_code': 429,
+                                    'description': 'Too Many Requests: retry after 1',
+                                    'parameters': {'retry_after': 1}}).encode()
+        self.calls[api_method] += 1
+
+        chat_id = int(params.get('chat_id', 0))
+        if api_method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'Fake', 'username': 'fake_bot'}
+        elif api_method in ('sendMessage', 'editMessageText'):
+            result = self._message(chat_id, text=params.get('text', ''))
+        elif api_method == 'sendDocument':
+            self.documents.setdefault(chat_id, time.monotonic())
+            file_id = f"file-{self._message_ids}"
+            result = self._message(chat_id, document={'file_id': file_id, 'file_unique_id': file_id})
+        else:
+            result = True
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+
+async def _serve(port: int, latency: float, flood_rate: float) -> None:
+    server = FakeTelegram('0.0.0.0', port, latency, flood_rate)
+    await server.start()
+    print(f"Fake Bot API listening on http://localhost:{server.port}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(dict(server.calls))
+    finally:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every answer')
+    parser.add_argument('--flood-rate', type=float, default=0.0, help='fraction of calls answered with 429')
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.port, args.latency, args.flood_rate))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,157 @@
+"""
+Webhook intake load test against a fake Bot API.
+
+Run from the project root:
+    python -m benchmarks.load_webhook --updates 500 --concurrency 50
+
+Starts the fake Bot API and, unless --webhook-url is given, a bot in
+webhook mode in this process. To load test bot instances started on
+their own (e.g. several behind a load balancer), start this first with
+--webhook-url pointing at them, then run the bots with BOT_MODE=webhook
+and BOT_API_URL=http://<this host>:<--api-port>.
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from typing import Dict, Optional
+
+import httpx
+
+import config
+from benchmarks.corpus import simple_bulletin
+from benchmarks.fake_telegram import FakeTelegram
+
+
+def _update(update_id: int, chat_id: int, text: str) -> Dict:
+    user = {'id': chat_id, 'is_bot': False, 'first_name': 'Carga'}
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': user,
+            'text': text,
+        },
+    }
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+async def _start_local_bot(api_url: str, port: int, data_dir: str, concurrent_updates: int,
+                           global_rate: float, stop: asyncio.Event) -> asyncio.Task:
+    config.REPORT_STORE['path'] = f"{data_dir}/reports.sqlite3"
+    config.TIMESERIES['path'] = f"{data_dir}/occupancy.sqlite3"
+    config.STATE['path'] = f"{data_dir}/state.sqlite3"
+    config.EMAIL['transport'] = 'smtp'  # never connects in this test
+    config.WEBHOOK['concurrent_updates'] = concurrent_updates
+    config.TELEGRAM_LIMITS['global_rate'] = global_rate
+    from bot import HospitalBot, build_application, run_webhook
+
+    hospital_bot = HospitalBot()
+
+    async def shutdown(application):
+        await hospital_bot.close()
+
+    application = build_application(hospital_bot, shutdown, token='123456:fake', api_url=api_url)
+    settings = dict(config.WEBHOOK, url=None, listen='127.0.0.1', port=port, secret_token=None)
+    return asyncio.create_task(run_webhook(application, settings, stop))
+
+
+async def _wait_ready(client: httpx.AsyncClient, webhook_url: str, timeout: float = 60.0) -> None:
+    health_url = webhook_url.rsplit('/', 1)[0] + '/healthz'
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get(health_url)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Webhook at {webhook_url} did not come up")
+        await asyncio.sleep(0.2)
+
+
+async def run(updates: int, concurrency: int, units: int, api_port: int, webhook_url: Optional[str],
+              webhook_port: int, concurrent_updates: int, global_rate: float, latency: float,
+              flood_rate: float, timeout: float) -> None:
+    api = FakeTelegram('0.0.0.0', api_port, latency, flood_rate)
+    await api.start()
+    stop = asyncio.Event()
+    bot_task = None
+    data_dir = tempfile.TemporaryDirectory()
+    if webhook_url is None:
+        bot_task = await _start_local_bot(f"http://127.0.0.1:{api.port}", webhook_port, data_dir.name,
+                                          concurrent_updates, global_rate, stop)
+        webhook_url = f"http://127.0.0.1:{webhook_port}{config.WEBHOOK['path']}"
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    posted: Dict[int, float] = {}
+    post_times = []
+    try:
+        async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+            await _wait_ready(client, webhook_url)
+            semaphore = asyncio.Semaphore(concurrency)
+            bulletins = [simple_bulletin(units, seed) for seed in range(min(updates, 50))]
+
+            async def post(index: int) -> None:
+                chat_id = 100000 + index
+                async with semaphore:
+                    posted[chat_id] = started = time.monotonic()
+                    response = await client.post(webhook_url, json=_update(
+                        index + 1, chat_id, bulletins[index % len(bulletins)]
+                    ))
+                    post_times.append(time.monotonic() - started)
+                    response.raise_for_status()
+
+            started = time.monotonic()
+            await asyncio.gather(*(post(index) for index in range(updates)))
+            accepted = time.monotonic() - started
+            deadline = started + timeout
+            while len(api.documents) < updates and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            finished = time.monotonic() - started
+    finally:
+        stop.set()
+        if bot_task is not None:
+            await bot_task
+        await api.stop()
+        data_dir.cleanup()
+
+    latencies = [api.documents[chat_id] - posted[chat_id] for chat_id in api.documents if chat_id in posted]
+    print(f"{updates} updates, {concurrency} concurrent posts, {units} units each")
+    print(f"accepted in {accepted:.2f}s ({updates / accepted:.0f} updates/s), "
+          f"webhook p50 {statistics.median(post_times) * 1000:.1f} ms, "
+          f"p95 {_percentile(post_times, 0.95) * 1000:.1f} ms")
+    print(f"{len(api.documents)} reports delivered in {finished:.2f}s "
+          f"({len(api.documents) / finished:.1f} reports/s)")
+    if latencies:
+        print(f"update to report p50 {statistics.median(latencies) * 1000:.0f} ms, "
+              f"p95 {_percentile(latencies, 0.95) * 1000:.0f} ms")
+    print(f"Bot API calls: {dict(api.calls)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--updates', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50, help='webhook requests in flight')
+    parser.add_argument('--units', type=int, default=20, help='units per bulletin')
+    parser.add_argument('--api-port', type=int, default=8081)
+    parser.add_argument('--webhook-url', help='bot instances to test instead of an in-process bot')
+    parser.add_argument('--webhook-port', type=int, default=8088, help='port of the in-process bot')
+    parser.add_argument('--concurrent-updates', type=int, default=config.WEBHOOK['concurrent_updates'])
+    parser.add_argument('--global-rate', type=float, default=config.TELEGRAM_LIMITS['global_rate'],
+                        help='Bot API calls per second allowed to the in-process bot')
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds per fake Bot API call')
+    parser.add_argument('--flood-rate', type=float, default=0.0, help='fraction of calls answered with 429')
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.updates, args.concurrency, args.units, args.api_port, args.webhook_url,
+                    args.webhook_port, args.concurrent_updates, args.global_rate, args.latency,
+                    args.flood_rate, args.timeout))
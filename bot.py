@@ -1,5 +1,12 @@
+import asyncio
+import functools
+import io
 import logging
-from telegram import Update
+import multiprocessing
+import signal
+from typing import List, Optional
+from telegram import Bot, Update
+from telegram.error import BadRequest
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -10,26 +17,136 @@ from telegram.ext import (
 from hospital_parser import HospitalDataParser
 from pdf_generator import PDFGenerator
 from email_sender import EmailSender
-from config import BOT_TOKEN
+from render_executor import RenderQueueFullError, RenderTimeoutError
+from file_id_registry import FileIdRegistry
+from report_store import create_report_store
+from state_backend import SharedDict, create_backend
+from timeseries_store import TimeSeriesStore
+from subscriptions import SubscriptionStore
+from report_scheduler import ReportScheduler
+from chat_jobs import ChatJobs
+from telegram_dispatcher import BROADCAST, INTERACTIVE, TelegramDispatcher
+from webhook_server import WebhookServer
+from shard_router import ShardRouter
+from instrumentation import configure_logging, log_event, timed
+from metrics import (REGISTRY, ERRORS, REQUESTS, STAGE_SECONDS, CallbackCounter, Gauge,
+                     start_metrics_server)
+from config import (ADMIN_USER_IDS, BOT_API_URL, BOT_TOKEN, FILE_ID_INDEX, METRICS, SHARDS,
+                    SUBSCRIPTIONS, TELEGRAM_LIMITS, TIMESERIES, WEBHOOK)
 import traceback
 import re
 
-# Update logging section to be more verbose
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.DEBUG
+REPORT_FILENAME = 'relatorio_hospitalar.pdf'
+REPORT_CAPTION = (
+    "📊 Aqui está seu relatório de ocupação hospitalar.\n"
+    "Use /share email@exemplo.com para compartilhar por email."
 )
+
 logger = logging.getLogger(__name__)
 
 class HospitalBot:
     def __init__(self):
         self.parser = HospitalDataParser()
-        self.pdf_generator = PDFGenerator()
+        self.history = TimeSeriesStore(**TIMESERIES)  # Daily occupancy per unit, for trends
+        self.pdf_generator = PDFGenerator(history=self.history)
         self.email_sender = EmailSender()
-        self.user_templates = {}
-        self.user_reports = {}  # Store generated reports temporarily
+        self.state = create_backend()  # Shared by every bot process
+        self.user_templates = SharedDict(self.state, 'user_templates')
+        self.user_reports = create_report_store(self.state)  # Last report per user, for /share
+        self.file_ids = FileIdRegistry(self.state, **FILE_ID_INDEX)  # Telegram file_ids of uploaded reports
+        self.outbox = TelegramDispatcher(**TELEGRAM_LIMITS)  # Rate-limited Telegram API calls
+        self.chat_jobs = ChatJobs()  # One bulletin processed per chat at a time
+        self.subscriptions = SubscriptionStore(self.state)
+        self.scheduler = ReportScheduler(
+            self.pdf_generator, self.subscriptions,
+            functools.partial(self._send_report, priority=BROADCAST),
+            delay=SUBSCRIPTIONS['delay'],
+            publishers=ADMIN_USER_IDS
+        )
+        self._warm_up: Optional[asyncio.Task] = None  # Template loading started by post_init
+        self._register_metrics()
         logger.info("HospitalBot initialized")
 
+    async def post_init(self, application: Application) -> None:
+        """Load the report templates in the background once updates are being served."""
+        self._warm_up = asyncio.create_task(self.pdf_generator.warm_up())
+
+    async def close(self) -> None:
+        """Stop background work and close the stores."""
+        await self.scheduler.close()
+        await self.outbox.close()
+        self.pdf_generator.shutdown()
+        await self.email_sender.close()
+        self.user_reports.close()
+        self.history.close()
+        self.state.close()
+
+    def _render_pending(self) -> int:
+        executor = self.pdf_generator._render_executor
+        return executor.pending if executor is not None else 0
+
+    def _register_metrics(self) -> None:
+        """Expose queue depths and cache counters of this bot's components."""
+        cache = self.pdf_generator.cache
+        REGISTRY.register(Gauge(
+            'hospital_bot_render_jobs', 'Render jobs running or waiting', self._render_pending
+        ))
+        REGISTRY.register(Gauge(
+            'hospital_bot_email_queue_depth', 'Email batches waiting for a worker',
+            lambda: self.email_sender.queue_depth
+        ))
+        REGISTRY.register(Gauge(
+            'hospital_bot_telegram_queue_depth', 'Telegram API calls waiting for a rate limit token',
+            lambda: self.outbox.queue_depth
+        ))
+        REGISTRY.register(CallbackCounter(
+            'hospital_bot_renders_coalesced_total', 'Report requests served by a render already running',
+            lambda: self.pdf_generator.coalesced
+        ))
+        REGISTRY.register(CallbackCounter(
+            'hospital_bot_messages_superseded_total', 'Bulletins dropped for a newer one from the same chat',
+            lambda: self.chat_jobs.superseded
+        ))
+        REGISTRY.register(CallbackCounter(
+            'hospital_bot_report_cache_requests_total', 'Report cache lookups by result',
+            lambda: {('hit',): cache.hits, ('miss',): cache.misses}, ('result',)
+        ))
+        REGISTRY.register(Gauge(
+            'hospital_bot_report_cache_bytes', 'Bytes held by the report cache',
+            lambda: cache.stats()['bytes']
+        ))
+
+    def format_stats(self) -> str:
+        """Summarize metrics for the /stats command."""
+        lines = ["📈 Estatísticas do bot\n"]
+        snapshot = STAGE_SECONDS.snapshot()
+        for (stage,), (_, total, count) in sorted(snapshot.items()):
+            p95 = STAGE_SECONDS.quantile(0.95, stage=stage)
+            lines.append(f"• {stage}: {count} execuções, média {total / count * 1000:.1f} ms, "
+                         f"p95 {p95 * 1000:.1f} ms")
+        if not snapshot:
+            lines.append("Nenhuma etapa registrada ainda.")
+
+        lookups = self.pdf_generator.cache.hits + self.pdf_generator.cache.misses
+        hit_rate = self.pdf_generator.cache.hits / lookups * 100 if lookups else 0.0
+        lines.append("")
+        lines.append(f"Fila de renderização: {self._render_pending()}")
+        lines.append(f"Fila de email: {self.email_sender.queue_depth}")
+        lines.append(f"Fila do Telegram: {self.outbox.queue_depth}")
+        lines.append(f"Cache de relatórios: {hit_rate:.0f}% de acertos ({lookups} consultas)")
+
+        errors = ERRORS.values()
+        if errors:
+            lines.append("Erros: " + ", ".join(f"{stage}={int(count)}" for (stage,), count in sorted(errors.items())))
+        return "\n".join(lines)
+
+    async def stats(self, update: Update, context: CallbackContext):
+        """Handle /stats command (administrators only)."""
+        if update.effective_user.id not in ADMIN_USER_IDS:
+            await self._reply(update, "❌ Comando disponível apenas para administradores.")
+            return
+        await self._reply(update, self.format_stats())
+
     async def start(self, update: Update, context: CallbackContext):
         """Handle /start command."""
         logger.info(f"Start command received from user {update.effective_user.id}")
@@ -40,9 +157,10 @@ class HospitalBot:
             "Comandos disponíveis:\n"
             "/template - Lista e seleciona modelos de relatório\n"
             "/help - Mostra instruções detalhadas\n"
-            "/share - Compartilha o último relatório por email"
+            "/share - Compartilha o último relatório por email\n"
+            "/subscribe - Recebe o relatório diário automaticamente"
         )
-        await update.message.reply_text(welcome_message)
+        await self._reply(update, welcome_message)
 
     async def help(self, update: Update, context: CallbackContext):
         """Handle /help command."""
@@ -64,16 +182,21 @@ class HospitalBot:
             "/template - Gerencia modelos de relatório\n"
             "/template list - Lista modelos disponíveis\n"
             "/template set <nome> - Define modelo padrão\n"
-            "/share <email> - Compartilha o último relatório por email"
+            "/share <email> [<email> ...] - Compartilha o último relatório por email\n"
+            "/subscribe - Recebe o relatório de cada novo boletim neste chat\n"
+            "/unsubscribe - Cancela o recebimento do relatório diário"
         )
-        await update.message.reply_text(help_message)
+        await self._reply(update, help_message)
 
     async def share_report(self, update: Update, context: CallbackContext):
         """Handle /share command to share the latest report via email."""
+        REQUESTS.inc(kind='share')
         user_id = str(update.effective_user.id)
+        pdf_data = await asyncio.to_thread(self.user_reports.get, user_id)
 
-        if user_id not in self.user_reports:
-            await update.message.reply_text(
+        if pdf_data is None:
+            await self._reply(
+                update,
                 "❌ Nenhum relatório disponível para compartilhar. "
                 "Por favor, gere um relatório primeiro."
             )
@@ -81,101 +204,201 @@ class HospitalBot:
 
         # Check if email was provided
         if not context.args:
-            await update.message.reply_text(
+            await self._reply(
+                update,
                 "Por favor, forneça um endereço de email após o comando.\n"
                 "Exemplo: /share email@exemplo.com"
             )
             return
 
-        email = context.args[0]
+        emails = context.args
         # Basic email validation
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-            await update.message.reply_text("❌ Endereço de email inválido.")
+        invalid = [email for email in emails if not re.match(r"[^@]+@[^@]+\.[^@]+", email)]
+        if invalid:
+            await self._reply(update, "❌ Endereço de email inválido: " + ", ".join(invalid))
             return
 
-        pdf_data = self.user_reports[user_id]
-
         # Send processing message
-        processing_msg = await update.message.reply_text(
-            "🔄 Enviando relatório por email... Por favor, aguarde."
-        )
+        processing_msg = await self._reply(update, "🔄 Enviando relatório por email... Por favor, aguarde.")
+
+        with timed(logger, 'email', user=user_id, recipients=len(emails)):
+            sent = await self.email_sender.send_report_async(emails, pdf_data)
+        if sent:
+            await self.outbox.edit_status(
+                processing_msg, "✅ Relatório enviado com sucesso para " + ", ".join(emails)
+            )
+        else:
+            ERRORS.inc(stage='email')
+            await self.outbox.edit_status(
+                processing_msg, "❌ Erro ao enviar o relatório. Por favor, tente novamente."
+            )
 
-        if self.email_sender.send_report(email, pdf_data):
-            await processing_msg.edit_text(
-                "✅ Relatório enviado com sucesso para " + email
+    async def subscribe(self, update: Update, context: CallbackContext):
+        """Handle /subscribe command to receive the daily report in this chat."""
+        chat_id = update.effective_chat.id
+        template_name = self.user_templates.get(str(update.effective_user.id))
+        if self.subscriptions.subscribe(chat_id, template_name):
+            log_event(logger, logging.INFO, 'subscription_added', chat=chat_id)
+            message = (
+                "✅ Inscrição realizada! Este chat receberá o relatório "
+                "assim que um novo boletim for processado.\n"
+                "Use /unsubscribe para cancelar."
             )
         else:
-            await processing_msg.edit_text(
-                "❌ Erro ao enviar o relatório. Por favor, tente novamente."
+            message = "ℹ️ Este chat já está inscrito. O modelo de relatório foi atualizado."
+        if not self.scheduler.publishers:
+            # Only publishers' bulletins are broadcast, so nothing would ever arrive
+            logger.warning("Subscription without publishers; set ADMIN_USER_IDS to deliver reports")
+            message += (
+                "\n\n⚠️ Nenhum publicador de boletins está configurado (ADMIN_USER_IDS), "
+                "então nenhum relatório será enviado até que um seja definido."
             )
+        await self._reply(update, message)
+
+    async def unsubscribe(self, update: Update, context: CallbackContext):
+        """Handle /unsubscribe command."""
+        chat_id = update.effective_chat.id
+        if self.subscriptions.unsubscribe(chat_id):
+            log_event(logger, logging.INFO, 'subscription_removed', chat=chat_id)
+            await self._reply(update, "✅ Inscrição cancelada.")
+        else:
+            await self._reply(update, "ℹ️ Este chat não está inscrito.")
 
     async def process_message(self, update: Update, context: CallbackContext):
         """Process incoming messages and generate PDF reports."""
+        REQUESTS.inc(kind='message')
+        # A bulletin edited or resent quickly replaces the one still being processed
+        await self.chat_jobs.run(update.effective_chat.id, lambda: self._process_message(update, context))
+
+    async def _process_message(self, update: Update, context: CallbackContext):
+        processing_message = None
         try:
-            logger.info(f"Processing message from user {update.effective_user.id}")
-            logger.debug(f"Message content: {update.message.text[:100]}...")
+            user_id = update.effective_user.id
+            log_event(logger, logging.INFO, 'message_received', user=user_id,
+                      chars=len(update.effective_message.text))
+            log_event(logger, logging.DEBUG, 'message_content', preview=update.effective_message.text[:100])
 
             # Send processing message
-            processing_message = await update.message.reply_text(
-                "🔄 Processando sua mensagem... Por favor, aguarde."
-            )
+            processing_message = await self._reply(update, "🔄 Processando sua mensagem... Por favor, aguarde.")
 
             # Parse message
-            logger.info("Attempting to parse message...")
-            data = self.parser.parse_message(update.message.text)
-            logger.info(f"Message parsed successfully. Data structure: {data.keys()}")
-            logger.info(f"Number of units: {len(data.get('units', []))}")
-
-            if not self.parser.validate_data(data):
-                logger.warning("Invalid message format")
-                await processing_message.edit_text(
+            with timed(logger, 'parse', user=user_id):
+                data = self.parser.parse_message(update.effective_message.text)
+            log_event(logger, logging.INFO, 'message_parsed', user=user_id,
+                      units=len(data.get('units', [])), hospitals=len(data.get('hospitals', [])))
+
+            with timed(logger, 'validate', user=user_id):
+                valid = self.parser.validate_data(data)
+            if not valid:
+                ERRORS.inc(stage='validate')
+                log_event(logger, logging.WARNING, 'invalid_message', user=user_id)
+                await self.outbox.edit_status(
+                    processing_message,
                     "❌ Erro: Formato da mensagem inválido. "
                     "Certifique-se de que a mensagem está no formato correto."
                 )
                 return
 
-            # Generate PDF
-            logger.info("Starting PDF generation with data:")
-            pdf_buffer = self.pdf_generator.generate_pdf(data,
-                self.user_templates.get(str(update.effective_user.id)))
+            # Keep the figures for trend reports; the report is sent even if this fails
+            try:
+                with timed(logger, 'ingest', user=user_id):
+                    # A write transaction; keep it off the event loop
+                    await asyncio.to_thread(self.history.ingest, data)
+            except Exception as e:
+                logger.error(f"Failed to record occupancy history: {str(e)}")
 
-            # Store the PDF data for sharing
-            self.user_reports[str(update.effective_user.id)] = pdf_buffer.getvalue()
+            # Generate PDF in the render pool so other chats keep being served
+            template_name = self.user_templates.get(str(user_id))
+            try:
+                with timed(logger, 'render', user=user_id):
+                    pdf_buffer = await self.pdf_generator.generate_pdf_async(data, template_name)
+            except RenderQueueFullError:
+                logger.warning("Render pool saturated, rejecting request")
+                await self.outbox.edit_status(
+                    processing_message,
+                    "⏳ Muitos relatórios sendo gerados no momento. "
+                    "Por favor, tente novamente em alguns instantes."
+                )
+                return
+            except RenderTimeoutError:
+                logger.error("PDF generation timed out")
+                await self.outbox.edit_status(
+                    processing_message,
+                    "❌ A geração do relatório demorou demais. "
+                    "Por favor, tente novamente."
+                )
+                return
+
+            # Store the PDF data for sharing; the store writes to disk, so not on the event loop
+            await asyncio.to_thread(self.user_reports.put, str(user_id), pdf_buffer.getvalue())
 
             # Send PDF
-            logger.info("Sending PDF to user...")
-            await context.bot.send_document(
-                chat_id=update.effective_chat.id,
-                document=pdf_buffer,
-                filename='relatorio_hospitalar.pdf',
-                caption=(
-                    "📊 Aqui está seu relatório de ocupação hospitalar.\n"
-                    "Use /share email@exemplo.com para compartilhar por email."
-                )
-            )
-            logger.info("PDF sent successfully")
+            with timed(logger, 'upload', user=user_id):
+                await self._send_report(context.bot, update.effective_chat.id, pdf_buffer)
+            log_event(logger, logging.INFO, 'report_sent', user=user_id)
+
+            # Deliver the new bulletin to subscribed chats, if a publisher sent it
+            self.scheduler.bulletin_ingested(data, context, user_id, update.effective_chat.id, template_name)
 
             # Delete processing message
-            await processing_message.delete()
+            await self.outbox.delete_status(processing_message)
 
+        except asyncio.CancelledError:
+            # Superseded by a newer message from this chat
+            if processing_message is not None:
+                self.outbox.discard_status(processing_message)
+            raise
         except Exception as e:
+            ERRORS.inc(stage='process_message')
             logger.error(f"Error processing message: {str(e)}")
             logger.error(traceback.format_exc())
             error_message = (
                 "❌ Ocorreu um erro ao processar sua mensagem.\n"
                 "Por favor, verifique se o formato está correto e tente novamente."
             )
-            await update.message.reply_text(error_message)
+            await self._reply(update, error_message)
+
+    async def _reply(self, update: Update, text: str):
+        """Reply to the update's message through the rate-limited outbox."""
+        message = update.effective_message
+        return await self.outbox.send(update.effective_chat.id, lambda: message.reply_text(text))
+
+    async def _send_report(self, bot, chat_id: int, pdf_buffer, priority: int = INTERACTIVE) -> None:
+        """Send a report, reusing Telegram's file_id when the same PDF was uploaded before."""
+        pdf_data = pdf_buffer.getvalue()
+        content_hash = FileIdRegistry.content_hash(pdf_data)
+        file_id = await asyncio.to_thread(self.file_ids.get, content_hash)
+        if file_id:
+            try:
+                await self.outbox.send(chat_id, lambda: bot.send_document(
+                    chat_id=chat_id, document=file_id, caption=REPORT_CAPTION
+                ), priority)
+                log_event(logger, logging.DEBUG, 'report_sent_by_file_id', chat=chat_id)
+                return
+            except BadRequest as e:
+                logger.warning(f"Cached file_id rejected, uploading again: {e}")
+                await asyncio.to_thread(self.file_ids.forget, content_hash)
+
+        # A fresh buffer per attempt, as a retried upload must start from the beginning
+        message = await self.outbox.send(chat_id, lambda: bot.send_document(
+            chat_id=chat_id,
+            document=io.BytesIO(pdf_data),
+            filename=REPORT_FILENAME,
+            caption=REPORT_CAPTION
+        ), priority)
+        if message is not None and message.document is not None:
+            await asyncio.to_thread(self.file_ids.put, content_hash, message.document.file_id)
 
     async def handle_template(self, update: Update, context: CallbackContext):
         """Handle /template command."""
+        await self.pdf_generator.warm_up()
         if not context.args:
             templates = self.pdf_generator.list_templates()
             message = "📋 Modelos disponíveis:\n\n"
             for name, desc in templates.items():
                 message += f"• {name}: {desc}\n"
             message += "\nUse /template set <nome> para selecionar um modelo"
-            await update.message.reply_text(message)
+            await self._reply(update, message)
             return
 
         command = context.args[0].lower()
@@ -184,38 +407,180 @@ class HospitalBot:
             message = "📋 Modelos disponíveis:\n\n"
             for name, desc in templates.items():
                 message += f"• {name}: {desc}\n"
-            await update.message.reply_text(message)
+            await self._reply(update, message)
 
         elif command == "set" and len(context.args) > 1:
             template_name = context.args[1]
             user_id = str(update.effective_user.id)
-            if self.pdf_generator.set_default_template(template_name):
+            if self.pdf_generator.has_template(template_name):
                 self.user_templates[user_id] = template_name
-                await update.message.reply_text(f"✅ Modelo '{template_name}' selecionado com sucesso!")
+                await self._reply(update, f"✅ Modelo '{template_name}' selecionado com sucesso!")
             else:
-                await update.message.reply_text(f"❌ Modelo '{template_name}' não encontrado.")
+                await self._reply(update, f"❌ Modelo '{template_name}' não encontrado.")
 
-def main():
-    """Start the bot."""
-    # Create application
-    application = Application.builder().token(BOT_TOKEN).build()
+def build_application(hospital_bot: HospitalBot, post_shutdown=None, token: Optional[str] = BOT_TOKEN,
+                      api_url: Optional[str] = BOT_API_URL) -> Application:
+    """
+    Create the application with the bot's handlers.
 
-    # Create bot instance
-    hospital_bot = HospitalBot()
+    Args:
+        hospital_bot: Bot whose handlers are registered
+        post_shutdown: Coroutine function run after the application stops
+        token: Bot token
+        api_url: Bot API server to use instead of Telegram's
+    """
+    # Updates of different chats are handled concurrently
+    builder = (Application.builder().token(token)
+               .concurrent_updates(WEBHOOK['concurrent_updates'])
+               .post_init(hospital_bot.post_init))
+    if post_shutdown is not None:
+        builder = builder.post_shutdown(post_shutdown)
+    if api_url:
+        builder = builder.base_url(f"{api_url}/bot").base_file_url(f"{api_url}/file/bot")
+    application = builder.build()
 
-    # Add handlers
     application.add_handler(CommandHandler("start", hospital_bot.start))
     application.add_handler(CommandHandler("help", hospital_bot.help))
     application.add_handler(CommandHandler("template", hospital_bot.handle_template))
     application.add_handler(CommandHandler("share", hospital_bot.share_report))
+    application.add_handler(CommandHandler("stats", hospital_bot.stats))
+    application.add_handler(CommandHandler("subscribe", hospital_bot.subscribe))
+    application.add_handler(CommandHandler("unsubscribe", hospital_bot.unsubscribe))
     application.add_handler(MessageHandler(
         filters.TEXT & ~filters.COMMAND,
         hospital_bot.process_message
     ))
+    return application
+
+async def _register_webhook(bot, settings: dict) -> None:
+    await bot.set_webhook(
+        settings['url'],
+        secret_token=settings['secret_token'],
+        max_connections=settings['max_connections'],
+        allowed_updates=Update.ALL_TYPES
+    )
+
+def _stop_on_signals() -> asyncio.Event:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    return stop
+
+async def run_webhook(application: Application, settings: dict = WEBHOOK,
+                      stop: Optional[asyncio.Event] = None) -> None:
+    """
+    Serve updates posted by Telegram until ``stop`` is set, or until
+    SIGINT or SIGTERM when no event is given.
+
+    Several instances can run behind a load balancer; only those with
+    ``settings['url']`` set register the webhook with Telegram.
+    """
+    server = WebhookServer(application, settings['path'], settings['secret_token'],
+                           settings['listen'], settings['port'])
+    if stop is None:
+        stop = _stop_on_signals()
+
+    await application.initialize()
+    try:
+        await application.start()
+        await server.start()
+        if settings['url']:
+            await _register_webhook(application.bot, settings)
+        if application.post_init is not None:
+            await application.post_init(application)
+        log_event(logger, logging.INFO, 'webhook_listening', port=server.port, path=settings['path'])
+        await stop.wait()
+    finally:
+        await server.stop()
+        if application.running:
+            await application.stop()
+        await application.shutdown()
+        if application.post_shutdown is not None:
+            await application.post_shutdown(application)
+
+def shard_urls(settings: dict = WEBHOOK, shards: dict = SHARDS) -> List[str]:
+    """Worker endpoints: the configured ones, or one local worker per shard."""
+    if shards['urls']:
+        return shards['urls']
+    return [f"http://127.0.0.1:{shards['base_port'] + i}{settings['path']}"
+            for i in range(shards['workers'])]
+
+async def run_router(settings: dict = WEBHOOK, shards: dict = SHARDS,
+                     stop: Optional[asyncio.Event] = None) -> None:
+    """
+    Receive the webhook and forward each update to the worker that owns
+    its chat, until ``stop`` is set or SIGINT/SIGTERM.
+    """
+    router = ShardRouter(shard_urls(settings, shards), settings['path'], settings['secret_token'],
+                         settings['listen'], settings['port'])
+    if stop is None:
+        stop = _stop_on_signals()
+
+    await router.start()
+    try:
+        if settings['url']:
+            async with Bot(BOT_TOKEN, base_url=BOT_API_URL) as bot:
+                await _register_webhook(bot, settings)
+        log_event(logger, logging.INFO, 'router_listening', port=router.port,
+                  path=settings['path'], shards=len(router.shard_urls))
+        await stop.wait()
+    finally:
+        await router.stop()
+
+def _run_worker(index: int) -> None:
+    """Entry point of a local worker process: a webhook bot on its own loopback port."""
+    WEBHOOK.update(listen='127.0.0.1', port=SHARDS['base_port'] + index, url=None)
+    SHARDS.update(workers=1, urls=[])
+    if METRICS['port']:
+        METRICS['port'] += index + 1
+    main()
+
+def main():
+    """Start the bot."""
+    configure_logging()
+
+    if WEBHOOK['mode'] == 'webhook' and (SHARDS['workers'] > 1 or SHARDS['urls']):
+        # Spawned rather than forked: each worker builds its own event loop,
+        # render pool and database connections from scratch
+        spawn = multiprocessing.get_context('spawn')
+        workers = [] if SHARDS['urls'] else [
+            spawn.Process(target=_run_worker, args=(i,), name=f'bot-worker-{i}')
+            for i in range(SHARDS['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        logger.info(f"Starting shard router for {len(shard_urls())} workers...")
+        try:
+            asyncio.run(run_router())
+        finally:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
+        return
+    if SHARDS['workers'] > 1:
+        logger.warning("BOT_WORKERS is ignored in polling mode; only one process may poll for updates")
+
+    # Create bot instance
+    hospital_bot = HospitalBot()
+    metrics_server = start_metrics_server(METRICS['port']) if METRICS['port'] else None
+
+    async def shutdown(application: Application):
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        await hospital_bot.close()
+
+    # Create application
+    application = build_application(hospital_bot, shutdown)
 
     # Start bot
-    logger.info("Starting bot...")
-    application.run_polling()
+    if WEBHOOK['mode'] == 'webhook':
+        logger.info("Starting bot in webhook mode...")
+        asyncio.run(run_webhook(application))
+    else:
+        logger.info("Starting bot...")
+        application.run_polling()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,55 @@
+"""Per-chat serialization of bulletin processing, latest message wins."""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from instrumentation import log_event
+
+logger = logging.getLogger(__name__)
+
+
+class ChatJobs:
+    """
+    Runs at most one job per chat at a time.
+
+    A job started for a chat that already has one running cancels it and
+    waits for it to unwind before starting, so the newest message of a
+    chat is the one that gets processed and superseded runs never overlap
+    with it. Jobs of different chats run concurrently.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[int, asyncio.Task] = {}
+        self.superseded = 0
+
+    @property
+    def active(self) -> int:
+        """Number of chats with a job running."""
+        return len(self._jobs)
+
+    async def run(self, chat_id: int, job: Callable[[], Awaitable[Any]]) -> Optional[Any]:
+        """
+        Run ``job`` in the calling task as the chat's only job.
+
+        Returns:
+            The job's result, or None if a newer job superseded it
+        """
+        current = asyncio.current_task()
+        previous = self._jobs.get(chat_id)
+        self._jobs[chat_id] = current
+        try:
+            if previous is not None and not previous.done():
+                previous.cancel()
+                await asyncio.wait([previous])
+            return await job()
+        except asyncio.CancelledError:
+            if self._jobs.get(chat_id) is current:
+                # Cancelled from outside, e.g. on shutdown
+                raise
+            current.uncancel()
+            self.superseded += 1
+            log_event(logger, logging.INFO, 'job_superseded', chat=chat_id)
+            return None
+        finally:
+            if self._jobs.get(chat_id) is current:
+                del self._jobs[chat_id]
@@ -4,6 +4,26 @@ import os
 
 # Telegram Bot Settings
 BOT_TOKEN = os.environ.get("BOT_TOKEN")
+BOT_API_URL = os.environ.get('BOT_API_URL')  # e.g. a local fake Bot API for load tests
+
+# Update Intake Settings
+WEBHOOK = {
+    'mode': os.environ.get('BOT_MODE', 'polling'),  # 'polling' or 'webhook'
+    'url': os.environ.get('WEBHOOK_URL'),  # public HTTPS URL Telegram posts to, ending in 'path'
+    'path': os.environ.get('WEBHOOK_PATH', '/telegram'),
+    'listen': os.environ.get('WEBHOOK_LISTEN', '0.0.0.0'),
+    'port': int(os.environ.get('WEBHOOK_PORT', 8443)),
+    'secret_token': os.environ.get('WEBHOOK_SECRET'),
+    'max_connections': int(os.environ.get('WEBHOOK_MAX_CONNECTIONS', 40)),  # parallel deliveries from Telegram
+    'concurrent_updates': int(os.environ.get('CONCURRENT_UPDATES', 32)),  # updates handled at the same time
+}
+
+# Webhook Sharding Settings: updates are routed to a worker by chat id
+SHARDS = {
+    'workers': int(os.environ.get('BOT_WORKERS', 1)),  # local worker processes, in webhook mode
+    'base_port': int(os.environ.get('SHARD_BASE_PORT', 8450)),  # worker i listens on base_port + i
+    'urls': [url.strip() for url in os.environ.get('SHARD_URLS', '').split(',') if url.strip()],  # remote workers
+}
 
 # PDF Document Settings
 PAGE_WIDTH = 595.27  # A4 width in points
@@ -34,6 +54,111 @@ FONT_SIZE_BODY = FONT_SIZES['body']
 
 # Template Settings
 TEMPLATES = {
-    'directory': 'templates',
+    'directory': os.environ.get('TEMPLATES_DIR', 'templates'),  # *_template.py plugins, besides the built-in ones
     'default': 'default',
-}
\ No newline at end of file
+    'entry_point_group': 'hospital_bot.templates',  # templates installed as packages
+    'reload_interval': float(os.environ.get('TEMPLATES_RELOAD_INTERVAL', 5)),  # seconds between checks for changed files; 0 disables
+}
+# Render Executor Settings
+RENDER_EXECUTOR = {
+    'kind': os.environ.get('RENDER_EXECUTOR', 'thread'),  # 'thread' or 'process'
+    'max_workers': int(os.environ.get('RENDER_WORKERS', 4)),
+    'max_queue': int(os.environ.get('RENDER_MAX_QUEUE', 16)),  # jobs waiting beyond running ones
+    'timeout': float(os.environ.get('RENDER_TIMEOUT', 30)),  # seconds per job
+}
+
+# Report Cache Settings
+REPORT_CACHE = {
+    'max_entries': int(os.environ.get('REPORT_CACHE_ENTRIES', 128)),
+    'max_bytes': int(os.environ.get('REPORT_CACHE_BYTES', 32 * 1024 * 1024)),
+    'ttl': float(os.environ.get('REPORT_CACHE_TTL', 24 * 3600)),  # upper bound, seconds
+}
+
+# Local Storage Settings
+DATA_DIR = os.environ.get('DATA_DIR', 'data')
+STATE = {
+    'backend': os.environ.get('STATE_BACKEND', 'sqlite'),  # 'sqlite' (one node) or 'redis' (several nodes)
+    'path': os.path.join(DATA_DIR, 'state.sqlite3'),
+    'redis_url': os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+    'prefix': os.environ.get('STATE_PREFIX', 'hospital_bot:'),
+    'report_ttl': float(os.environ.get('STATE_REPORT_TTL', 30 * 24 * 3600)),  # seconds a shared report is kept
+}
+FILE_ID_INDEX = {
+    'max_entries': int(os.environ.get('FILE_ID_INDEX_ENTRIES', 1000)),
+}
+
+# Occupancy Table Settings
+OCCUPANCY_TABLE = {
+    'stream_threshold': int(os.environ.get('OCCUPANCY_STREAM_THRESHOLD', 50)),  # units before paging rows lazily
+    'top_k': int(os.environ.get('OCCUPANCY_TOP_K', 0)),  # list only the most occupied units, all when 0
+}
+
+# Report Logos
+LOGOS = {
+    'header': 'attached_assets/image_1739196996707.png',
+    'footer': 'attached_assets/image_1739197036571.png',
+    'max_width_px': int(os.environ.get('LOGO_MAX_WIDTH_PX', 0)) or None,  # downsample wider logos
+}
+
+# Email Settings
+EMAIL = {
+    'transport': os.environ.get('EMAIL_TRANSPORT', 'sendgrid'),  # 'sendgrid' or 'smtp'
+    'sender': os.environ.get('SENDER_EMAIL', 'noreply@cieges.acre.gov.br'),
+    'sendgrid_api_key': os.environ.get('SENDGRID_API_KEY'),
+    'smtp_host': os.environ.get('SMTP_HOST', 'localhost'),
+    'smtp_port': int(os.environ.get('SMTP_PORT', 1025)),
+    'smtp_username': os.environ.get('SMTP_USERNAME'),
+    'smtp_password': os.environ.get('SMTP_PASSWORD'),
+    'smtp_starttls': os.environ.get('SMTP_STARTTLS', '') == '1',
+    'pool_size': int(os.environ.get('EMAIL_POOL_SIZE', 10)),  # keep-alive HTTP connections
+    'workers': int(os.environ.get('EMAIL_WORKERS', 2)),
+    'max_queue': int(os.environ.get('EMAIL_MAX_QUEUE', 100)),
+    'max_attempts': int(os.environ.get('EMAIL_MAX_ATTEMPTS', 4)),
+    'backoff': float(os.environ.get('EMAIL_BACKOFF', 1.0)),  # seconds, doubled per retry
+    'batch_size': int(os.environ.get('EMAIL_BATCH_SIZE', 100)),  # recipients per request
+}
+
+# Report Store Settings
+REPORT_STORE = {
+    'path': os.path.join(DATA_DIR, 'reports.sqlite3'),
+    'memory_entries': int(os.environ.get('REPORT_STORE_MEMORY_ENTRIES', 64)),
+    'memory_bytes': int(os.environ.get('REPORT_STORE_MEMORY_BYTES', 8 * 1024 * 1024)),
+}
+
+# Occupancy History Settings
+TIMESERIES = {
+    'path': os.path.join(DATA_DIR, 'occupancy.sqlite3'),
+}
+
+# Trend Report Settings
+TRENDS = {
+    'days': int(os.environ.get('TREND_DAYS', 30)),  # daily chart window
+    'weeks': int(os.environ.get('TREND_WEEKS', 8)),  # weekly chart window
+}
+
+# Daily Report Subscription Settings
+SUBSCRIPTIONS = {
+    'delay': float(os.environ.get('SUBSCRIPTION_DELAY', 10)),  # seconds to wait for corrections before fan-out
+}
+
+# Telegram Rate Limits (calls per second)
+TELEGRAM_LIMITS = {
+    'global_rate': float(os.environ.get('TELEGRAM_GLOBAL_RATE', 30)),
+    'chat_rate': float(os.environ.get('TELEGRAM_CHAT_RATE', 1)),
+    'group_rate': float(os.environ.get('TELEGRAM_GROUP_RATE', 20 / 60)),  # 20 messages per minute in groups
+    'chat_burst': int(os.environ.get('TELEGRAM_CHAT_BURST', 3)),
+    'max_attempts': int(os.environ.get('TELEGRAM_MAX_ATTEMPTS', 3)),  # tries per call after RetryAfter
+}
+
+# Logging Settings
+LOGGING = {
+    'level': os.environ.get('LOG_LEVEL', 'INFO'),
+    'timing_sample_rate': float(os.environ.get('TIMING_SAMPLE_RATE', 0.1)),  # fraction of stages timed at DEBUG
+}
+
+# Metrics Settings
+METRICS = {
+    'enabled': os.environ.get('METRICS_ENABLED', '1') == '1',
+    'port': int(os.environ.get('METRICS_PORT', 0)),  # Prometheus endpoint, off when 0
+}
+ADMIN_USER_IDS = {int(user_id) for user_id in os.environ.get('ADMIN_USER_IDS', '').split(',') if user_id.strip()}
@@ -1,53 +1,401 @@
 """Module for handling email sending functionality."""
-import os
-from typing import Optional
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To, Content, Attachment, FileContent, FileName, FileType, Disposition
+import asyncio
+import base64
+import logging
+import random
+import smtplib
+import threading
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from typing import List, Optional, Sequence
 
-class EmailSender:
-    """Handles email sending functionality using SendGrid."""
-    
-    def __init__(self):
-        self.api_key = os.getenv('SENDGRID_API_KEY')
-        if not self.api_key:
+import httpx
+
+from config import EMAIL
+
+logger = logging.getLogger(__name__)
+
+EMAIL_SUBJECT = 'Relatório de Ocupação Hospitalar'
+EMAIL_BODY = 'Segue em anexo o relatório de ocupação hospitalar.'
+
+
+class EmailDeliveryError(Exception):
+    """Raised by transports when a batch could not be delivered."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class EmailTransport(ABC):
+    """Interface for delivering one report to a batch of recipients."""
+
+    @abstractmethod
+    async def send(self, recipients: Sequence[str], pdf_data: bytes, filename: str) -> None:
+        """Deliver the report or raise EmailDeliveryError."""
+        pass
+
+    async def close(self) -> None:
+        """Release pooled connections."""
+
+
+class SendGridTransport(EmailTransport):
+    """Sends through the SendGrid v3 API over a pooled keep-alive HTTP client."""
+
+    API_URL = 'https://api.sendgrid.com/v3/mail/send'
+
+    def __init__(self, api_key: str, from_email: str, pool_size: int = 10, timeout: float = 30.0):
+        self.api_key = api_key
+        self.from_email = from_email
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={'Authorization': f'Bearer {self.api_key}'},
+                limits=httpx.Limits(max_connections=self.pool_size,
+                                    max_keepalive_connections=self.pool_size),
+                timeout=self.timeout
+            )
+        return self._client
+
+    def build_payload(self, recipients: Sequence[str], pdf_data: bytes, filename: str) -> dict:
+        """Build the API payload; each recipient gets an individual copy."""
+        # Imported on first use; the sendgrid package is slow to import and
+        # only needed by this transport
+        from sendgrid.helpers.mail import Mail, Attachment, FileContent, FileName, FileType, Disposition
+
+        message = Mail(
+            from_email=self.from_email,
+            to_emails=list(recipients),
+            subject=EMAIL_SUBJECT,
+            plain_text_content=EMAIL_BODY,
+            is_multiple=True
+        )
+        message.attachment = Attachment(
+            FileContent(base64.b64encode(pdf_data).decode()),
+            FileName(filename),
+            FileType('application/pdf'),
+            Disposition('attachment')
+        )
+        return message.get()
+
+    async def send(self, recipients: Sequence[str], pdf_data: bytes, filename: str) -> None:
+        payload = self.build_payload(recipients, pdf_data, filename)
+        try:
+            response = await self._get_client().post(self.API_URL, json=payload)
+        except httpx.HTTPError as e:
+            raise EmailDeliveryError(f"SendGrid request failed: {e}") from e
+        if response.status_code in (200, 201, 202):
+            return
+        retryable = response.status_code == 429 or response.status_code >= 500
+        raise EmailDeliveryError(
+            f"SendGrid returned {response.status_code}: {response.text[:200]}",
+            retryable=retryable
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class SMTPTransport(EmailTransport):
+    """Sends over a persistent SMTP connection, e.g. a local stand-in server for load tests."""
+
+    def __init__(self, host: str, port: int, from_email: str,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: bool = False, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.from_email = from_email
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password or '')
+        return smtp
+
+    def build_message(self, recipients: Sequence[str], pdf_data: bytes, filename: str) -> EmailMessage:
+        """Build one message; recipients are Bcc'd so they do not see each other."""
+        message = EmailMessage()
+        message['From'] = self.from_email
+        message['To'] = self.from_email
+        message['Bcc'] = ', '.join(recipients)
+        message['Subject'] = EMAIL_SUBJECT
+        message.set_content(EMAIL_BODY)
+        message.add_attachment(pdf_data, maintype='application', subtype='pdf', filename=filename)
+        return message
+
+    def _drop_connection(self) -> None:
+        """Close the pooled connection; the caller holds the lock."""
+        if self._smtp is not None:
+            try:
+                self._smtp.close()
+            except OSError:
+                pass
+            self._smtp = None
+
+    def _send_blocking(self, recipients: Sequence[str], pdf_data: bytes, filename: str) -> None:
+        message = self.build_message(recipients, pdf_data, filename)
+        with self._lock:
+            try:
+                for attempt in range(2):
+                    try:
+                        if self._smtp is None:
+                            self._smtp = self._connect()
+                        self._smtp.send_message(message)
+                        return
+                    except smtplib.SMTPServerDisconnected:
+                        # Pooled connection went stale; reconnect once
+                        self._drop_connection()
+                        if attempt:
+                            raise
+            except smtplib.SMTPRecipientsRefused:
+                # The server answered, so the connection is still usable
+                raise
+            except (smtplib.SMTPException, OSError):
+                self._drop_connection()
+                raise
+
+    async def send(self, recipients: Sequence[str], pdf_data: bytes, filename: str) -> None:
+        try:
+            await asyncio.to_thread(self._send_blocking, recipients, pdf_data, filename)
+        except smtplib.SMTPRecipientsRefused as e:
+            raise EmailDeliveryError(f"SMTP refused recipients: {e}", retryable=False) from e
+        except (smtplib.SMTPException, OSError) as e:
+            raise EmailDeliveryError(f"SMTP delivery failed: {e}") from e
+
+    def _close_blocking(self) -> None:
+        with self._lock:
+            if self._smtp is not None:
+                try:
+                    self._smtp.quit()
+                except (smtplib.SMTPException, OSError):
+                    pass
+                self._smtp = None
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._close_blocking)
+
+
+class _EmailJob:
+    def __init__(self, recipients: List[str], pdf_data: bytes, filename: str,
+                 future: asyncio.Future):
+        self.recipients = recipients
+        self.pdf_data = pdf_data
+        self.filename = filename
+        self.future = future
+
+
+class EmailDispatcher:
+    """Outbound queue that delivers batches through a transport with retries."""
+
+    def __init__(self, transport: EmailTransport, workers: int = 2, max_queue: int = 100,
+                 max_attempts: int = 4, backoff: float = 1.0, batch_size: int = 100):
+        self.transport = transport
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.batch_size = max(1, batch_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _start(self) -> None:
+        """Start worker tasks on the running loop."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of batches waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, recipients: Sequence[str], pdf_data: bytes, filename: str) -> bool:
+        """
+        Queue a report for the given recipients and wait for delivery.
+
+        Recipients are split into batches of ``batch_size``; returns True
+        only if every batch was delivered.
+
+        Raises:
+            asyncio.QueueFull: If the outbound queue has no room for every batch
+        """
+        self._start()
+        loop = asyncio.get_running_loop()
+        recipients = list(recipients)
+        batches = [recipients[start:start + self.batch_size]
+                   for start in range(0, len(recipients), self.batch_size)]
+        # All batches or none, so a rejected send leaves nothing behind to be delivered
+        if self._queue.maxsize > 0 and len(batches) > self._queue.maxsize - self._queue.qsize():
+            raise asyncio.QueueFull
+        futures = []
+        for batch in batches:
+            future = loop.create_future()
+            self._queue.put_nowait(_EmailJob(batch, pdf_data, filename, future))
+            futures.append(future)
+        results = await asyncio.gather(*futures)
+        return all(results)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                delivered = await self._deliver(job)
+                if not job.future.done():
+                    job.future.set_result(delivered)
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.cancel()
+                raise
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, job: _EmailJob) -> bool:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self.transport.send(job.recipients, job.pdf_data, job.filename)
+                logger.info(f"Report emailed to {len(job.recipients)} recipient(s)")
+                return True
+            except EmailDeliveryError as e:
+                if not e.retryable or attempt == self.max_attempts:
+                    logger.error(f"Erro ao enviar email: {str(e)}")
+                    return False
+                delay = self.backoff * 2 ** (attempt - 1) * (1 + random.random() / 2)
+                logger.warning(f"Email attempt {attempt} failed, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+        return False
+
+    async def close(self) -> None:
+        """Stop workers and close the transport."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        await self.transport.close()
+
+
+def create_transport(settings: dict = EMAIL) -> EmailTransport:
+    """Build the transport selected in the EMAIL settings."""
+    kind = settings['transport']
+    if kind == 'smtp':
+        return SMTPTransport(
+            settings['smtp_host'],
+            settings['smtp_port'],
+            settings['sender'],
+            username=settings.get('smtp_username'),
+            password=settings.get('smtp_password'),
+            starttls=settings.get('smtp_starttls', False)
+        )
+    if kind == 'sendgrid':
+        if not settings.get('sendgrid_api_key'):
             raise ValueError("SENDGRID_API_KEY não configurada")
-        self.sg = SendGridAPIClient(self.api_key)
-        self.from_email = os.getenv('SENDER_EMAIL', 'noreply@cieges.acre.gov.br')
+        return SendGridTransport(
+            settings['sendgrid_api_key'],
+            settings['sender'],
+            pool_size=settings['pool_size']
+        )
+    raise ValueError(f"Unknown email transport: {kind}")
 
-    def send_report(self, to_email: str, pdf_data: bytes, filename: str = "relatorio_hospitalar.pdf") -> bool:
+
+class EmailSender:
+    """
+    Handles email sending through a queued, retrying dispatcher.
+
+    The transport and dispatcher are built on the first send, so a bot
+    without email settings still starts; sending then fails with a logged
+    configuration error.
+    """
+
+    def __init__(self, transport: Optional[EmailTransport] = None, settings: dict = EMAIL):
+        self.settings = settings
+        self.from_email = settings['sender']
+        self._transport = transport
+        self._dispatcher: Optional[EmailDispatcher] = None
+
+    @property
+    def dispatcher(self) -> EmailDispatcher:
         """
-        Send PDF report via email.
-        
+        Dispatcher used for every send, created on first use.
+
+        Raises:
+            ValueError: If the configured transport is unknown or incomplete
+        """
+        if self._dispatcher is None:
+            if self._transport is None:
+                self._transport = create_transport(self.settings)
+            self._dispatcher = EmailDispatcher(
+                self._transport,
+                workers=self.settings['workers'],
+                max_queue=self.settings['max_queue'],
+                max_attempts=self.settings['max_attempts'],
+                backoff=self.settings['backoff'],
+                batch_size=self.settings['batch_size']
+            )
+        return self._dispatcher
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of batches waiting for a worker."""
+        return self._dispatcher.queue_depth if self._dispatcher is not None else 0
+
+    async def send_report_async(self, to_emails: Sequence[str], pdf_data: bytes,
+                                filename: str = "relatorio_hospitalar.pdf") -> bool:
+        """
+        Send PDF report via email without blocking the event loop.
+
         Args:
-            to_email: Recipient email address
+            to_emails: Recipient email addresses
             pdf_data: PDF file content in bytes
             filename: Name of the PDF file
-            
+
         Returns:
-            bool: True if email was sent successfully
+            bool: True if email was sent successfully to every recipient
         """
+        if isinstance(to_emails, str):
+            to_emails = [to_emails]
         try:
-            import base64
-            
-            message = Mail(
-                from_email=self.from_email,
-                to_emails=to_email,
-                subject='Relatório de Ocupação Hospitalar',
-                plain_text_content='Segue em anexo o relatório de ocupação hospitalar.'
-            )
+            dispatcher = self.dispatcher
+        except ValueError as e:
+            logger.error(f"Erro ao enviar email: {str(e)}")
+            return False
+        try:
+            return await dispatcher.submit(to_emails, pdf_data, filename)
+        except asyncio.QueueFull:
+            logger.error("Email queue full, report not sent")
+            return False
 
-            encoded_file = base64.b64encode(pdf_data).decode()
-            attachedFile = Attachment(
-                FileContent(encoded_file),
-                FileName(filename),
-                FileType('application/pdf'),
-                Disposition('attachment')
-            )
-            message.attachment = attachedFile
+    def send_report(self, to_email: str, pdf_data: bytes, filename: str = "relatorio_hospitalar.pdf") -> bool:
+        """
+        Send PDF report via email, blocking until done.
 
-            response = self.sg.send(message)
-            return response.status_code in [200, 201, 202]
-            
-        except Exception as e:
-            print(f"Erro ao enviar email: {str(e)}")
-            return False
+        Meant for scripts; code running in the event loop must await
+        send_report_async instead.
+        """
+        async def send():
+            try:
+                return await self.send_report_async(to_email, pdf_data, filename)
+            finally:
+                await self.close()
+
+        return asyncio.run(send())
+
+    async def close(self) -> None:
+        """Stop the dispatcher and release pooled connections."""
+        if self._dispatcher is not None:
+            await self._dispatcher.close()
+        elif self._transport is not None:
+            await self._transport.close()
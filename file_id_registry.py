@@ -0,0 +1,54 @@
+"""Registry of Telegram file_ids for reports that were already uploaded."""
+import hashlib
+import json
+import time
+from typing import Optional
+
+from state_backend import StateBackend
+
+
+class FileIdRegistry:
+    """
+    Maps PDF content hashes to Telegram file_ids in a state backend hash.
+
+    Every bot process reads and writes the same hash one field at a time,
+    so a report uploaded by one worker is sent by file_id from all of them.
+    Each entry records when it was stored. Past ``max_entries`` the oldest
+    tenth is dropped at once, so the whole hash is read once per
+    ``max_entries // 10`` uploads rather than on each of them.
+    """
+
+    def __init__(self, backend: StateBackend, name: str = 'file_ids', max_entries: int = 1000):
+        self.backend = backend
+        self.name = name
+        self.max_entries = max_entries
+
+    @staticmethod
+    def content_hash(pdf_data: bytes) -> str:
+        """Return the content hash used as registry key."""
+        return hashlib.sha256(pdf_data).hexdigest()
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """Return the file_id previously stored for this content, if any."""
+        value = self.backend.hget(self.name, content_hash)
+        return json.loads(value)[0] if value is not None else None
+
+    def put(self, content_hash: str, file_id: str) -> None:
+        """Remember the file_id Telegram assigned to this content."""
+        self.backend.hset(self.name, content_hash, json.dumps([file_id, time.time()]).encode('utf-8'))
+        if self.backend.hlen(self.name) > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = self.backend.hgetall(self.name)
+        keep = self.max_entries - max(1, self.max_entries // 10)
+        oldest = sorted(entries, key=lambda content_hash: json.loads(entries[content_hash])[1])
+        for content_hash in oldest[:len(entries) - keep]:
+            self.backend.hdel(self.name, content_hash)
+
+    def forget(self, content_hash: str) -> None:
+        """Drop a file_id that Telegram no longer accepts."""
+        self.backend.hdel(self.name, content_hash)
+
+    def __len__(self) -> int:
+        return self.backend.hlen(self.name)
@@ -1,5 +1,9 @@
+import logging
 from typing import Dict, Optional
-from utils import extract_hospital_data, parse_simple_format
+from instrumentation import log_event
+from utils import parse_bulletin
+
+logger = logging.getLogger(__name__)
 
 class HospitalDataParser:
     """Parser for hospital occupancy data from text messages."""
@@ -19,15 +23,8 @@ class HospitalDataParser:
             ValueError: If message cannot be parsed
         """
         try:
-            # Try parsing as simple percentage format first
-            lines = [line.strip() for line in message.split('\n') if line.strip()]
-            if any('leitos' in line and '%' in line for line in lines):
-                print("Parsing message in simple percentage format...")
-                return parse_simple_format(message)
-
-            # If not simple format, try detailed format
-            print("Attempting to parse detailed format...")
-            return extract_hospital_data(message)
+            # Detects simple percentage or detailed format in the same pass
+            return parse_bulletin(message)
 
         except Exception as e:
             raise ValueError(f"Failed to parse hospital data: {str(e)}")
@@ -43,8 +40,6 @@ class HospitalDataParser:
         Returns:
             bool indicating if data is valid
         """
-        print(f"Validating data structure: {data.keys()}")
-
         if not data:
             return False
 
@@ -57,8 +52,9 @@ class HospitalDataParser:
 
     @staticmethod
     def _validate_detailed_format(data: Dict) -> bool:
-        """Validate detailed format data structure."""
-        print("Validating detailed format...")
+        """Validate detailed format data structure; at least one hospital must have units."""
+        if not any(hospital.get('units') for hospital in data['hospitals']):
+            return False
         for hospital in data['hospitals']:
             if not {'name', 'units'}.issubset(hospital.keys()):
                 return False
@@ -71,11 +67,13 @@ class HospitalDataParser:
 
     @staticmethod
     def _validate_simple_format(data: Dict) -> bool:
-        """Validate simple format data structure."""
-        print("Validating simple format...")
+        """Validate simple format data structure; a bulletin without units is not one."""
+        if not data['units']:
+            return False
         for unit in data['units']:
             required = {'name', 'total_beds', 'occupancy_rate'} 
             if not required.issubset(unit.keys()):
-                print(f"Missing required fields in unit: {unit.keys()}")
+                log_event(logger, logging.DEBUG, 'unit_missing_fields',
+                          missing=sorted(required - unit.keys()))
                 return False
         return True
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""Structured, leveled event logging and sampled per-stage timings."""
+import logging
+import random
+import time
+from typing import Any
+
+from config import LOGGING, METRICS
+from metrics import ERRORS, STAGE_SECONDS
+
+
+def _format_fields(fields: dict) -> str:
+    return ' '.join(f"{key}={value!r}" if isinstance(value, str) else f"{key}={value}"
+                    for key, value in fields.items())
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields: Any) -> None:
+    """
+    Log ``event`` with ``key=value`` fields.
+
+    Fields are only formatted when the level is enabled, and are also
+    attached to the record as ``event``/``fields`` for structured handlers.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, "%s %s", event, _format_fields(fields),
+                   extra={'event': event, 'fields': fields})
+
+
+class _Timer:
+    """Context manager that records the elapsed time of one stage."""
+
+    __slots__ = ('logger', 'stage', 'fields', 'log', 'started')
+
+    def __init__(self, logger: logging.Logger, stage: str, fields: dict, log: bool):
+        self.logger = logger
+        self.stage = stage
+        self.fields = fields
+        self.log = log
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        if METRICS['enabled']:
+            STAGE_SECONDS.observe(elapsed, stage=self.stage)
+            if exc_type is not None:
+                ERRORS.inc(stage=self.stage)
+        if self.log:
+            log_event(self.logger, logging.DEBUG, 'stage_timing', stage=self.stage,
+                      ms=round(elapsed * 1000, 3), failed=exc_type is not None, **self.fields)
+        return False
+
+
+class _NullTimer:
+    """Shared no-op timer returned when timing is disabled or not sampled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timed(logger: logging.Logger, stage: str, **fields: Any):
+    """
+    Time a pipeline stage.
+
+    Every call feeds the per-stage latency histogram when metrics are
+    enabled. A ``LOGGING['timing_sample_rate']`` fraction of calls is also
+    logged as a DEBUG ``stage_timing`` event when DEBUG is enabled. With
+    both off, a shared no-op context manager is returned.
+    """
+    sample_rate = LOGGING['timing_sample_rate']
+    log = (sample_rate > 0 and logger.isEnabledFor(logging.DEBUG)
+           and (sample_rate >= 1 or random.random() < sample_rate))
+    if not log and not METRICS['enabled']:
+        return _NULL_TIMER
+    return _Timer(logger, stage, fields, log)
+
+
+def configure_logging() -> None:
+    """Configure root logging from the LOGGING settings."""
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=getattr(logging, LOGGING['level'].upper(), logging.INFO)
+    )
+    # Third-party libraries are very chatty at DEBUG
+    for name in ('httpx', 'httpcore', 'telegram', 'apscheduler', 'PIL'):
+        logging.getLogger(name).setLevel(max(logging.INFO, logging.getLogger().level))
@@ -1,34 +1,196 @@
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.units import cm
-from datetime import datetime
+import asyncio
 import io
-from config import *
-from templates.template_manager import TemplateManager
-from typing import Dict, Optional
+import threading
+from config import RENDER_EXECUTOR, REPORT_CACHE
+from render_executor import RenderExecutor
+from report_cache import ReportCache
+from typing import TYPE_CHECKING, Dict, Optional
+
+# Templates import reportlab, which dominates start-up time; they are loaded
+# on first render (or by warm_up) instead of when the bot is imported
+if TYPE_CHECKING:
+    from templates.base_template import BaseTemplate
+    from templates.template_manager import TemplateManager
+    from timeseries_store import TimeSeriesStore
+
+# Templates used by render jobs running inside a process pool worker
+_worker_templates = None
+
+
+class TemplateUnavailableError(RuntimeError):
+    """Raised when process render workers cannot load the template a report asks for."""
+
+
+def template_identity(template: 'BaseTemplate') -> str:
+    """Class, version and source revision of a template, equal across processes."""
+    cls = type(template)
+    return f"{cls.__module__}.{cls.__qualname__}:{template.version}:{template.revision}"
+
+
+def _render_in_worker(data: Dict, template_name: Optional[str], identity: str) -> bytes:
+    """
+    Render a report inside a process pool worker with the template the parent resolved.
+
+    Raises:
+        TemplateUnavailableError: If the worker's templates, even once
+            reloaded, resolve ``template_name`` to a different template
+    """
+    global _worker_templates
+    if _worker_templates is None:
+        from templates.template_manager import TemplateManager
+        _worker_templates = TemplateManager()
+    template = _worker_templates.get_template(template_name)
+    if template_identity(template) != identity:
+        # The parent may have loaded a changed module this worker has not checked yet
+        _worker_templates.reload()
+        template = _worker_templates.get_template(template_name)
+        if template_identity(template) != identity:
+            raise TemplateUnavailableError(
+                f"Template '{template_name}' is {identity} in the bot but "
+                f"{template_identity(template)} in the render worker"
+            )
+    return template.generate_pdf(data).getvalue()
 
 
 class PDFGenerator:
-    def __init__(self):
-        self.template_manager = TemplateManager()
+    def __init__(self, render_executor: Optional[RenderExecutor] = None,
+                 cache: Optional[ReportCache] = None, history: Optional['TimeSeriesStore'] = None):
+        self._template_manager: Optional['TemplateManager'] = None
+        self.history = history  # given to templates that chart it, instead of each opening its own
+        self._template_lock = threading.Lock()
+        self._render_executor = render_executor
+        self.cache = cache if cache is not None else ReportCache(**REPORT_CACHE)
+        self._inflight: Dict[str, asyncio.Future] = {}  # renders running, by cache key
+        self._waiters: Dict[asyncio.Future, int] = {}  # requests awaiting each in-flight render
+        self.coalesced = 0  # requests answered by another request's render
+
+    @property
+    def template_manager(self) -> 'TemplateManager':
+        """Report templates, loaded on first use by any thread."""
+        if self._template_manager is None:
+            with self._template_lock:
+                if self._template_manager is None:
+                    from templates.template_manager import TemplateManager
+                    self._template_manager = TemplateManager(services={'history': self.history})
+        return self._template_manager
+
+    async def warm_up(self) -> None:
+        """Load the templates in a worker thread, so the first report does not wait for them."""
+        if self._template_manager is None:
+            await asyncio.to_thread(lambda: self.template_manager)
+
+    @property
+    def render_executor(self) -> RenderExecutor:
+        """Executor used by generate_pdf_async, created on first use."""
+        if self._render_executor is None:
+            self._render_executor = RenderExecutor(**RENDER_EXECUTOR)
+        return self._render_executor
 
     def generate_pdf(self, data: Dict, template_name: Optional[str] = None) -> io.BytesIO:
-        """Generate PDF using the specified template."""
+        """Generate PDF using the specified template, reusing cached output."""
         template = self.template_manager.get_template(template_name)
-        return template.generate_pdf(data)
+        key = self.cache.make_key(data, template)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return io.BytesIO(cached)
+
+        pdf_bytes = self._render_bytes(data, template)
+        self.cache.store(key, data, pdf_bytes)
+        return io.BytesIO(pdf_bytes)
+
+    @staticmethod
+    def _render_bytes(data: Dict, template: 'BaseTemplate') -> bytes:
+        return template.generate_pdf(data).getvalue()
+
+    async def generate_pdf_async(self, data: Dict, template_name: Optional[str] = None) -> io.BytesIO:
+        """
+        Generate PDF in the render executor without blocking the event loop.
+
+        Cache hits are answered directly without touching the executor, and
+        requests for a report that is already being rendered wait for that
+        render instead of starting another one. A waiter that is cancelled
+        does not cancel the render the others share; when the last one is,
+        e.g. superseded by a newer bulletin, the render is cancelled and
+        never starts if it is still queued.
+
+        Raises:
+            RenderQueueFullError: If the render pool is saturated
+            RenderTimeoutError: If rendering exceeds the configured timeout
+        """
+        # A message arriving before the warm-up finished must not load the
+        # templates on the event loop
+        await self.warm_up()
+        # Resolved once, so the cache key and the render use the same template
+        # even if a template is registered under this name meanwhile
+        template = self.template_manager.get_template(template_name)
+        # Hashing the data and the template's cache token, e.g. the trend
+        # history's revision, may query a store
+        key = await asyncio.to_thread(self.cache.make_key, data, template)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return io.BytesIO(cached)
+
+        render = self._inflight.get(key)
+        if render is None:
+            render = asyncio.ensure_future(self._render_async(key, data, template_name, template))
+            self._inflight[key] = render
+            render.add_done_callback(lambda done: self._render_finished(key, done))
+        else:
+            self.coalesced += 1
+        self._waiters[render] = self._waiters.get(render, 0) + 1
+        try:
+            return io.BytesIO(await asyncio.shield(render))
+        finally:
+            self._waiters[render] -= 1
+            if not self._waiters[render]:
+                del self._waiters[render]
+                if not render.done():
+                    # Nobody wants it any more; later requests start afresh
+                    self._inflight.pop(key, None)
+                    render.cancel()
+
+    def _render_finished(self, key: str, render: asyncio.Future) -> None:
+        if self._inflight.get(key) is render:
+            del self._inflight[key]
+        if not render.cancelled():
+            # Mark the error as retrieved when every waiter gave up
+            render.exception()
+
+    async def _render_async(self, key: str, data: Dict, template_name: Optional[str],
+                            template: 'BaseTemplate') -> bytes:
+        executor = self.render_executor
+        if executor.kind == 'process':
+            # Process workers keep their own manager, loaded from the same
+            # modules; they render only the exact template resolved here, so
+            # nothing is cached under another template's key
+            if self.template_manager.is_registered(template):
+                raise TemplateUnavailableError(
+                    f"Template '{template_name}' was registered at runtime and cannot be "
+                    f"rendered by process workers"
+                )
+            pdf_bytes = await executor.run(_render_in_worker, data, template_name,
+                                           template_identity(template))
+        else:
+            pdf_bytes = await executor.run(self._render_bytes, data, template)
+
+        self.cache.store(key, data, pdf_bytes)
+        return pdf_bytes
+
+    def shutdown(self) -> None:
+        """Release render workers and stop watching the template files."""
+        if self._render_executor is not None:
+            self._render_executor.shutdown()
+        if self._template_manager is not None:
+            self._template_manager.close()
 
     def list_templates(self) -> Dict[str, str]:
         """List available templates."""
         return self.template_manager.list_templates()
 
     def register_template(self, name: str, template) -> None:
-        """Register a new template."""
+        """Register a new template; not available to process render workers."""
         self.template_manager.register_template(name, template)
 
-    def set_default_template(self, name: str) -> bool:
-        """Set the default template."""
-        return self.template_manager.set_default_template(name)
\ No newline at end of file
+    def has_template(self, name: str) -> bool:
+        """Whether a template is registered under ``name``."""
+        return name in self.template_manager
@@ -0,0 +1,102 @@
+"""Worker pool that runs PDF renders outside the asyncio event loop."""
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class RenderQueueFullError(RuntimeError):
+    """Raised when every worker is busy and the waiting queue is full."""
+
+
+class RenderTimeoutError(TimeoutError):
+    """Raised when a render job does not finish within the configured timeout."""
+
+
+class RenderExecutor:
+    """Bounded thread or process pool for blocking render jobs.
+
+    Jobs are rejected with RenderQueueFullError instead of piling up once
+    ``max_workers + max_queue`` jobs are in flight, so callers can tell the
+    user to retry rather than waiting behind an unbounded backlog.
+    """
+
+    def __init__(self, kind: str = 'thread', max_workers: int = 4,
+                 max_queue: int = 16, timeout: Optional[float] = 30.0):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of jobs running or waiting at the same time."""
+        return self.max_workers + self.max_queue
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs currently running or waiting for a worker."""
+        return self._pending
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new job would be rejected."""
+        return self._pending >= self.capacity
+
+    def _get_executor(self) -> Executor:
+        """Create the underlying pool on first use."""
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='render'
+                )
+        return self._executor
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``func(*args)`` in the pool and await its result.
+
+        Raises:
+            RenderQueueFullError: If the pool is saturated
+            RenderTimeoutError: If the job exceeds the configured timeout
+        """
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise RenderQueueFullError(
+                    f"Render pool saturated ({self._pending}/{self.capacity} jobs)"
+                )
+            self._pending += 1
+
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            self._release(None)
+            raise
+        # The slot is released when the worker finishes, not when the caller
+        # gives up, so timed-out jobs still count against the pool.
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise RenderTimeoutError(
+                f"Render job exceeded {self.timeout}s timeout"
+            ) from None
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the underlying pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
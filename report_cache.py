@@ -0,0 +1,111 @@
+"""Content-addressed cache for rendered PDF reports."""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+
+class LRUCache:
+    """Thread-safe LRU cache of bytes bounded by entry count and total size."""
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.time():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: bytes, expires_at: float) -> None:
+        """Store a value until ``expires_at`` (epoch seconds)."""
+        if len(value) > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at)
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current usage."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+        }
+
+
+class ReportCache(LRUCache):
+    """LRU cache of rendered reports keyed on parsed data and template."""
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 32 * 1024 * 1024,
+                 ttl: float = 24 * 3600):
+        super().__init__(max_entries, max_bytes)
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(data: Dict, template) -> str:
+        """Build a canonical hash of the parsed data plus template identity."""
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False,
+                             separators=(',', ':'), default=str)
+        digest = hashlib.sha256()
+        digest.update(f"{type(template).__qualname__}:{template.version}:{template.revision}\0".encode('utf-8'))
+        digest.update(f"{template.cache_token(data)}\0".encode('utf-8'))
+        digest.update(payload.encode('utf-8'))
+        return digest.hexdigest()
+
+    def expiry_for(self, data: Dict) -> float:
+        """
+        Return the expiry time for a report.
+
+        Reports never outlive the end of their report date (or today, when
+        the data carries no date), and never live longer than ``ttl``.
+        """
+        try:
+            report_day = datetime.strptime(data.get('date', ''), '%d/%m/%Y')
+        except (TypeError, ValueError):
+            report_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        end_of_day = (report_day + timedelta(days=1)).timestamp()
+        return min(end_of_day, time.time() + self.ttl)
+
+    def store(self, key: str, data: Dict, pdf_bytes: bytes) -> None:
+        """Cache rendered bytes for the given report data."""
+        self.put(key, pdf_bytes, self.expiry_for(data))
@@ -0,0 +1,214 @@
+"""Normalized occupancy model shared by every report template."""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+from utils import TOTAL_CLINICAL_BEDS, TOTAL_ICU_BEDS, is_icu_unit
+
+ICU = 'icu'
+CLINICAL = 'clinical'
+
+
+def unit_kind(name: str) -> str:
+    """Classify a unit as ICU or clinical."""
+    return ICU if is_icu_unit(name) else CLINICAL
+
+
+@dataclass(frozen=True, slots=True)
+class BedTotals:
+    """Bed counts aggregated over a group of units."""
+
+    total_beds: int = 0
+    occupied_beds: int = 0
+    available_beds: int = 0
+    blocked_beds: int = 0
+    units: int = 0
+
+    @property
+    def occupancy_rate(self) -> float:
+        """Occupied beds as a percentage of all beds."""
+        return self.occupied_beds / self.total_beds * 100 if self.total_beds else 0.0
+
+    def __add__(self, other: 'BedTotals') -> 'BedTotals':
+        return BedTotals(
+            self.total_beds + other.total_beds,
+            self.occupied_beds + other.occupied_beds,
+            self.available_beds + other.available_beds,
+            self.blocked_beds + other.blocked_beds,
+            self.units + other.units
+        )
+
+
+class _Tally:
+    """Running bed counts for one group of units, frozen into BedTotals."""
+
+    __slots__ = ('total', 'occupied', 'available', 'blocked', 'units')
+
+    def __init__(self):
+        self.total = self.occupied = self.available = self.blocked = self.units = 0
+
+    def add(self, unit: 'UnitRecord') -> None:
+        self.total += unit.total_beds
+        self.occupied += unit.occupied_beds
+        self.available += unit.available_beds
+        self.blocked += unit.blocked_beds
+        self.units += 1
+
+    def freeze(self) -> BedTotals:
+        return BedTotals(self.total, self.occupied, self.available, self.blocked, self.units)
+
+
+@dataclass(frozen=True, slots=True)
+class UnitRecord:
+    """One unit with every figure the templates display, computed once."""
+
+    name: str
+    kind: str
+    total_beds: int
+    occupied_beds: int
+    available_beds: int
+    blocked_beds: int
+    occupancy_rate: float
+    hospital: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class HospitalRecord:
+    """A hospital of a detailed bulletin with its units and totals."""
+
+    name: str
+    units: Tuple[UnitRecord, ...]
+    totals: BedTotals
+
+
+@dataclass(frozen=True, slots=True)
+class OccupancySummary:
+    """
+    Per-category and overall figures shared by every report section.
+
+    Capacities are the fixed bed counts of the known units for simple
+    bulletins and the reported bed counts for detailed ones.
+    """
+
+    clinical: BedTotals
+    icu: BedTotals
+    total: BedTotals
+    clinical_capacity: int
+    icu_capacity: int
+
+    @property
+    def available_clinical(self) -> int:
+        return self.clinical_capacity - self.clinical.occupied_beds
+
+    @property
+    def available_icu(self) -> int:
+        return self.icu_capacity - self.icu.occupied_beds
+
+
+@dataclass(frozen=True, slots=True)
+class OccupancyReport:
+    """
+    A bulletin in either format, normalized for rendering.
+
+    ``units`` lists every unit, across hospitals for detailed bulletins.
+    ``hospitals`` is empty for simple bulletins.
+    """
+
+    units: Tuple[UnitRecord, ...]
+    summary: OccupancySummary
+    hospitals: Tuple[HospitalRecord, ...] = ()
+    date: Optional[str] = None
+
+    @property
+    def is_detailed(self) -> bool:
+        return bool(self.hospitals)
+
+    @property
+    def totals(self) -> BedTotals:
+        return self.summary.total
+
+
+def _simple_unit(unit: Dict) -> UnitRecord:
+    total_beds = unit['total_beds']
+    occupancy_rate = float(unit['occupancy_rate'])
+    # The parser already derived the bed counts; older callers may only pass the rate
+    occupied_beds = unit.get('occupied_beds')
+    if occupied_beds is None:
+        occupied_beds = int(round(total_beds * occupancy_rate / 100))
+    return UnitRecord(
+        name=unit['name'],
+        kind=unit_kind(unit['name']),
+        total_beds=total_beds,
+        occupied_beds=occupied_beds,
+        available_beds=unit.get('available_beds', total_beds - occupied_beds),
+        blocked_beds=0,
+        occupancy_rate=occupancy_rate
+    )
+
+
+def _detailed_unit(unit: Dict, hospital: str) -> UnitRecord:
+    occupied_beds = unit.get('occupied_beds', 0)
+    available_beds = unit.get('available_beds', 0)
+    blocked_beds = unit.get('blocked_beds', 0)
+    # Units missing from the known bed counts are sized by what was reported
+    total_beds = unit.get('total_beds') or occupied_beds + available_beds + blocked_beds
+    return UnitRecord(
+        name=unit['name'],
+        kind=unit_kind(unit['name']),
+        total_beds=total_beds,
+        occupied_beds=occupied_beds,
+        available_beds=available_beds,
+        blocked_beds=blocked_beds,
+        occupancy_rate=occupied_beds / total_beds * 100 if total_beds else 0.0,
+        hospital=hospital
+    )
+
+
+def normalize_report(data: Union[Dict, OccupancyReport]) -> OccupancyReport:
+    """
+    Convert parser output of either format into an OccupancyReport.
+
+    Unit figures and the per-hospital, per-category and overall totals are
+    all computed in a single pass over the units.
+
+    Args:
+        data: Parsed data with 'units' (simple format) or 'hospitals'
+            (detailed format), or an already normalized report
+
+    Returns:
+        OccupancyReport with its OccupancySummary
+    """
+    if isinstance(data, OccupancyReport):
+        return data
+
+    by_kind = {CLINICAL: _Tally(), ICU: _Tally()}
+    units: List[UnitRecord] = []
+    hospitals = []
+    detailed = 'hospitals' in data
+    if detailed:
+        for hospital in data['hospitals']:
+            hospital_tally = _Tally()
+            start = len(units)
+            for raw_unit in hospital['units']:
+                unit = _detailed_unit(raw_unit, hospital['name'])
+                units.append(unit)
+                hospital_tally.add(unit)
+                by_kind[unit.kind].add(unit)
+            hospitals.append(HospitalRecord(hospital['name'], tuple(units[start:]), hospital_tally.freeze()))
+    else:
+        for raw_unit in data.get('units', ()):
+            unit = _simple_unit(raw_unit)
+            units.append(unit)
+            by_kind[unit.kind].add(unit)
+
+    clinical = by_kind[CLINICAL].freeze()
+    icu = by_kind[ICU].freeze()
+    if detailed:
+        capacities = clinical.total_beds, icu.total_beds
+    else:
+        capacities = TOTAL_CLINICAL_BEDS, TOTAL_ICU_BEDS
+    return OccupancyReport(
+        units=tuple(units),
+        summary=OccupancySummary(clinical, icu, clinical + icu, *capacities),
+        hospitals=tuple(hospitals),
+        date=data.get('date')
+    )
@@ -0,0 +1,153 @@
+"""Pre-renders the daily report and fans it out to subscribed chats."""
+import asyncio
+import hashlib
+import io
+import json
+import logging
+from typing import AbstractSet, Awaitable, Callable, Dict, Optional
+
+from telegram.error import Forbidden
+
+from instrumentation import log_event, timed
+from render_executor import RenderQueueFullError, RenderTimeoutError
+from report_model import normalize_report
+from subscriptions import SubscriptionStore
+
+logger = logging.getLogger(__name__)
+
+SendReport = Callable[[object, int, io.BytesIO], Awaitable[None]]
+
+
+class ReportScheduler:
+    """
+    Renders the report once per template as soon as a publisher sends a
+    bulletin and sends it to every subscribed chat.
+
+    Only bulletins from ``publishers`` (user ids) that list at least one
+    unit are broadcast, so a stray or partial message never reaches the
+    subscribers nor replaces the bulletin waiting to be sent.
+
+    Fan-out runs as a python-telegram-bot JobQueue job, debounced by
+    ``delay`` seconds so corrections sent right after a bulletin replace
+    it instead of producing a second delivery. Without the job-queue extra
+    installed an asyncio task does the same. The first chat of each
+    template gets the upload and the rest are sent concurrently, so
+    ``send_report`` can reuse the uploaded file and pace the calls within
+    Telegram's rate limits. Each chat receives each bulletin once: a chat
+    is pending until it got a bulletin with the latest content, so a
+    correction sent after the debounce is delivered again.
+    """
+
+    JOB_NAME = 'daily_report_fanout'
+
+    def __init__(self, pdf_generator, subscriptions: SubscriptionStore, send_report: SendReport,
+                 delay: float = 10.0, publishers: AbstractSet[int] = frozenset()):
+        self.pdf_generator = pdf_generator
+        self.subscriptions = subscriptions
+        self.send_report = send_report
+        self.delay = delay
+        self.publishers = publishers
+        self._latest: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def bulletin_digest(data: Dict) -> str:
+        """Hash of a parsed bulletin's content, including its date."""
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def bulletin_ingested(self, data: Dict, context, publisher: int, delivered_chat: Optional[int] = None,
+                          template_name: Optional[str] = None) -> bool:
+        """
+        Schedule the fan-out of a newly ingested bulletin.
+
+        Args:
+            data: Parsed bulletin
+            context: Handler context, for its job queue and bot
+            publisher: User who sent the bulletin
+            delivered_chat: Chat that already got this report directly
+            template_name: Template of the report sent to ``delivered_chat``
+
+        Returns:
+            False if nothing was scheduled: the sender is not a publisher or
+            the bulletin has no units
+        """
+        if publisher not in self.publishers or not normalize_report(data).units:
+            return False
+        self._latest = data
+        if delivered_chat is not None:
+            subscription = self.subscriptions.get(delivered_chat)
+            if subscription is not None and subscription['template'] == template_name:
+                self.subscriptions.mark_sent([delivered_chat], self.bulletin_digest(data))
+
+        job_queue = getattr(context, 'job_queue', None)
+        if job_queue is not None:
+            for job in job_queue.get_jobs_by_name(self.JOB_NAME):
+                job.schedule_removal()
+            job_queue.run_once(self._run_job, when=self.delay, name=self.JOB_NAME)
+        else:
+            if self._task is not None and not self._task.done():
+                self._task.cancel()
+            self._task = asyncio.get_running_loop().create_task(self._fan_out_later(context.bot))
+        return True
+
+    async def _run_job(self, context) -> None:
+        await self.fan_out(context.bot)
+
+    async def _fan_out_later(self, bot) -> None:
+        await asyncio.sleep(self.delay)
+        await self.fan_out(bot)
+
+    async def fan_out(self, bot) -> Dict[str, int]:
+        """
+        Send the latest bulletin's report to every chat still waiting for it.
+
+        Returns:
+            Dict with 'sent', 'failed' and 'renders' counts
+        """
+        stats = {'sent': 0, 'failed': 0, 'renders': 0}
+        data = self._latest
+        if data is None:
+            return stats
+        digest = self.bulletin_digest(data)
+
+        for template_name, chat_ids in self.subscriptions.pending(digest).items():
+            try:
+                with timed(logger, 'fanout.render', template=template_name or 'default'):
+                    pdf_data = (await self.pdf_generator.generate_pdf_async(data, template_name)).getvalue()
+            except (RenderQueueFullError, RenderTimeoutError) as e:
+                logger.error(f"Could not render subscription report: {e!r}")
+                stats['failed'] += len(chat_ids)
+                continue
+            stats['renders'] += 1
+
+            # The first upload registers the file_id that the other sends reuse
+            results = [await self._deliver(bot, chat_ids[0], pdf_data)]
+            results += await asyncio.gather(*(self._deliver(bot, chat_id, pdf_data) for chat_id in chat_ids[1:]))
+            delivered = [chat_id for chat_id, sent in zip(chat_ids, results) if sent]
+            stats['failed'] += len(chat_ids) - len(delivered)
+            self.subscriptions.mark_sent(delivered, digest)
+            stats['sent'] += len(delivered)
+
+        log_event(logger, logging.INFO, 'subscription_fanout', bulletin=digest[:12], **stats)
+        return stats
+
+    async def _deliver(self, bot, chat_id: int, pdf_data: bytes) -> bool:
+        """Send one report; chats that blocked the bot are unsubscribed."""
+        try:
+            await self.send_report(bot, chat_id, io.BytesIO(pdf_data))
+            return True
+        except Forbidden:
+            # The bot was blocked or removed from the chat
+            self.subscriptions.unsubscribe(chat_id)
+            log_event(logger, logging.INFO, 'subscription_removed', chat=chat_id)
+        except Exception as e:
+            logger.error(f"Failed to send subscription report to {chat_id}: {e!r}")
+        return False
+
+    async def close(self) -> None:
+        """Cancel a pending fan-out started without the job queue."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,186 @@
+"""Persistent store for each user's last generated report."""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Union
+
+from config import REPORT_STORE, STATE
+from report_cache import LRUCache
+from state_backend import SQLiteBackend, StateBackend
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_reports (
+    user_id TEXT PRIMARY KEY,
+    hash TEXT NOT NULL REFERENCES blobs(hash),
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS user_reports_hash ON user_reports(hash);
+"""
+
+
+class ReportStore:
+    """
+    Last report per user, kept in SQLite with a bounded in-memory LRU in front.
+
+    PDFs are stored once per content hash, so users who received the same
+    report share a single blob.
+    """
+
+    def __init__(self, path: str, memory_entries: int = 64, memory_bytes: int = 8 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._memory = LRUCache(max_entries=memory_entries, max_bytes=memory_bytes)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def put(self, user_id: str, pdf_data: bytes) -> str:
+        """Store ``pdf_data`` as the user's last report and return its hash."""
+        content_hash = hashlib.sha256(pdf_data).hexdigest()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hash FROM user_reports WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            previous = row[0] if row else None
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)",
+                    (content_hash, pdf_data)
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO user_reports (user_id, hash, updated_at) VALUES (?, ?, ?)",
+                    (user_id, content_hash, time.time())
+                )
+                if previous and previous != content_hash:
+                    self._delete_orphan(previous)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        self._memory.put(content_hash, pdf_data, float('inf'))
+        return content_hash
+
+    def _delete_orphan(self, content_hash: str) -> None:
+        self._db.execute(
+            "DELETE FROM blobs WHERE hash = ? AND NOT EXISTS "
+            "(SELECT 1 FROM user_reports WHERE hash = ?)",
+            (content_hash, content_hash)
+        )
+
+    def get(self, user_id: str) -> Optional[bytes]:
+        """Return the user's last report, or None if there is none."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hash FROM user_reports WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            content_hash = row[0]
+            pdf_data = self._memory.get(content_hash)
+            if pdf_data is not None:
+                return pdf_data
+            row = self._db.execute(
+                "SELECT data FROM blobs WHERE hash = ?", (content_hash,)
+            ).fetchone()
+        if row is None:
+            return None
+        pdf_data = bytes(row[0])
+        self._memory.put(content_hash, pdf_data, float('inf'))
+        return pdf_data
+
+    def delete(self, user_id: str) -> None:
+        """Forget the user's last report."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hash FROM user_reports WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None:
+                return
+            self._db.execute("DELETE FROM user_reports WHERE user_id = ?", (user_id,))
+            self._delete_orphan(row[0])
+
+    def __contains__(self, user_id: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM user_reports WHERE user_id = ?", (user_id,)
+            ).fetchone() is not None
+
+    def blob_count(self) -> int:
+        """Number of distinct PDFs stored on disk."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class BackendReportStore:
+    """
+    Last report per user in the shared state backend, for bot processes
+    spread over several nodes.
+
+    Like ReportStore, PDFs are stored once per content hash; each blob
+    expires ``ttl`` seconds after the last time it was stored.
+    """
+
+    NAME = 'user_reports'
+
+    def __init__(self, backend: StateBackend, ttl: Optional[float] = None, memory_entries: int = 64,
+                 memory_bytes: int = 8 * 1024 * 1024):
+        self.backend = backend
+        self.ttl = ttl
+        self._memory = LRUCache(max_entries=memory_entries, max_bytes=memory_bytes)
+
+    def put(self, user_id: str, pdf_data: bytes) -> str:
+        """Store ``pdf_data`` as the user's last report and return its hash."""
+        content_hash = hashlib.sha256(pdf_data).hexdigest()
+        self.backend.set(f"report:{content_hash}", pdf_data, self.ttl)
+        self.backend.hset(self.NAME, user_id, content_hash.encode())
+        self._memory.put(content_hash, pdf_data, float('inf'))
+        return content_hash
+
+    def get(self, user_id: str) -> Optional[bytes]:
+        """Return the user's last report, or None if there is none."""
+        value = self.backend.hget(self.NAME, user_id)
+        if value is None:
+            return None
+        content_hash = value.decode()
+        pdf_data = self._memory.get(content_hash)
+        if pdf_data is None:
+            pdf_data = self.backend.get(f"report:{content_hash}")
+            if pdf_data is not None:
+                self._memory.put(content_hash, pdf_data, float('inf'))
+        return pdf_data
+
+    def delete(self, user_id: str) -> None:
+        """Forget the user's last report; its blob expires on its own."""
+        self.backend.hdel(self.NAME, user_id)
+
+    def __contains__(self, user_id: str) -> bool:
+        return self.backend.hget(self.NAME, user_id) is not None
+
+    def close(self) -> None:
+        pass
+
+
+def create_report_store(backend: StateBackend, settings: dict = REPORT_STORE,
+                        state_settings: dict = STATE) -> Union[ReportStore, BackendReportStore]:
+    """
+    Reports go to the node-local SQLite store, which every process of the
+    node shares, unless state is kept in a backend shared across nodes.
+    """
+    if isinstance(backend, SQLiteBackend):
+        return ReportStore(**settings)
+    return BackendReportStore(backend, state_settings['report_ttl'], settings['memory_entries'],
+                              settings['memory_bytes'])
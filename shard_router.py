@@ -0,0 +1,75 @@
+"""Routes webhook updates to bot workers by chat id."""
+import logging
+from typing import Dict, List, Optional
+
+import httpx
+
+from instrumentation import log_event
+from webhook_server import WebhookServer
+
+logger = logging.getLogger(__name__)
+
+
+def update_chat_id(payload: Dict) -> int:
+    """
+    Chat an update belongs to, or the sending user for updates without a
+    chat (e.g. inline queries); 0 when it has neither.
+    """
+    for value in payload.values():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get('chat') or (value.get('message') or {}).get('chat')
+        if chat:
+            return chat['id']
+        user = value.get('from')
+        if user:
+            return user['id']
+    return 0
+
+
+def shard_for(chat_id: int, shards: int) -> int:
+    """Index of the worker that handles ``chat_id``; stable for a given number of shards."""
+    return chat_id % shards
+
+
+class ShardRouter(WebhookServer):
+    """
+    Webhook endpoint that forwards each update to the worker owning its chat.
+
+    All updates of a chat reach the same worker, so per-chat ordering and
+    the latest-message-wins handling stay within one process while render
+    capacity grows with the number of workers. Workers may be local
+    processes or other nodes. A worker that cannot be reached gets a 503
+    answered to Telegram, which delivers the update again later.
+    """
+
+    def __init__(self, shard_urls: List[str], path: str = '/telegram', secret_token: Optional[str] = None,
+                 host: str = '0.0.0.0', port: int = 8443, timeout: float = 30.0):
+        super().__init__(None, path, secret_token, host, port)
+        if not shard_urls:
+            raise ValueError("ShardRouter needs at least one worker URL")
+        self.shard_urls = shard_urls
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        self._client = httpx.AsyncClient(timeout=self.timeout)
+        await super().start()
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def deliver(self, payload: Dict, body: bytes) -> int:
+        shard = shard_for(update_chat_id(payload), len(self.shard_urls))
+        headers = {'Content-Type': 'application/json'}
+        if self.secret_token:
+            headers['X-Telegram-Bot-Api-Secret-Token'] = self.secret_token
+        try:
+            response = await self._client.post(self.shard_urls[shard], content=body, headers=headers)
+        except httpx.HTTPError as e:
+            log_event(logger, logging.ERROR, 'shard_unreachable', shard=shard, error=repr(e))
+            return 503
+        return response.status_code
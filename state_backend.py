@@ -0,0 +1,216 @@
+"""Key-value state shared by every bot process: SQLite on one node, Redis across nodes."""
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, MutableMapping, Optional
+
+from config import STATE
+
+
+class StateBackend(ABC):
+    """
+    Subset of the Redis commands the bot needs, with bytes values.
+
+    Plain keys (``get``/``set``/``delete``) hold blobs such as PDFs, with an
+    optional time to live; hashes (``hget``/``hset``/``hdel``/``hgetall``/
+    ``hlen``) hold small records such as each user's template.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def hget(self, name: str, field: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def hset(self, name: str, field: str, value: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def hdel(self, name: str, field: str) -> bool:
+        """Remove a field; returns False if it did not exist."""
+        pass
+
+    @abstractmethod
+    def hgetall(self, name: str) -> Dict[str, bytes]:
+        pass
+
+    @abstractmethod
+    def hlen(self, name: str) -> int:
+        """Number of fields in a hash."""
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL
+);
+CREATE TABLE IF NOT EXISTS hashes (
+    name TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (name, field)
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteBackend(StateBackend):
+    """
+    State in a SQLite file, shared by the processes of one node.
+
+    WAL mode lets readers run alongside a writer; SQLite's file locks
+    serialize writers across processes, waiting up to ``timeout`` seconds.
+    Expired keys are dropped when read.
+    """
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute("SELECT value, expires FROM kv WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= time.time():
+                self._db.execute("DELETE FROM kv WHERE key = ? AND expires <= ?", (key, time.time()))
+                return None
+        return bytes(row[0])
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        expires = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+                             (key, value, expires))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def hget(self, name: str, field: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM hashes WHERE name = ? AND field = ?",
+                                   (name, field)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def hset(self, name: str, field: str, value: bytes) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO hashes (name, field, value) VALUES (?, ?, ?)",
+                             (name, field, value))
+
+    def hdel(self, name: str, field: str) -> bool:
+        with self._lock:
+            return self._db.execute("DELETE FROM hashes WHERE name = ? AND field = ?",
+                                    (name, field)).rowcount > 0
+
+    def hgetall(self, name: str) -> Dict[str, bytes]:
+        with self._lock:
+            rows = self._db.execute("SELECT field, value FROM hashes WHERE name = ?", (name,)).fetchall()
+        return {field: bytes(value) for field, value in rows}
+
+    def hlen(self, name: str) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM hashes WHERE name = ?", (name,)).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class RedisBackend(StateBackend):
+    """State in Redis, shared by bot processes on any node; keys are namespaced by ``prefix``."""
+
+    def __init__(self, url: str, prefix: str = ''):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("The redis state backend needs the 'redis' package (pip install redis)") from e
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self._client.set(self.prefix + key, value, px=int(ttl * 1000) if ttl is not None else None)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+    def hget(self, name: str, field: str) -> Optional[bytes]:
+        return self._client.hget(self.prefix + name, field)
+
+    def hset(self, name: str, field: str, value: bytes) -> None:
+        self._client.hset(self.prefix + name, field, value)
+
+    def hdel(self, name: str, field: str) -> bool:
+        return self._client.hdel(self.prefix + name, field) > 0
+
+    def hgetall(self, name: str) -> Dict[str, bytes]:
+        return {field.decode(): value for field, value in self._client.hgetall(self.prefix + name).items()}
+
+    def hlen(self, name: str) -> int:
+        return self._client.hlen(self.prefix + name)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def create_backend(settings: dict = STATE) -> StateBackend:
+    """Build the backend selected in the STATE settings."""
+    kind = settings['backend']
+    if kind == 'sqlite':
+        return SQLiteBackend(settings['path'])
+    if kind == 'redis':
+        return RedisBackend(settings['redis_url'], settings['prefix'])
+    raise ValueError(f"Unknown state backend: {kind}")
+
+
+class SharedDict(MutableMapping):
+    """String-to-string mapping stored in a backend hash, e.g. each user's template."""
+
+    def __init__(self, backend: StateBackend, name: str):
+        self.backend = backend
+        self.name = name
+
+    def __getitem__(self, key: str) -> str:
+        value = self.backend.hget(self.name, key)
+        if value is None:
+            raise KeyError(key)
+        return value.decode('utf-8')
+
+    def __setitem__(self, key: str, value: str) -> None:
+        self.backend.hset(self.name, key, value.encode('utf-8'))
+
+    def __delitem__(self, key: str) -> None:
+        if not self.backend.hdel(self.name, key):
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.backend.hgetall(self.name))
+
+    def __len__(self) -> int:
+        return self.backend.hlen(self.name)
@@ -0,0 +1,64 @@
+"""Chats subscribed to the daily report."""
+import json
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from state_backend import StateBackend
+
+logger = logging.getLogger(__name__)
+
+
+class SubscriptionStore:
+    """
+    Subscribed chats with their template and the digest of the last
+    bulletin sent, kept in the shared state backend so every bot process
+    sees them.
+    """
+
+    NAME = 'subscriptions'
+
+    def __init__(self, backend: StateBackend):
+        self.backend = backend
+
+    def _entry(self, chat_id: int) -> Optional[Dict]:
+        value = self.backend.hget(self.NAME, str(chat_id))
+        return json.loads(value) if value is not None else None
+
+    def _put(self, chat_id: int, entry: Dict) -> None:
+        self.backend.hset(self.NAME, str(chat_id), json.dumps(entry).encode('utf-8'))
+
+    def subscribe(self, chat_id: int, template: Optional[str] = None) -> bool:
+        """Subscribe a chat, or update its template; returns True if it is new."""
+        entry = self._entry(chat_id)
+        self._put(chat_id, {'template': template, 'last_sent': entry.get('last_sent') if entry else None})
+        return entry is None
+
+    def unsubscribe(self, chat_id: int) -> bool:
+        """Remove a chat; returns False if it was not subscribed."""
+        return self.backend.hdel(self.NAME, str(chat_id))
+
+    def pending(self, digest: str) -> Dict[Optional[str], List[int]]:
+        """Chats that have not received the bulletin with ``digest``, grouped by template."""
+        groups: Dict[Optional[str], List[int]] = {}
+        for chat_id, value in self.backend.hgetall(self.NAME).items():
+            entry = json.loads(value)
+            if entry.get('last_sent') != digest:
+                groups.setdefault(entry['template'], []).append(int(chat_id))
+        return groups
+
+    def mark_sent(self, chat_ids: Iterable[int], digest: str) -> None:
+        """Record that these chats received the bulletin with ``digest``."""
+        for chat_id in chat_ids:
+            entry = self._entry(chat_id)
+            if entry is not None and entry.get('last_sent') != digest:
+                entry['last_sent'] = digest
+                self._put(chat_id, entry)
+
+    def get(self, chat_id: int) -> Optional[Dict]:
+        return self._entry(chat_id)
+
+    def __contains__(self, chat_id: int) -> bool:
+        return self.backend.hget(self.NAME, str(chat_id)) is not None
+
+    def __len__(self) -> int:
+        return len(self.backend.hgetall(self.NAME))
@@ -0,0 +1,267 @@
+"""Outbound queue that paces Telegram API calls within the bot's rate limits."""
+import asyncio
+import heapq
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from telegram.error import RetryAfter
+
+from instrumentation import log_event
+
+logger = logging.getLogger(__name__)
+
+# Priorities, most urgent first
+INTERACTIVE = 0  # replies and reports a user is waiting for
+STATUS = 1  # progress edits and clean-up of status messages
+BROADCAST = 2  # subscription fan-out
+
+ApiCall = Callable[[], Awaitable[Any]]
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    delay = error.retry_after
+    return delay.total_seconds() if isinstance(delay, timedelta) else float(delay)
+
+
+class TokenBucket:
+    """Allows ``rate`` calls per second on average, with bursts of up to ``capacity``."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a call is allowed; 0 when one is allowed now."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _ApiJob:
+    __slots__ = ('priority', 'seq', 'chat_id', 'call', 'future', 'attempts')
+
+    def __init__(self, priority: int, seq: int, chat_id: int, call: ApiCall, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.chat_id = chat_id
+        self.call = call
+        self.future = future
+        self.attempts = 0
+
+    def __lt__(self, other: '_ApiJob') -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class TelegramDispatcher:
+    """
+    Priority queue in front of the Telegram Bot API.
+
+    Every call takes a token from a global bucket and from its chat's
+    bucket (group chats, with negative ids, get the slower group rate), so
+    bursts are spread out instead of running into 429 errors. Calls are
+    started in priority order; a chat that is out of tokens does not hold
+    up the others. A RetryAfter answer pauses the whole queue for the
+    time Telegram asks and the call is retried. Pending edits of the same
+    status message are coalesced into a single edit with the latest text.
+    """
+
+    def __init__(self, global_rate: float = 30.0, chat_rate: float = 1.0, group_rate: float = 20 / 60,
+                 chat_burst: int = 3, max_attempts: int = 3):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.max_attempts = max(1, max_attempts)
+        self._heap: List[_ApiJob] = []
+        self._seq = 0
+        self._global: Optional[TokenBucket] = None
+        self._chats: Dict[int, TokenBucket] = {}
+        self._paused_until = 0.0
+        self._status_edits: Dict[Tuple[int, int], Tuple[str, asyncio.Future]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def _start(self) -> None:
+        """Start the scheduling task on the running loop."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._global = TokenBucket(self.global_rate, self.global_rate, time.monotonic())
+            self._task = asyncio.create_task(self._run())
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of calls waiting for a token."""
+        return len(self._heap)
+
+    def _enqueue(self, chat_id: int, call: ApiCall, priority: int) -> asyncio.Future:
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._heap, _ApiJob(priority, self._seq, chat_id, call, future))
+        self._wakeup.set()
+        return future
+
+    async def send(self, chat_id: int, call: ApiCall, priority: int = INTERACTIVE) -> Any:
+        """
+        Run an API call for ``chat_id`` once the rate limits allow it.
+
+        Args:
+            chat_id: Chat the call sends to, for its per-chat limit
+            call: Zero-argument coroutine function making the request
+            priority: INTERACTIVE, STATUS or BROADCAST
+
+        Returns:
+            The call's result; its exception is raised if it fails
+        """
+        return await self._enqueue(chat_id, call, priority)
+
+    async def edit_status(self, message, text: str) -> Any:
+        """Edit a status message, merging with an edit of it that has not been sent yet."""
+        key = (message.chat_id, message.message_id)
+        pending = self._status_edits.get(key)
+        if pending is not None:
+            self._status_edits[key] = (text, pending[1])
+            return await pending[1]
+
+        latest = [text]
+
+        async def edit():
+            # Take the newest text; a retried edit keeps the text it already took
+            pending = self._status_edits.pop(key, None)
+            if pending is not None:
+                latest[0] = pending[0]
+            return await message.edit_text(latest[0])
+
+        future = self._enqueue(message.chat_id, edit, STATUS)
+        self._status_edits[key] = (text, future)
+        return await future
+
+    async def delete_status(self, message) -> Any:
+        """Delete a status message, dropping any edit of it still waiting."""
+        key = (message.chat_id, message.message_id)
+        pending = self._status_edits.pop(key, None)
+        if pending is not None:
+            self._discard(pending[1])
+        return await self.send(message.chat_id, message.delete, STATUS)
+
+    def discard_status(self, message) -> None:
+        """Delete a status message in the background, ignoring failures."""
+        deletion = asyncio.ensure_future(self.delete_status(message))
+        deletion.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+    def _discard(self, future: asyncio.Future) -> None:
+        for index, job in enumerate(self._heap):
+            if job.future is future:
+                self._heap[index] = self._heap[-1]
+                self._heap.pop()
+                heapq.heapify(self._heap)
+                break
+        if not future.done():
+            future.set_result(None)
+
+    def _chat_bucket(self, chat_id: int, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= 10000:
+                # Full buckets carry no state, drop them before tracking more chats
+                self._chats = {key: value for key, value in self._chats.items() if not value.full(now)}
+            rate = self.group_rate if chat_id < 0 else self.chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, self.chat_burst, now)
+        return bucket
+
+    def _next_ready(self, now: float) -> Tuple[Optional[_ApiJob], Optional[float]]:
+        """Pop the most urgent job allowed to run now, or return how long to wait."""
+        wait = self._global.wait_time(now)
+        if wait > 0:
+            return None, wait
+        blocked = []
+        job = None
+        wait = None
+        while self._heap:
+            candidate = heapq.heappop(self._heap)
+            if candidate.future.done():
+                continue
+            chat_wait = self._chat_bucket(candidate.chat_id, now).wait_time(now)
+            if chat_wait == 0:
+                job = candidate
+                break
+            blocked.append(candidate)
+            wait = chat_wait if wait is None else min(wait, chat_wait)
+        for candidate in blocked:
+            heapq.heappush(self._heap, candidate)
+        return job, wait
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            job, wait = None, self._paused_until - now
+            if wait <= 0:
+                job, wait = self._next_ready(now)
+            if job is not None:
+                self._global.take(now)
+                self._chat_bucket(job.chat_id, now).take(now)
+                task = asyncio.create_task(self._execute(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, job: _ApiJob) -> None:
+        job.attempts += 1
+        try:
+            result = await job.call()
+        except RetryAfter as e:
+            delay = retry_after_seconds(e)
+            log_event(logger, logging.WARNING, 'flood_control', chat=job.chat_id,
+                      retry_after=delay, attempt=job.attempts)
+            if job.attempts >= self.max_attempts:
+                if not job.future.done():
+                    job.future.set_exception(e)
+                return
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            heapq.heappush(self._heap, job)
+            self._wakeup.set()
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+
+    async def close(self) -> None:
+        """Stop scheduling and cancel calls still waiting or running."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        running = list(self._running)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(self._task, *running, return_exceptions=True)
+        for job in self._heap:
+            if not job.future.done():
+                job.future.cancel()
+        self._heap = []
+        self._status_edits = {}
+        self._task = None
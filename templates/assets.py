@@ -0,0 +1,120 @@
+"""Registry of images shared by every report render."""
+import copy
+import hashlib
+import io
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfdoc
+from reportlab.platypus import Flowable
+
+logger = logging.getLogger(__name__)
+
+
+class ImageAsset:
+    """An image decoded and encoded as a PDF XObject once, then reused."""
+
+    def __init__(self, data: bytes, max_width_px: Optional[int] = None):
+        self.digest = hashlib.sha256(data).hexdigest()
+        reader = ImageReader(io.BytesIO(data))
+        if max_width_px and reader.getSize()[0] > max_width_px:
+            reader = self._downsample(reader, max_width_px)
+        self.width_px, self.height_px = reader.getSize()
+        # Named by content so identical images share one XObject per document
+        self.name = f"asset{self.digest[:32]}"
+        self.xobject = pdfdoc.PDFImageXObject(self.name, reader, mask='auto')
+        self.smask = getattr(self.xobject, '_smask', None)
+        if self.smask is not None:
+            del self.xobject._smask
+
+    @staticmethod
+    def _downsample(reader: ImageReader, max_width_px: int) -> ImageReader:
+        from PIL import Image as PILImage
+        image = reader._image
+        height = max(1, round(image.height * max_width_px / image.width))
+        resized = image.resize((max_width_px, height), PILImage.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, format='PNG', optimize=True)
+        return ImageReader(io.BytesIO(buffer.getvalue()))
+
+    def draw_on(self, canv, width: float, height: float) -> None:
+        """Draw the image at the canvas origin, registering its XObject once per document."""
+        doc = canv._doc
+        reg_name = doc.getXObjectName(self.name)
+        if doc.idToObject.get(reg_name) is None:
+            # Copies share the encoded stream; only per-document fields differ
+            xobject = copy.copy(self.xobject)
+            canv._setXObjects(xobject)
+            doc.Reference(xobject, reg_name)
+            doc.addForm(self.name, xobject)
+            if self.smask is not None:
+                mask_name = doc.getXObjectName(self.smask.name)
+                if doc.idToObject.get(mask_name) is None:
+                    smask = copy.copy(self.smask)
+                    canv._setXObjects(smask)
+                    xobject.smask = doc.Reference(smask, mask_name)
+                else:
+                    xobject.smask = pdfdoc.PDFObjectReference(mask_name)
+
+        canv._currentPageHasImages = 1
+        canv.saveState()
+        canv.scale(width, height)
+        canv._code.append(f"/{reg_name} Do")
+        canv.restoreState()
+        canv._formsinuse.append(self.name)
+
+
+class SharedImage(Flowable):
+    """Flowable drawing a preloaded ImageAsset; does no file I/O at render time."""
+
+    def __init__(self, asset: ImageAsset, width: float, height: float, hAlign: str = 'CENTER'):
+        super().__init__()
+        self.asset = asset
+        self.drawWidth = width
+        self.drawHeight = height
+        self.hAlign = hAlign
+
+    def wrap(self, availWidth, availHeight):
+        return self.drawWidth, self.drawHeight
+
+    def draw(self):
+        self.asset.draw_on(self.canv, self.drawWidth, self.drawHeight)
+
+
+class AssetRegistry:
+    """Loads images once and deduplicates files with identical content."""
+
+    def __init__(self, max_width_px: Optional[int] = None):
+        self.max_width_px = max_width_px
+        self._by_path: Dict[str, Optional[ImageAsset]] = {}
+        self._by_digest: Dict[str, ImageAsset] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: str) -> Optional[ImageAsset]:
+        """Return the asset for ``path``, or None if it cannot be loaded."""
+        with self._lock:
+            if path in self._by_path:
+                return self._by_path[path]
+
+            asset = None
+            if not os.path.exists(path):
+                logger.warning(f"Image file not found at {path}")
+            else:
+                try:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    digest = hashlib.sha256(data).hexdigest()
+                    asset = self._by_digest.get(digest)
+                    if asset is None:
+                        asset = ImageAsset(data, self.max_width_px)
+                        self._by_digest[digest] = asset
+                except Exception as e:
+                    logger.error(f"Error loading image {path}: {str(e)}")
+            self._by_path[path] = asset
+            return asset
+
+    def __len__(self) -> int:
+        return len(self._by_digest)
@@ -2,44 +2,69 @@ from abc import ABC, abstractmethod
 from typing import Dict, List
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle, StyleSheet1
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from datetime import datetime
 import io
 from config import *
+from templates.styles import style_registry
 
 class BaseTemplate(ABC):
     """Base class for PDF report templates."""
+
+    # Bump when the rendered output changes so cached reports are invalidated
+    version = '1'
+    # Name the template is discovered under; None for base classes
+    name = None
+    # Hash of the source file it was loaded from, so a hot-reloaded
+    # template never reuses styles or cached reports of the old code
+    revision = ''
+
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_styles()
+        # Shared by every instance of the template; treat as read-only
+        self.styles = style_registry.get(self, 'stylesheet', self._build_stylesheet)
+
+    def _build_stylesheet(self) -> StyleSheet1:
+        """Build the stylesheet once per template version."""
+        styles = getSampleStyleSheet()
+        self._setup_styles(styles)
+        return styles
 
-    def _setup_styles(self):
+    def _setup_styles(self, styles: StyleSheet1):
         """Setup custom styles for the PDF."""
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='CustomTitle',
-            parent=self.styles['Heading1'],
+            parent=styles['Heading1'],
             fontSize=FONT_SIZE_TITLE,
             spaceAfter=30,
             alignment=1,
             textColor=colors.HexColor(COLORS['white'])
         ))
 
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='CustomSubtitle',
-            parent=self.styles['Heading2'],
+            parent=styles['Heading2'],
             fontSize=FONT_SIZE_SUBTITLE,
             spaceAfter=20,
             textColor=colors.HexColor(COLORS['primary'])
         ))
 
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='CustomBody',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontSize=FONT_SIZE_BODY,
             spaceAfter=12
         ))
 
+    def cache_token(self, data: Dict) -> str:
+        """
+        Extra cache key material for output that depends on more than ``data``.
+
+        Templates reading other state, such as the occupancy history, return
+        something that changes whenever that state does.
+        """
+        return ''
+
     @abstractmethod
     def generate_pdf(self, data: Dict) -> io.BytesIO:
         """Generate PDF based on the template."""
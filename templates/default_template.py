@@ -1,150 +1,168 @@
+import heapq
 import io
+from operator import attrgetter
 from templates.base_template import BaseTemplate
+from templates.assets import AssetRegistry, SharedImage
+from templates.streaming import ChunkedTable
+from templates.styles import style_registry
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Tuple
 from config import *
 from reportlab.lib.units import cm
-import os
+from instrumentation import log_event, timed
+from report_model import OccupancyReport, UnitRecord, normalize_report
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Logos shared by every DefaultTemplate instance
+asset_registry = AssetRegistry(max_width_px=LOGOS['max_width_px'])
+
+# Table style commands, compiled once per template version by the style registry
+TABLE_STYLE_COMMANDS = {
+    'header': (
+        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#00A65A')),  # CIEGES green
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (0, 0), 24),  # Title size
+        ('FONTSIZE', (0, 1), (0, 1), 16),  # Date size
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('TOPPADDING', (0, 0), (-1, -1), 12),
+    ),
+    'summary': (
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 14),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('BOX', (0, 0), (-1, -1), 1, colors.black),  # Only outer border
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ('LEFTPADDING', (0, 0), (-1, -1), 6),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ),
+    'occupancy': (
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),  # Header background
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),  # Header text color
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),  # Center all text
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),  # Bold header
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),  # Regular text for data
+        ('FONTSIZE', (0, 0), (-1, 0), 12),  # Header font size
+        ('FONTSIZE', (0, 1), (-1, -1), 10),  # Data font size
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),  # Add grid lines
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('LEFTPADDING', (0, 0), (-1, -1), 6),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ),
+    'overview': (
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),  # Header
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),  # Content
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),  # Header text
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),  # Content text
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),  # Left align all text
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),  # Bold header
+        ('FONTSIZE', (0, 0), (-1, 0), 14),  # Header size
+        ('FONTSIZE', (0, 1), (-1, -1), 12),  # Content size
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('LEFTPADDING', (0, 0), (-1, -1), 12),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+    ),
+}
 
 class DefaultTemplate(BaseTemplate):
     """Default template implementing the current PDF format."""
 
-    def _create_logo_header(self) -> Image:
+    name = 'default'
+
+    def __init__(self):
+        super().__init__()
+        self.table_styles = style_registry.get(self, 'tables', lambda: {
+            name: TableStyle(commands) for name, commands in TABLE_STYLE_COMMANDS.items()
+        })
+        # Decode the logos once; renders only reference the shared assets
+        self.header_logo = asset_registry.load(LOGOS['header'])
+        self.footer_logo = asset_registry.load(LOGOS['footer'])
+
+    def _create_logo_header(self) -> SharedImage:
         """Create the header with CIEGES logo."""
-        logo_path = 'attached_assets/image_1739196996707.png'
-        try:
-            if os.path.exists(logo_path):
-                img = Image(logo_path, width=PAGE_WIDTH-2*MARGIN, height=1.5*cm)
-                img.hAlign = 'CENTER'
-                return img
-            else:
-                print(f"Warning: Header logo file not found at {logo_path}")
-                return None
-        except Exception as e:
-            print(f"Error loading header logo: {str(e)}")
+        if self.header_logo is None:
             return None
+        return SharedImage(self.header_logo, width=PAGE_WIDTH-2*MARGIN, height=1.5*cm)
 
-    def _create_logo_footer(self) -> Image:
+    def _create_logo_footer(self) -> SharedImage:
         """Create the footer with CIEGES logo."""
-        logo_path = 'attached_assets/image_1739197036571.png'
-        try:
-            if os.path.exists(logo_path):
-                img = Image(logo_path, width=PAGE_WIDTH-2*MARGIN, height=1.5*cm)
-                img.hAlign = 'CENTER'
-                return img
-            else:
-                print(f"Warning: Footer logo file not found at {logo_path}")
-                return None
-        except Exception as e:
-            print(f"Error loading footer logo: {str(e)}")
+        if self.footer_logo is None:
             return None
+        return SharedImage(self.footer_logo, width=PAGE_WIDTH-2*MARGIN, height=1.5*cm)
 
-    def _create_header_section(self, data: Dict) -> Table:
+    def _create_header_section(self, report: OccupancyReport) -> Table:
         """Create the green header section with title and date."""
-        print("Creating header section...")
         table_data = [
             ['INFORMAÇÕES GERAIS'],
-            [f"INFORME DIÁRIO {datetime.now().strftime('%d/%m/%Y')}"]
+            [f"INFORME DIÁRIO {report.date or datetime.now().strftime('%d/%m/%Y')}"]
         ]
         table = Table(table_data, colWidths=[PAGE_WIDTH-2*MARGIN])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#00A65A')),  # CIEGES green
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (0, 0), 24),  # Title size
-            ('FONTSIZE', (0, 1), (0, 1), 16),  # Date size
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-        ]))
+        table.setStyle(self.table_styles['header'])
         return table
 
-    def _create_summary_section(self, data: Dict) -> Table:
+    def _create_summary_section(self, report: OccupancyReport) -> Table:
         """Create the metrics summary section."""
-        print("Creating summary section...")
-        # Calculate totals from the units data
-        clinical_beds = 123  # Total fixed
-        icu_beds = 84  # Total fixed
-
-        occupied_clinical = 0
-        occupied_icu = 0
-
-        print(f"Processing {len(data['units'])} units for summary...")
-        for unit in data['units']:
-            is_icu = 'UTI' in unit['name']
-            beds_occupied = int(round(unit['total_beds'] * unit['occupancy_rate'] / 100))
-
-            print(f"Unit: {unit['name']}")
-            print(f"Total beds: {unit['total_beds']}")
-            print(f"Occupancy rate: {unit['occupancy_rate']}%")
-            print(f"Calculated occupied beds: {beds_occupied}")
-
-            if is_icu:
-                occupied_icu += beds_occupied
-            else:
-                occupied_clinical += beds_occupied
-
-        print(f"Final totals - Clinical: {occupied_clinical}/{clinical_beds}, ICU: {occupied_icu}/{icu_beds}")
+        summary = report.summary
+        log_event(logger, logging.DEBUG, 'summary_totals', units=len(report.units),
+                  occupied_clinical=summary.clinical.occupied_beds, clinical_beds=summary.clinical_capacity,
+                  occupied_icu=summary.icu.occupied_beds, icu_beds=summary.icu_capacity)
 
         metrics = [
             [
-                f"{clinical_beds}\nLeitos Clínicos",
-                f"{occupied_clinical}\nLeitos Ocupados",
-                f"{clinical_beds - occupied_clinical}\nLeitos Vagos"
+                f"{summary.clinical_capacity}\nLeitos Clínicos",
+                f"{summary.clinical.occupied_beds}\nLeitos Ocupados",
+                f"{summary.available_clinical}\nLeitos Vagos"
             ],
             [
-                f"{icu_beds}\nLeitos UTIs",
-                f"{occupied_icu}\nUTIs Ocupadas",
-                f"{icu_beds - occupied_icu}\nUTIs Vagas"
+                f"{summary.icu_capacity}\nLeitos UTIs",
+                f"{summary.icu.occupied_beds}\nUTIs Ocupadas",
+                f"{summary.available_icu}\nUTIs Vagas"
             ]
         ]
 
         table = Table(metrics, colWidths=[PAGE_WIDTH/3-MARGIN]*3)
-        table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 14),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('BOX', (0, 0), (-1, -1), 1, colors.black),  # Only outer border
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('LEFTPADDING', (0, 0), (-1, -1), 6),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        table.setStyle(self.table_styles['summary'])
         return table
 
-    def _create_occupancy_table(self, units: List[Dict]) -> Table:
-        """Create the detailed occupancy table."""
-        print("Creating occupancy table...")
-        table_data = [
-            ['Unidade', '%', 'Ocupados', 'Disponível']
-        ]
-
-        print(f"Processing {len(units)} units for table...")
-        # Ordenar unidades por taxa de ocupação (decrescente)
-        sorted_units = sorted(units, key=lambda x: float(x['occupancy_rate']), reverse=True)
+    @staticmethod
+    def _occupancy_rows(units: Iterable[UnitRecord], with_hospital: bool = False) -> Iterator[List[str]]:
+        """Format table rows lazily, one unit at a time."""
+        for unit in units:
+            name = f"{unit.hospital} - {unit.name}" if with_hospital else unit.name
+            yield [
+                f"{name} ({unit.total_beds} leitos)",
+                f"{unit.occupancy_rate:.2f}%",
+                str(unit.occupied_beds),
+                str(unit.available_beds)
+            ]
 
-        for unit in sorted_units:
-            # Calculate the number of occupied beds based on occupancy rate
-            total_beds = unit['total_beds']
-            occupancy_rate = unit['occupancy_rate']
-            occupied_beds = int(round(total_beds * occupancy_rate / 100))
-            available_beds = total_beds - occupied_beds
+    def _create_occupancy_table(self, report: OccupancyReport) -> Table:
+        """
+        Create the detailed occupancy table.
 
-            print(f"Unit: {unit['name']}")
-            print(f"Total beds: {total_beds}")
-            print(f"Occupancy rate: {occupancy_rate}%")
-            print(f"Occupied beds: {occupied_beds}")
-            print(f"Available beds: {available_beds}")
+        Large unit lists are paged lazily through a ChunkedTable, with the
+        header repeated on every page. When ``OCCUPANCY_TABLE['top_k']`` is
+        set only that many units are ranked, with a partial sort.
+        """
+        header = ['Unidade', '%', 'Ocupados', 'Disponível']
+        units = report.units
 
-            table_data.append([
-                f"{unit['name']} ({total_beds} leitos)",
-                f"{occupancy_rate:.2f}%",
-                str(occupied_beds),
-                str(available_beds)
-            ])
+        # Ordenar unidades por taxa de ocupação (decrescente)
+        top_k = OCCUPANCY_TABLE['top_k']
+        by_rate = attrgetter('occupancy_rate')
+        if 0 < top_k < len(units):
+            sorted_units = heapq.nlargest(top_k, units, key=by_rate)
+        else:
+            sorted_units = sorted(units, key=by_rate, reverse=True)
 
         # Adjusted column widths to match the example
         col_widths = [
@@ -154,37 +172,28 @@ class DefaultTemplate(BaseTemplate):
             PAGE_WIDTH * 0.175  # 17.5% for available
         ]
 
-        table = Table(table_data, colWidths=col_widths)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),  # Header background
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),  # Header text color
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),  # Center all text
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),  # Bold header
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),  # Regular text for data
-            ('FONTSIZE', (0, 0), (-1, 0), 12),  # Header font size
-            ('FONTSIZE', (0, 1), (-1, -1), 10),  # Data font size
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),  # Add grid lines
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('LEFTPADDING', (0, 0), (-1, -1), 6),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        return table
+        # Units of different hospitals may share a name
+        rows = self._occupancy_rows(sorted_units, with_hospital=len(report.hospitals) > 1)
+        if len(sorted_units) > OCCUPANCY_TABLE['stream_threshold']:
+            return ChunkedTable(header, rows, col_widths, self.table_styles['occupancy'])
 
-    def _create_overview_section(self, data: Dict) -> Table:
-        """Create the overview section with total occupancy percentages."""
-        print("Creating overview section...")
-
-        # Calculate total occupancy percentage
-        total_beds = 0
-        total_occupied = 0
+        table = Table([header] + list(rows), colWidths=col_widths, repeatRows=1)
+        table.setStyle(self.table_styles['occupancy'])
+        return table
 
-        for unit in data['units']:
-            total_beds += unit['total_beds']
-            occupied = int(round(unit['total_beds'] * unit['occupancy_rate'] / 100))
-            total_occupied += occupied
+    def _create_ranking_note(self, report: OccupancyReport) -> Paragraph:
+        """Note shown when the occupancy table lists only the top units."""
+        top_k = OCCUPANCY_TABLE['top_k']
+        if not 0 < top_k < len(report.units):
+            return None
+        return Paragraph(
+            f"Exibindo as {top_k} unidades com maior ocupação de um total de {len(report.units)}.",
+            self.styles['CustomBody']
+        )
 
-        occupied_percentage = (total_occupied / total_beds) * 100 if total_beds > 0 else 0
+    def _create_overview_section(self, report: OccupancyReport) -> Table:
+        """Create the overview section with total occupancy percentages."""
+        occupied_percentage = report.summary.total.occupancy_rate
         available_percentage = 100 - occupied_percentage
 
         # Create table with overview information
@@ -193,73 +202,66 @@ class DefaultTemplate(BaseTemplate):
             [f'Leitos Ocupados: {occupied_percentage:.1f}% dos leitos estão ocupados'],
             [f'Leitos Vagos: {available_percentage:.1f}% dos leitos estão vagos']
         ]
+        # Detailed bulletins also get one line per hospital
+        for hospital in report.hospitals:
+            totals = hospital.totals
+            table_data.append([
+                f'{hospital.name}: {totals.occupancy_rate:.1f}% '
+                f'({totals.occupied_beds} de {totals.total_beds} leitos ocupados)'
+            ])
 
         table = Table(table_data, colWidths=[PAGE_WIDTH-2*MARGIN])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),  # Header
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),  # Content
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),  # Header text
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),  # Content text
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),  # Left align all text
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),  # Bold header
-            ('FONTSIZE', (0, 0), (-1, 0), 14),  # Header size
-            ('FONTSIZE', (0, 1), (-1, -1), 12),  # Content size
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('LEFTPADDING', (0, 0), (-1, -1), 12),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-        ]))
+        table.setStyle(self.table_styles['overview'])
         return table
 
-    def generate_pdf(self, data: Dict) -> io.BytesIO:
-        """Generate PDF from hospital data using the default template."""
-        print("\n=== Starting PDF Generation ===")
-        print(f"Received data: {data}")
+    def _create_extra_sections(self, report: OccupancyReport) -> List:
+        """Flowables placed after the occupancy table; subclasses add sections here."""
+        return []
 
+    def generate_pdf(self, data: Dict) -> io.BytesIO:
+        """Generate PDF from hospital data in either format using the default template."""
+        report = normalize_report(data)
         doc, buffer = self.create_document()
         story = []
 
         # Add header logo if available
-        print("Adding header logo...")
         header_logo = self._create_logo_header()
         if header_logo:
             story.append(header_logo)
             story.append(Spacer(1, 10))
 
         # Add header
-        print("Creating header section...")
-        story.append(self._create_header_section(data))
+        story.append(self._create_header_section(report))
         story.append(Spacer(1, 20))
 
         # Add summary metrics
-        print("Creating summary section...")
-        story.append(self._create_summary_section(data))
+        story.append(self._create_summary_section(report))
         story.append(Spacer(1, 20))
 
         # Add overview section
-        print("Adding overview section...")
-        story.append(self._create_overview_section(data))
+        story.append(self._create_overview_section(report))
         story.append(Spacer(1, 20))
 
         # Add occupancy table
-        print("Adding occupancy table...")
-        if 'units' in data and data['units']:
-            story.append(self._create_occupancy_table(data['units']))
+        if report.units:
+            story.append(self._create_occupancy_table(report))
+            ranking_note = self._create_ranking_note(report)
+            if ranking_note:
+                story.append(Spacer(1, 10))
+                story.append(ranking_note)
         else:
-            print("Warning: No units found in data!")
-            print(f"Available keys in data: {data.keys()}")
-            print(f"Data content: {data}")
+            log_event(logger, logging.WARNING, 'no_units', hospitals=len(report.hospitals))
+
+        story.extend(self._create_extra_sections(report))
 
         # Add footer logo if available
-        print("Adding footer logo...")
         footer_logo = self._create_logo_footer()
         if footer_logo:
             story.append(Spacer(1, 30))
             story.append(footer_logo)
 
         # Build PDF
-        print("Building final PDF...")
-        doc.build(story)
+        with timed(logger, 'render.build', flowables=len(story)):
+            doc.build(story)
         buffer.seek(0)
-        print("PDF generation completed.")
         return buffer
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""Flowables that lay out large tables without materializing every row."""
+from itertools import islice
+from typing import Iterable, List, Sequence
+
+from reportlab.platypus import Flowable, Spacer, Table, TableStyle
+
+
+class ChunkedTable(Flowable):
+    """
+    A table whose rows are pulled from an iterator one page at a time.
+
+    Every time the layout reaches it, the table takes just enough rows to
+    fill the space left in the current frame and emits them as a small Table
+    with the header on top. Only one page worth of cells exists at a time, so
+    memory stays flat and splitting stays cheap however many rows there are.
+    """
+
+    def __init__(self, header: Sequence[str], rows: Iterable[Sequence[str]],
+                 col_widths: Sequence[float], style: TableStyle):
+        super().__init__()
+        self.header = list(header)
+        self.rows = iter(rows)
+        self.col_widths = list(col_widths)
+        self.style = style
+        self._pending: List[Sequence[str]] = []  # rows taken but not yet placed
+        self._header_height = None
+        self._row_height = None
+
+    def _take(self, count: int) -> List[Sequence[str]]:
+        rows = self._pending[:count]
+        del self._pending[:count]
+        if len(rows) < count:
+            rows.extend(islice(self.rows, count - len(rows)))
+        return rows
+
+    def _has_more(self) -> bool:
+        if not self._pending:
+            self._pending.extend(islice(self.rows, 1))
+        return bool(self._pending)
+
+    def _table(self, rows: List[Sequence[str]]) -> Table:
+        table = Table([self.header] + rows, colWidths=self.col_widths, repeatRows=1)
+        table.setStyle(self.style)
+        return table
+
+    def _rows_for(self, availWidth, availHeight) -> int:
+        """Rows to take for the given space; expects at least one pending row."""
+        if self._row_height is None:
+            probe = self._table(self._pending[:1])
+            probe.wrap(availWidth, availHeight)
+            self._header_height = probe._rowHeights[0]
+            self._row_height = max(1, min(probe._rowHeights[1:]))
+        # Overestimate with the shortest row; Table.split trims the excess
+        return max(1, int((availHeight - self._header_height) / self._row_height) + 1)
+
+    def wrap(self, availWidth, availHeight):
+        # Claim more than the frame offers so the layout always asks us to split
+        self.width = sum(self.col_widths)
+        self.height = availHeight + 1
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight) -> List[Flowable]:
+        if not self._has_more():
+            return [Spacer(0, 0)]
+        rows = self._take(self._rows_for(availWidth, availHeight))
+        table = self._table(rows)
+        _, height = table.wrap(availWidth, availHeight)
+        if height > availHeight:
+            parts = table.split(availWidth, availHeight)
+            if not parts:
+                self._pending[:0] = rows
+                return []  # Not even the header and one row fit; try the next frame
+            table = parts[0]
+            placed = len(table._cellvalues) - 1
+            self._pending[:0] = rows[placed:]
+        # The layout marks a flowable it had to move to the next frame and
+        # refuses to move it twice; this instance is reused for every page
+        self.__dict__.pop('_postponed', None)
+        if self._has_more():
+            return [table, self]
+        return [table]
+
+    def draw(self):
+        pass
@@ -0,0 +1,49 @@
+"""Registry of styles compiled once per template revision and shared by all renders."""
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Tuple
+
+
+class StyleRegistry:
+    """
+    Caches style objects per template class and name, for the class's
+    current version and revision.
+
+    Renders only read the shared objects, so every instance of a template,
+    in any thread, reuses the same compiled styles. Bumping a template's
+    ``version``, or reloading its module with changes, compiles a fresh set
+    and drops the previous one, so hot reloads do not accumulate styles.
+    """
+
+    def __init__(self):
+        # class -> ((version, revision), {name: style})
+        self._styles: Dict[str, Tuple[Tuple[str, str], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, template, name: str, factory: Callable[[], Any]) -> Any:
+        """Return the style compiled by ``factory`` for this template, compiling it once."""
+        cls = type(template)
+        owner = f"{cls.__module__}.{cls.__qualname__}"
+        revision = (template.version, template.revision)
+        entry = self._styles.get(owner)
+        style = entry[1].get(name) if entry is not None and entry[0] == revision else None
+        if style is None:
+            with self._lock:
+                entry = self._styles.get(owner)
+                if entry is None or entry[0] != revision:
+                    # Instances of the old revision keep the styles they already hold
+                    entry = (revision, {})
+                    self._styles[owner] = entry
+                style = entry[1].get(name)
+                if style is None:
+                    style = factory()
+                    if isinstance(style, dict):
+                        style = MappingProxyType(style)
+                    entry[1][name] = style
+        return style
+
+    def __len__(self) -> int:
+        return sum(len(styles) for _, styles in self._styles.values())
+
+
+style_registry = StyleRegistry()
@@ -1,33 +1,230 @@
-from typing import Dict, Optional
+import hashlib
+import importlib.metadata
+import importlib.util
+import inspect
+import logging
+import os
+import sys
+import threading
+from types import MappingProxyType, ModuleType
+from typing import Dict, Mapping, Optional, Tuple
+from config import TEMPLATES
+from instrumentation import log_event
 from templates.base_template import BaseTemplate
-from templates.default_template import DefaultTemplate
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TEMPLATE = TEMPLATES['default']
+PLUGIN_SUFFIX = '_template.py'
+
+
+class _PluginFile:
+    """A template module loaded from disk and the templates it defined."""
+
+    def __init__(self, stamp: Tuple[int, int], digest: str, templates: Dict[str, BaseTemplate]):
+        self.stamp = stamp  # (mtime, size) when last checked
+        self.digest = digest
+        self.templates = templates
+
 
 class TemplateManager:
-    """Manages different PDF report templates."""
-    
-    def __init__(self):
-        self.templates: Dict[str, BaseTemplate] = {
-            'default': DefaultTemplate()
-        }
-        self.current_template = 'default'
+    """
+    Manages different PDF report templates.
+
+    Templates are discovered in ``*_template.py`` modules of the built-in
+    templates directory and of ``settings['directory']``: every BaseTemplate
+    subclass a module defines with a ``name`` is instantiated once and
+    registered under that name. Installed packages can add templates under
+    the ``settings['entry_point_group']`` entry point group.
+
+    Every ``settings['reload_interval']`` seconds, a background thread checks
+    the modules for changes (modification time and size, then content hash)
+    and loads the changed ones again, so new layouts are picked up without a
+    restart. Lookups never touch the disk. Entry points are loaded once.
+
+    Templates whose constructor takes an argument named in ``services``
+    receive it, e.g. the bot's occupancy history as ``history``.
+
+    There is no current template: every render names the template it wants
+    and gets the default when it names none. The name-to-template mapping
+    is an immutable snapshot that loading or registering replaces, so
+    renders in any thread resolve templates without locking.
+    """
+
+    def __init__(self, settings: dict = TEMPLATES, services: Optional[Mapping[str, object]] = None):
+        self.default = settings['default']
+        self.services = dict(services or {})
+        self.directories = [BUILTIN_DIRECTORY]
+        directory = os.path.abspath(settings['directory'])
+        if directory != BUILTIN_DIRECTORY:
+            if not os.path.isdir(directory):
+                logger.warning(f"Template directory not found at {directory}")
+            self.directories.append(directory)
+        self.reload_interval = settings['reload_interval']
+        self.templates: Mapping[str, BaseTemplate] = MappingProxyType({})
+        self._files: Dict[str, _PluginFile] = {}
+        self._registered: Dict[str, BaseTemplate] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+        with self._lock:
+            self._entry_points = self._load_entry_points(settings['entry_point_group'])
+            self._scan()
+            self._publish()
+        if self.default not in self.templates:
+            raise ValueError(f"Default template '{self.default}' not found")
+        if self.reload_interval > 0:
+            self._watcher = threading.Thread(target=self._watch, name='template-reload', daemon=True)
+            self._watcher.start()
+
+    def _load_entry_points(self, group: str) -> Dict[str, BaseTemplate]:
+        templates = {}
+        for entry_point in importlib.metadata.entry_points(group=group):
+            try:
+                template = entry_point.load()
+                templates[entry_point.name] = template() if inspect.isclass(template) else template
+            except Exception as e:
+                log_event(logger, logging.ERROR, 'template_load_failed', entry_point=entry_point.value,
+                          error=repr(e))
+        return templates
+
+    @staticmethod
+    def _module_name(path: str) -> str:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if os.path.dirname(path) == BUILTIN_DIRECTORY:
+            return f"templates.{stem}"
+        return f"template_plugins.{stem}"
+
+    def _load_module(self, path: str, reload: bool) -> ModuleType:
+        name = self._module_name(path)
+        module = sys.modules.get(name)
+        if (not reload and module is not None
+                and os.path.abspath(getattr(module, '__file__', '') or '') == path):
+            # Already imported, e.g. a built-in template another module imports
+            return module
+
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        previous = sys.modules.get(name)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            if previous is not None:
+                sys.modules[name] = previous
+            else:
+                del sys.modules[name]
+            raise
+        return module
+
+    def _instantiate(self, module: ModuleType, digest: str) -> Dict[str, BaseTemplate]:
+        """One warmed instance of each named template the module defines."""
+        templates = {}
+        for cls in vars(module).values():
+            if (inspect.isclass(cls) and issubclass(cls, BaseTemplate) and cls.__module__ == module.__name__
+                    and cls.name and not inspect.isabstract(cls)):
+                cls.revision = digest[:16]
+                parameters = inspect.signature(cls).parameters
+                templates[cls.name] = cls(**{name: service for name, service in self.services.items()
+                                             if name in parameters})
+        return templates
+
+    def _scan(self) -> bool:
+        """Load new and changed template modules and forget deleted ones; True if any changed."""
+        changed = False
+        files = {}
+        for directory in self.directories:
+            try:
+                names = sorted(os.listdir(directory))
+            except OSError:
+                continue
+            for filename in names:
+                if not filename.endswith(PLUGIN_SUFFIX) or filename.startswith('_'):
+                    continue
+                path = os.path.join(directory, filename)
+                previous = self._files.get(path)
+                try:
+                    stat = os.stat(path)
+                    stamp = (stat.st_mtime_ns, stat.st_size)
+                    if previous is not None and previous.stamp == stamp:
+                        files[path] = previous
+                        continue
+                    with open(path, 'rb') as f:
+                        digest = hashlib.sha256(f.read()).hexdigest()
+                except OSError:
+                    continue
+                if previous is not None and previous.digest == digest:
+                    previous.stamp = stamp
+                    files[path] = previous
+                    continue
+
+                try:
+                    templates = self._instantiate(self._load_module(path, previous is not None), digest)
+                except Exception as e:
+                    # Keep serving the last working version until the file is fixed
+                    log_event(logger, logging.ERROR, 'template_load_failed', path=path, error=repr(e))
+                    templates = previous.templates if previous is not None else {}
+                else:
+                    log_event(logger, logging.INFO, 'templates_loaded', path=path,
+                              templates=','.join(templates))
+                files[path] = _PluginFile(stamp, digest, templates)
+                changed = True
+        changed = changed or files.keys() != self._files.keys()
+        self._files = files
+        return changed
+
+    def _publish(self) -> None:
+        # Later directories override built-ins; entry points and registered templates override files
+        templates: Dict[str, BaseTemplate] = {}
+        for plugin in self._files.values():
+            templates.update(plugin.templates)
+        templates.update(self._entry_points)
+        templates.update(self._registered)
+        self.templates = MappingProxyType(templates)
+
+    def reload(self) -> bool:
+        """Check the template modules for changes now; returns True if any changed."""
+        with self._lock:
+            changed = self._scan()
+            if changed:
+                self._publish()
+        return changed
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.reload_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                log_event(logger, logging.ERROR, 'template_reload_failed', error=repr(e))
+
+    def close(self) -> None:
+        """Stop checking the template modules for changes."""
+        self._stopped.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
 
     def register_template(self, name: str, template: BaseTemplate) -> None:
         """Register a new template."""
-        self.templates[name] = template
+        with self._lock:
+            self._registered[name] = template
+            self._publish()
+
+    def is_registered(self, template: BaseTemplate) -> bool:
+        """True if the template was added with register_template rather than loaded from a module."""
+        return any(registered is template for registered in self._registered.values())
 
     def get_template(self, name: Optional[str] = None) -> BaseTemplate:
         """Get a template by name. Returns default if name not found."""
-        template_name = name or self.current_template
-        return self.templates.get(template_name, self.templates['default'])
+        templates = self.templates
+        return templates.get(name or self.default, templates[self.default])
 
-    def set_default_template(self, name: str) -> bool:
-        """Set the default template."""
-        if name in self.templates:
-            self.current_template = name
-            return True
-        return False
+    def __contains__(self, name: str) -> bool:
+        return name in self.templates
 
     def list_templates(self) -> Dict[str, str]:
         """List available templates with their descriptions."""
-        return {name: template.__doc__ or "No description available" 
+        return {name: template.__doc__ or "No description available"
                 for name, template in self.templates.items()}
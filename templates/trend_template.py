@@ -0,0 +1,198 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+import logging
+import threading
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.platypus import KeepTogether, Paragraph, Spacer, Table
+from config import *
+from report_model import CLINICAL, ICU, OccupancyReport
+from templates.default_template import DefaultTemplate
+from timeseries_store import DAY, TOTAL, WEEK, Rollup, TimeSeriesStore, report_day, week_start
+
+logger = logging.getLogger(__name__)
+
+KIND_LABELS = {CLINICAL: 'Clínicos', ICU: 'UTIs', TOTAL: 'Total'}
+KIND_COLORS = {
+    CLINICAL: colors.HexColor(COLORS['success']),
+    ICU: colors.HexColor(COLORS['danger']),
+    TOTAL: colors.HexColor(COLORS['primary']),
+}
+CHART_WIDTH = PAGE_WIDTH - 2 * MARGIN
+CHART_HEIGHT = 180
+
+
+class TrendTemplate(DefaultTemplate):
+    """Default report plus daily and weekly occupancy trends from the bulletin history."""
+
+    name = 'trend'
+
+    def __init__(self, history: Optional[TimeSeriesStore] = None):
+        super().__init__()
+        self._history = history
+        self._history_lock = threading.Lock()
+
+    @property
+    def history(self) -> TimeSeriesStore:
+        """Occupancy history, opened once on first use by any render thread."""
+        if self._history is None:
+            with self._history_lock:
+                if self._history is None:
+                    self._history = TimeSeriesStore(**TIMESERIES)
+        return self._history
+
+    def cache_token(self, data: Dict) -> str:
+        # Cached reports are stale as soon as another bulletin is recorded
+        return f"history:{self.history.revision}"
+
+    def _create_comparison_table(self, daily: Dict[str, List[Rollup]],
+                                 weekly: Dict[str, List[Rollup]], today: date) -> Table:
+        """Day-over-day and week-over-week occupancy per category."""
+        this_week = week_start(today)
+
+        def rate(rollups: List[Rollup], start: date) -> Optional[float]:
+            for rollup in reversed(rollups):
+                if rollup.start == start and rollup.total_beds:
+                    return rollup.occupancy_rate
+            return None
+
+        def percent(value: Optional[float]) -> str:
+            return f"{value:.1f}%" if value is not None else '-'
+
+        def delta(current: Optional[float], previous: Optional[float]) -> str:
+            if current is None or previous is None:
+                return '-'
+            return f"{current - previous:+.1f} p.p."
+
+        table_data = [['Categoria', 'Hoje', 'Ontem', 'Variação', 'Semana', 'Semana ant.']]
+        for kind in (CLINICAL, ICU, TOTAL):
+            today_rate = rate(daily[kind], today)
+            yesterday_rate = rate(daily[kind], today - timedelta(days=1))
+            week_rate = rate(weekly[kind], this_week)
+            previous_week_rate = rate(weekly[kind], this_week - timedelta(days=7))
+            table_data.append([
+                KIND_LABELS[kind],
+                percent(today_rate),
+                percent(yesterday_rate),
+                delta(today_rate, yesterday_rate),
+                percent(week_rate),
+                percent(previous_week_rate)
+            ])
+
+        table = Table(table_data, colWidths=[CHART_WIDTH * 0.2] + [CHART_WIDTH * 0.16] * 5)
+        table.setStyle(self.table_styles['occupancy'])
+        return table
+
+    @staticmethod
+    def _legend(kinds: List[str], x: float, y: float) -> Legend:
+        legend = Legend()
+        legend.x = x
+        legend.y = y
+        legend.alignment = 'right'
+        legend.columnMaximum = len(kinds)
+        legend.fontName = FONT_FAMILY
+        legend.fontSize = 8
+        legend.colorNamePairs = [(KIND_COLORS[kind], KIND_LABELS[kind]) for kind in kinds]
+        return legend
+
+    def _create_daily_chart(self, daily: Dict[str, List[Rollup]], start: date, days: int) -> Drawing:
+        """Line chart of the daily occupancy rate per category."""
+        drawing = Drawing(CHART_WIDTH, CHART_HEIGHT)
+        plot = LinePlot()
+        plot.x, plot.y = 30, 30
+        plot.width, plot.height = CHART_WIDTH - 130, CHART_HEIGHT - 50
+
+        kinds = [kind for kind in (CLINICAL, ICU, TOTAL)
+                 if any(rollup.total_beds for rollup in daily[kind])]
+        plot.data = [
+            [((rollup.start - start).days, rollup.occupancy_rate) for rollup in daily[kind] if rollup.total_beds]
+            for kind in kinds
+        ]
+        for index, kind in enumerate(kinds):
+            plot.lines[index].strokeColor = KIND_COLORS[kind]
+            plot.lines[index].strokeWidth = 1.5
+
+        plot.xValueAxis.valueMin = 0
+        plot.xValueAxis.valueMax = days - 1
+        plot.xValueAxis.valueStep = max(1, days // 6)
+        plot.xValueAxis.labelTextFormat = lambda x: (start + timedelta(days=int(x))).strftime('%d/%m')
+        plot.xValueAxis.labels.fontName = FONT_FAMILY
+        plot.xValueAxis.labels.fontSize = 8
+        plot.yValueAxis.valueMin = 0
+        plot.yValueAxis.valueMax = 100
+        plot.yValueAxis.valueStep = 20
+        plot.yValueAxis.labelTextFormat = '%d%%'
+        plot.yValueAxis.labels.fontName = FONT_FAMILY
+        plot.yValueAxis.labels.fontSize = 8
+
+        drawing.add(plot)
+        drawing.add(self._legend(kinds, CHART_WIDTH - 80, CHART_HEIGHT - 30))
+        return drawing
+
+    def _create_weekly_chart(self, weekly: Dict[str, List[Rollup]], weeks: List[date]) -> Drawing:
+        """Bar chart of the weekly occupancy rate of clinical and ICU beds."""
+        drawing = Drawing(CHART_WIDTH, CHART_HEIGHT)
+        chart = VerticalBarChart()
+        chart.x, chart.y = 30, 30
+        chart.width, chart.height = CHART_WIDTH - 130, CHART_HEIGHT - 50
+
+        kinds = (CLINICAL, ICU)
+        chart.data = []
+        for kind in kinds:
+            by_week = {rollup.start: rollup.occupancy_rate for rollup in weekly[kind]}
+            chart.data.append([by_week.get(week, 0) for week in weeks])
+        for index, kind in enumerate(kinds):
+            chart.bars[index].fillColor = KIND_COLORS[kind]
+            chart.bars[index].strokeColor = None
+
+        chart.categoryAxis.categoryNames = [week.strftime('%d/%m') for week in weeks]
+        chart.categoryAxis.labels.fontName = FONT_FAMILY
+        chart.categoryAxis.labels.fontSize = 8
+        chart.valueAxis.valueMin = 0
+        chart.valueAxis.valueMax = 100
+        chart.valueAxis.valueStep = 20
+        chart.valueAxis.labelTextFormat = '%d%%'
+        chart.valueAxis.labels.fontName = FONT_FAMILY
+        chart.valueAxis.labels.fontSize = 8
+        chart.barSpacing = 1
+        chart.groupSpacing = 8
+
+        drawing.add(chart)
+        drawing.add(self._legend(list(kinds), CHART_WIDTH - 80, CHART_HEIGHT - 30))
+        return drawing
+
+    def _create_extra_sections(self, report: OccupancyReport) -> List:
+        """Trend section read from the precomputed daily and weekly rollups."""
+        today = report_day(report)
+        days = TRENDS['days']
+        day_start = today - timedelta(days=days - 1)
+        weeks = [week_start(today) - timedelta(days=7 * offset) for offset in range(TRENDS['weeks'] - 1, -1, -1)]
+
+        daily = self.history.rollups(DAY, day_start, today)
+        weekly = self.history.rollups(WEEK, weeks[0], today)
+
+        title = Paragraph('Tendência de Ocupação', self.styles['CustomSubtitle'])
+        if sum(1 for rollup in daily[TOTAL] if rollup.total_beds) < 2:
+            return [Spacer(1, 20), title, Paragraph(
+                'Histórico insuficiente para exibir tendências; '
+                'os gráficos aparecem a partir do segundo dia de boletins.',
+                self.styles['CustomBody']
+            )]
+
+        return [
+            Spacer(1, 20),
+            KeepTogether([title, self._create_comparison_table(daily, weekly, today)]),
+            Spacer(1, 20),
+            KeepTogether([
+                Paragraph(f'Ocupação diária - últimos {days} dias', self.styles['CustomBody']),
+                self._create_daily_chart(daily, day_start, days)
+            ]),
+            Spacer(1, 10),
+            KeepTogether([
+                Paragraph(f'Ocupação semanal - últimas {len(weeks)} semanas', self.styles['CustomBody']),
+                self._create_weekly_chart(weekly, weeks)
+            ]),
+        ]
@@ -0,0 +1,41 @@
+import builtins
+from templates.assets import ImageAsset
+from templates.default_template import DefaultTemplate, asset_registry
+
+TEST_DATA = {'units': [{'name': 'UTI HSJ', 'total_beds': 20, 'occupancy_rate': 100.0}]}
+
+
+def test_logos_share_one_asset_and_renders_read_no_files():
+    """Both logos draw one preloaded asset; rendering reports opens no files."""
+    template, other = DefaultTemplate(), DefaultTemplate()
+    # The header and footer logos have the same content
+    assert isinstance(template.header_logo, ImageAsset)
+    assert template.header_logo is template.footer_logo is other.header_logo
+    assert len(asset_registry) == 1
+    xobject = dict(vars(template.header_logo.xobject))
+
+    opened = []
+    real_open = builtins.open
+
+    def recording_open(file, *args, **kwargs):
+        opened.append(file)
+        return real_open(file, *args, **kwargs)
+
+    builtins.open = recording_open
+    try:
+        pdfs = [template.generate_pdf(TEST_DATA).getvalue(), other.generate_pdf(TEST_DATA).getvalue()]
+    finally:
+        builtins.open = real_open
+
+    assert opened == []
+    for pdf in pdfs:
+        assert pdf.startswith(b'%PDF')
+        # One image and its alpha mask, although two logos are drawn
+        assert pdf.count(b'/Subtype /Image') == 2
+    # Each document registers a copy; the shared asset itself is left untouched
+    assert vars(template.header_logo.xobject) == xobject
+
+
+if __name__ == '__main__':
+    test_logos_share_one_asset_and_renders_read_no_files()
+    print("\nTest result: PASSED")
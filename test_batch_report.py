@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+import zipfile
+from batch_report import iter_bulletins, run_batch
+
+BULLETIN = """UTI 1 (17 leitos) - 94,11%
+UTI HSJ (20 leitos) - 100,00%
+Geriatria (33 leitos) - 87,87%"""
+
+
+def test_batch_from_jsonl_to_zip():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'boletins.jsonl')
+        with open(source, 'w', encoding='utf-8') as f:
+            for day in range(1, 4):
+                f.write(json.dumps({'name': f'dia_{day:02d}', 'text': BULLETIN, 'date': f'{day:02d}/02/2025'}) + '\n')
+
+        assert [date for _, _, date in iter_bulletins(source)] == ['01/02/2025', '02/02/2025', '03/02/2025']
+
+        destination = os.path.join(tmp, 'relatorios.zip')
+        stats = run_batch(source, destination, workers=2)
+        print(f"Batch stats: {stats}")
+        assert stats['rendered'] == 3 and stats['failed'] == 0
+        with zipfile.ZipFile(destination) as archive:
+            assert sorted(archive.namelist()) == ['dia_01.pdf', 'dia_02.pdf', 'dia_03.pdf']
+            assert archive.read('dia_01.pdf').startswith(b'%PDF')
+
+
+def test_batch_from_directory():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'boletins')
+        os.makedirs(source)
+        for name, text in [('2025-02-06', BULLETIN), ('boletim', f"Boletim de 07/02/2025\n{BULLETIN}"),
+                           ('sem_data', BULLETIN)]:
+            with open(os.path.join(source, f'{name}.txt'), 'w', encoding='utf-8') as f:
+                f.write(text)
+
+        # Dated by file name or text; never by the day the batch runs
+        assert {name: date for name, _, date in iter_bulletins(source)} == {
+            '2025-02-06': '06/02/2025', 'boletim': '07/02/2025', 'sem_data': None}
+
+        destination = os.path.join(tmp, 'saida')
+        stats = run_batch(source, destination, workers=1)
+        assert stats['rendered'] == 2 and stats['failed'] == 1
+        assert sorted(os.listdir(destination)) == ['2025-02-06.pdf', 'boletim.pdf']
+
+
+if __name__ == '__main__':
+    test_batch_from_jsonl_to_zip()
+    test_batch_from_directory()
+    print("\nTest result: PASSED")
@@ -0,0 +1,135 @@
+import asyncio
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+
+from telegram.error import BadRequest
+
+import config
+
+
+class _FakeMessage:
+    def __init__(self, text=''):
+        self.text = text
+        self.replies = []
+
+    async def reply_text(self, text):
+        self.replies.append(text)
+        return self
+
+
+def _document_message(file_id):
+    return type('Message', (), {'document': type('Document', (), {'file_id': file_id})()})()
+
+
+class _FakeBot:
+    """Rejects file_ids it does not know and assigns one to every upload."""
+
+    def __init__(self, known_file_ids=()):
+        self.known_file_ids = set(known_file_ids)
+        self.sent = []
+
+    async def send_document(self, chat_id, document, caption=None, filename=None):
+        if isinstance(document, str):
+            self.sent.append(('file_id', document))
+            if document not in self.known_file_ids:
+                raise BadRequest("Wrong file identifier/http url specified")
+            return _document_message(document)
+        self.sent.append(('upload', filename))
+        file_id = f'uploaded-{len(self.known_file_ids)}'
+        self.known_file_ids.add(file_id)
+        return _document_message(file_id)
+
+
+def _update(text='', chat_id=123456, user_id=789012):
+    message = _FakeMessage(text)
+    return type('Update', (), {
+        'message': message,
+        'effective_message': message,
+        'effective_chat': type('Chat', (), {'id': chat_id})(),
+        'effective_user': type('User', (), {'id': user_id})(),
+    })()
+
+
+def _context(*args, bot=None):
+    return type('Context', (), {'args': list(args), 'bot': bot, 'job_queue': None})()
+
+
+@contextmanager
+def _hospital_bot():
+    """A HospitalBot whose stores live in a temporary directory."""
+    settings = [config.STATE, config.REPORT_STORE, config.TIMESERIES]
+    saved = [dict(setting) for setting in settings]
+    with tempfile.TemporaryDirectory() as tmp:
+        for setting in settings:
+            setting['path'] = os.path.join(tmp, os.path.basename(setting['path']))
+        from bot import HospitalBot
+        hospital_bot = HospitalBot()
+        try:
+            yield hospital_bot
+        finally:
+            asyncio.run(hospital_bot.close())
+            for setting, values in zip(settings, saved):
+                setting.update(values)
+
+
+def test_template_set_is_per_user():
+    """/template set validates the name and changes only the calling user's template."""
+    with _hospital_bot() as hospital_bot:
+        async def scenario():
+            first, unknown = _update(user_id=1), _update(user_id=1)
+            await hospital_bot.handle_template(first, _context('set', 'trend'))
+            await hospital_bot.handle_template(unknown, _context('set', 'missing'))
+            await hospital_bot.outbox.close()
+            return first, unknown
+
+        first, unknown = asyncio.run(scenario())
+        assert first.effective_message.replies == ["✅ Modelo 'trend' selecionado com sucesso!"]
+        assert unknown.effective_message.replies == ["❌ Modelo 'missing' não encontrado."]
+        assert hospital_bot.user_templates.get('1') == 'trend'
+        assert hospital_bot.user_templates.get('2') is None
+
+
+def test_rejected_file_id_is_replaced_by_upload():
+    """A file_id Telegram rejects is forgotten; the report is uploaded and its new file_id reused."""
+    with _hospital_bot() as hospital_bot:
+        pdf_data = b'%PDF-1.4 report'
+        content_hash = hospital_bot.file_ids.content_hash(pdf_data)
+        hospital_bot.file_ids.put(content_hash, 'stale-id')
+        bot = _FakeBot()
+
+        async def scenario():
+            await hospital_bot._send_report(bot, 123456, io.BytesIO(pdf_data))
+            await hospital_bot._send_report(bot, 123456, io.BytesIO(pdf_data))
+            await hospital_bot.outbox.close()
+
+        asyncio.run(scenario())
+        assert bot.sent == [('file_id', 'stale-id'), ('upload', 'relatorio_hospitalar.pdf'),
+                            ('file_id', 'uploaded-0')]
+        assert hospital_bot.file_ids.get(content_hash) == 'uploaded-0'
+
+
+def test_subscribe_warns_without_publishers():
+    """Subscribing when no publisher is configured says that nothing will be delivered."""
+    with _hospital_bot() as hospital_bot:
+        async def scenario():
+            replies = []
+            for chat_id, publishers in ((1, set()), (2, {100})):
+                hospital_bot.scheduler.publishers = publishers
+                update = _update(chat_id=chat_id)
+                await hospital_bot.subscribe(update, _context())
+                replies.append(update.effective_message.replies)
+            await hospital_bot.outbox.close()
+            return replies
+
+        unconfigured, configured = asyncio.run(scenario())
+        assert 'ADMIN_USER_IDS' in unconfigured[0] and unconfigured[0].startswith('✅')
+        assert 'ADMIN_USER_IDS' not in configured[0]
+
+
+if __name__ == '__main__':
+    test_template_set_is_per_user()
+    test_subscribe_warns_without_publishers()
+    test_rejected_file_id_is_replaced_by_upload()
+    print("\nTest result: PASSED")
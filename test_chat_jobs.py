@@ -0,0 +1,58 @@
+import asyncio
+from chat_jobs import ChatJobs
+
+
+def test_latest_message_wins():
+    """A newer job cancels the running one of its chat; other chats are unaffected."""
+    jobs = ChatJobs()
+    events = []
+
+    def job(label, delay):
+        async def run():
+            events.append(f"start {label}")
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                events.append(f"cancelled {label}")
+                raise
+            events.append(f"end {label}")
+            return label
+        return run
+
+    async def scenario():
+        first = asyncio.ensure_future(jobs.run(1, job('first', 1)))
+        other_chat = asyncio.ensure_future(jobs.run(2, job('other', 0.05)))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(jobs.run(1, job('second', 0.01)))
+        return await asyncio.gather(first, other_chat, second)
+
+    results = asyncio.run(scenario())
+    assert results == [None, 'other', 'second']
+    # The superseded job unwinds before its replacement starts
+    assert events.index('cancelled first') < events.index('start second')
+    assert 'end first' not in events
+    assert jobs.superseded == 1 and jobs.active == 0
+
+
+def test_outside_cancellation_propagates():
+    """Cancelling a job from outside is not mistaken for being superseded."""
+    jobs = ChatJobs()
+
+    async def scenario():
+        task = asyncio.ensure_future(jobs.run(1, lambda: asyncio.sleep(1)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+            raise AssertionError("Expected CancelledError")
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(scenario())
+    assert jobs.superseded == 0 and jobs.active == 0
+
+
+if __name__ == '__main__':
+    test_latest_message_wins()
+    test_outside_cancellation_propagates()
+    print("\nTest result: PASSED")
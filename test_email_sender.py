@@ -0,0 +1,132 @@
+import asyncio
+import smtplib
+from email_sender import EmailDeliveryError, EmailSender, EmailTransport, SMTPTransport
+
+SETTINGS = {
+    'transport': 'memory',
+    'sender': 'noreply@cieges.acre.gov.br',
+    'workers': 2,
+    'max_queue': 10,
+    'max_attempts': 3,
+    'backoff': 0.01,
+    'batch_size': 2,
+}
+
+
+class MemoryTransport(EmailTransport):
+    """Records batches and fails the first ``failures`` attempts."""
+
+    def __init__(self, failures=0, retryable=True):
+        self.failures = failures
+        self.retryable = retryable
+        self.attempts = 0
+        self.sent = []
+
+    async def send(self, recipients, pdf_data, filename):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise EmailDeliveryError("simulated failure", retryable=self.retryable)
+        self.sent.append(list(recipients))
+
+
+def _send(transport, recipients):
+    return _send_with(EmailSender(transport=transport, settings=SETTINGS), recipients)
+
+
+def _send_with(sender, recipients):
+    async def scenario():
+        try:
+            return await sender.send_report_async(recipients, b'%PDF-1.4')
+        finally:
+            await sender.close()
+
+    return asyncio.run(scenario())
+
+
+def test_batches_recipients():
+    transport = MemoryTransport()
+    assert _send(transport, ['a@x.com', 'b@x.com', 'c@x.com'])
+    print(f"Batches sent: {transport.sent}")
+    assert sorted(map(len, transport.sent)) == [1, 2]
+
+
+def test_retries_with_backoff():
+    transport = MemoryTransport(failures=2)
+    assert _send(transport, ['a@x.com'])
+    assert transport.attempts == 3
+
+
+def test_gives_up_on_permanent_error():
+    transport = MemoryTransport(failures=5, retryable=False)
+    assert not _send(transport, ['a@x.com'])
+    assert transport.attempts == 1
+
+
+def test_full_queue_rejects_whole_send():
+    """A send that does not fit in the queue queues none of its batches."""
+    transport = MemoryTransport()
+    sender = EmailSender(transport=transport, settings=dict(SETTINGS, max_queue=2))
+    recipients = [f'{name}@x.com' for name in 'abcde']
+
+    async def scenario():
+        try:
+            rejected = await sender.send_report_async(recipients, b'%PDF-1.4')
+            depth = sender.queue_depth
+            return rejected, depth, await sender.send_report_async(recipients[:4], b'%PDF-1.4')
+        finally:
+            await sender.close()
+
+    rejected, depth, sent = asyncio.run(scenario())
+    assert not rejected and depth == 0
+    assert sent and sorted(map(len, transport.sent)) == [2, 2]
+
+
+def test_smtp_message_hides_recipients():
+    transport = SMTPTransport('localhost', 1025, 'noreply@cieges.acre.gov.br')
+    message = transport.build_message(['a@x.com', 'b@x.com'], b'%PDF-1.4', 'relatorio.pdf')
+    assert message['To'] == 'noreply@cieges.acre.gov.br'
+    assert 'b@x.com' in message['Bcc']
+    assert [part.get_filename() for part in message.iter_attachments()] == ['relatorio.pdf']
+
+
+class _BrokenSMTP:
+    """Pooled connection that fails every send."""
+
+    def __init__(self):
+        self.closed = False
+
+    def send_message(self, message):
+        raise smtplib.SMTPDataError(451, b'temporary failure')
+
+    def close(self):
+        self.closed = True
+
+
+def test_smtp_failure_closes_connection():
+    """A failed send closes the pooled connection before the next send reconnects."""
+    transport = SMTPTransport('localhost', 1025, 'noreply@cieges.acre.gov.br')
+    broken = transport._smtp = _BrokenSMTP()
+    try:
+        asyncio.run(transport.send(['a@x.com'], b'%PDF-1.4', 'relatorio.pdf'))
+        raise AssertionError("Expected EmailDeliveryError")
+    except EmailDeliveryError as e:
+        assert e.retryable
+    assert broken.closed and transport._smtp is None
+
+
+def test_missing_credentials_fail_on_send():
+    """A sender without SendGrid credentials can be created; sending reports the error."""
+    sender = EmailSender(settings=dict(SETTINGS, transport='sendgrid', sendgrid_api_key=None))
+    assert sender.queue_depth == 0
+    assert not _send_with(sender, ['a@x.com'])
+
+
+if __name__ == '__main__':
+    test_batches_recipients()
+    test_retries_with_backoff()
+    test_gives_up_on_permanent_error()
+    test_full_queue_rejects_whole_send()
+    test_smtp_message_hides_recipients()
+    test_smtp_failure_closes_connection()
+    test_missing_credentials_fail_on_send()
+    print("\nTest result: PASSED")
@@ -0,0 +1,54 @@
+import os
+import tempfile
+from file_id_registry import FileIdRegistry
+from state_backend import SQLiteBackend
+
+
+def test_file_ids_persist_across_instances():
+    """A file_id stored by one process is found by another and after a restart."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'state.sqlite3')
+        first, second = SQLiteBackend(path), SQLiteBackend(path)
+        try:
+            key = FileIdRegistry.content_hash(b'%PDF report')
+            FileIdRegistry(first).put(key, 'file-1')
+            assert FileIdRegistry(second).get(key) == 'file-1'
+            FileIdRegistry(second).forget(key)
+            assert FileIdRegistry(first).get(key) is None
+            FileIdRegistry(first).put(key, 'file-2')
+        finally:
+            first.close()
+            second.close()
+
+        restarted = SQLiteBackend(path)
+        try:
+            assert FileIdRegistry(restarted).get(key) == 'file-2'
+        finally:
+            restarted.close()
+
+
+def test_oldest_file_ids_are_evicted():
+    """Past max_entries the oldest tenth is dropped at once; storing again refreshes an entry."""
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, 'state.sqlite3'))
+        try:
+            registry = FileIdRegistry(backend, max_entries=20)
+            for number in range(20):
+                registry.put(f'hash-{number}', f'file-{number}')
+            registry.put('hash-0', 'file-0b')
+            registry.put('hash-20', 'file-20')
+            assert len(registry) == 18
+            assert [registry.get(f'hash-{number}') for number in (1, 2, 3)] == [None, None, None]
+            assert registry.get('hash-0') == 'file-0b' and registry.get('hash-20') == 'file-20'
+            # Room for two more before the next eviction
+            registry.put('hash-21', 'file-21')
+            registry.put('hash-22', 'file-22')
+            assert len(registry) == 20
+        finally:
+            backend.close()
+
+
+if __name__ == '__main__':
+    test_file_ids_persist_across_instances()
+    test_oldest_file_ids_are_evicted()
+    print("\nTest result: PASSED")
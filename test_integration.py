@@ -22,6 +22,7 @@ Centro Cirúrgico - 45%"""
     class MockUpdate:
         def __init__(self, message):
             self.message = message
+            self.effective_message = message
             self.effective_chat = type('obj', (object,), {'id': 123456})
             self.effective_user = type('obj', (object,), {'id': 789012})
     
@@ -0,0 +1,50 @@
+import urllib.request
+from metrics import Counter, Gauge, Histogram, MetricsRegistry, start_metrics_server
+
+
+def test_prometheus_exposition():
+    registry = MetricsRegistry()
+    latency = registry.register(Histogram('stage_seconds', 'Stage latency', ('stage',), buckets=(0.1, 1.0)))
+    errors = registry.register(Counter('errors_total', 'Errors', ('stage',)))
+    registry.register(Gauge('queue_depth', 'Queue depth', lambda: 3))
+
+    latency.observe(0.05, stage='parse')
+    latency.observe(0.5, stage='parse')
+    latency.observe(5, stage='parse')
+    errors.inc(stage='render')
+
+    text = registry.expose()
+    print(text)
+    assert 'stage_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="parse"} 3' in text
+    assert 'errors_total{stage="render"} 1' in text
+    assert '# TYPE queue_depth gauge' in text and 'queue_depth 3' in text
+
+
+def test_histogram_quantile():
+    histogram = Histogram('h', 'help', buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 1.5
+    assert 2.0 < histogram.quantile(0.95) <= 4.0
+    assert Histogram('empty', 'help').quantile(0.5) is None
+
+
+def test_metrics_endpoint():
+    registry = MetricsRegistry()
+    registry.register(Counter('requests_total', 'Requests')).inc()
+    server = start_metrics_server(0, host='127.0.0.1', registry=registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        body = urllib.request.urlopen(url, timeout=5).read().decode()
+        assert 'requests_total 1' in body
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    test_prometheus_exposition()
+    test_histogram_quantile()
+    test_metrics_endpoint()
+    print("\nTest result: PASSED")
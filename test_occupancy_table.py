@@ -0,0 +1,69 @@
+import io
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table
+from config import OCCUPANCY_TABLE
+from report_model import normalize_report
+from templates.default_template import DefaultTemplate
+from templates.streaming import ChunkedTable
+
+
+class _RecordingDocTemplate(SimpleDocTemplate):
+    """Collects every Table placed on a page."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.placed = []
+
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, Table):
+            self.placed.append((self.page, flowable._cellvalues))
+
+
+def _units(count):
+    return [{'name': f'Unidade {i}', 'total_beds': 10 + i % 7, 'occupancy_rate': (i * 37) % 100}
+            for i in range(count)]
+
+
+def test_chunked_table_pages_rows():
+    """Every row is placed once, one chunk per page, each with the header on top."""
+    template = DefaultTemplate()
+    units = _units(500)
+    table = template._create_occupancy_table(normalize_report({'units': units}))
+    assert isinstance(table, ChunkedTable)
+
+    doc = _RecordingDocTemplate(io.BytesIO(), pagesize=A4)
+    doc.build([table])
+
+    pages = [page for page, _ in doc.placed]
+    rows = [row for _, cells in doc.placed for row in cells[1:]]
+    print(f"{len(rows)} rows on {doc.page} pages")
+    assert len(pages) == len(set(pages)) == doc.page > 1
+    assert all(cells[0] == ['Unidade', '%', 'Ocupados', 'Disponível'] for _, cells in doc.placed)
+    assert len(rows) == len(units)
+    rates = [float(row[1].rstrip('%')) for row in rows]
+    assert rates == sorted(rates, reverse=True)
+
+
+def test_top_k_lists_most_occupied():
+    """With top_k set only the most occupied units are ranked."""
+    template = DefaultTemplate()
+    units = _units(200)
+    report = normalize_report({'units': units})
+    previous = OCCUPANCY_TABLE['top_k']
+    OCCUPANCY_TABLE['top_k'] = 5
+    try:
+        table = template._create_occupancy_table(report)
+        note = template._create_ranking_note(report)
+    finally:
+        OCCUPANCY_TABLE['top_k'] = previous
+
+    expected = sorted(units, key=lambda x: x['occupancy_rate'], reverse=True)[:5]
+    assert [row[0] for row in table._cellvalues[1:]] == \
+        [f"{unit['name']} ({unit['total_beds']} leitos)" for unit in expected]
+    assert '5 unidades' in note.text and '200' in note.text
+
+
+if __name__ == '__main__':
+    test_chunked_table_pages_rows()
+    test_top_k_lists_most_occupied()
+    print("\nTest result: PASSED")
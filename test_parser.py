@@ -40,6 +40,42 @@ Clinica médica (30 leitos)- 90,90%"""
         print(f"Erro ao processar mensagem: {str(e)}")
         return False
 
+def test_detailed_format():
+    parser = HospitalDataParser()
+    test_message = """🏥 Hospital de Urgência
+🟢 UTI HUERB 1 (17 leitos)
+Internados: 15
+Vagas: 1
+Leitos bloqueados: 1
+🟢 Clínica Médica
+Internados: 28
+Vagas: 2
+
+🏥 Hospital Santa Juliana
+🟢 UTI HSJ (20 leitos)
+Internados: 20"""
+
+    data = parser.parse_message(test_message)
+    print("Parsed data:", data)
+    assert parser.validate_data(data)
+    assert [h['name'] for h in data['hospitals']] == ['Hospital de Urgência', 'Hospital Santa Juliana']
+
+    uti, clinica = data['hospitals'][0]['units']
+    assert (uti['total_beds'], uti['occupied_beds'], uti['available_beds'], uti['blocked_beds']) == (17, 15, 1, 1)
+    # Total beds fall back to the known unit sizes
+    assert clinica['total_beds'] == 30
+    assert data['hospitals'][1]['units'][0]['occupied_beds'] == 20
+    return True
+
+def test_text_without_units_is_invalid():
+    """Chatter such as a greeting is not a bulletin, so the user gets the format error."""
+    parser = HospitalDataParser()
+    for message in ("bom dia pessoal", "obrigado"):
+        assert not parser.validate_data(parser.parse_message(message)), message
+    assert not parser.validate_data({'units': []})
+    assert not parser.validate_data({'hospitals': [{'name': 'Hospital de Urgência', 'units': []}]})
+    return True
+
 if __name__ == '__main__':
-    success = test_simple_format()
+    success = test_simple_format() and test_detailed_format() and test_text_without_units_is_invalid()
     print("\nResultado do teste:", "PASSOU" if success else "FALHOU")
\ No newline at end of file
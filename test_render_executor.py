@@ -0,0 +1,167 @@
+import asyncio
+import threading
+from pdf_generator import PDFGenerator, TemplateUnavailableError
+from render_executor import RenderExecutor, RenderQueueFullError, RenderTimeoutError
+from report_cache import ReportCache
+from templates.default_template import DefaultTemplate
+
+TEST_DATA = {
+    'units': [
+        {'name': 'UTI HSJ', 'total_beds': 20, 'occupancy_rate': 100.00},
+        {'name': 'Geriatria', 'total_beds': 33, 'occupancy_rate': 87.87},
+    ]
+}
+
+
+def test_generate_pdf_async():
+    """PDF rendered in the pool matches the synchronous output format."""
+    pdf_gen = PDFGenerator(RenderExecutor(max_workers=2, max_queue=2, timeout=30))
+
+    async def render():
+        return await asyncio.gather(*(pdf_gen.generate_pdf_async(TEST_DATA) for _ in range(3)))
+
+    try:
+        buffers = asyncio.run(render())
+    finally:
+        pdf_gen.shutdown()
+
+    for buffer in buffers:
+        assert buffer.getvalue().startswith(b'%PDF')
+    print(f"Rendered {len(buffers)} PDFs in the worker pool")
+
+
+def test_backpressure_and_timeout():
+    """Saturated pool rejects new jobs and slow jobs time out."""
+    executor = RenderExecutor(max_workers=1, max_queue=0, timeout=0.1)
+    release = threading.Event()
+
+    async def scenario():
+        slow = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        assert executor.saturated
+        try:
+            await executor.run(print, "never runs")
+            raise AssertionError("Expected RenderQueueFullError")
+        except RenderQueueFullError:
+            print("Saturated pool rejected job")
+        try:
+            await slow
+            raise AssertionError("Expected RenderTimeoutError")
+        except RenderTimeoutError:
+            print("Slow job timed out")
+        release.set()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert executor.pending == 0
+
+
+def test_identical_renders_are_coalesced():
+    """Concurrent requests for the same report share one render, even if one waiter is cancelled."""
+    pdf_gen = PDFGenerator(RenderExecutor(max_workers=2, max_queue=8, timeout=30), cache=ReportCache(max_entries=0))
+    renders = []
+    render_bytes = pdf_gen._render_bytes
+    release = threading.Event()
+
+    def counting_render(data, template_name):
+        renders.append(template_name)
+        # Held until every request joined, however fast rendering is
+        release.wait(5)
+        return render_bytes(data, template_name)
+
+    pdf_gen._render_bytes = counting_render
+
+    async def scenario():
+        first = asyncio.ensure_future(pdf_gen.generate_pdf_async(TEST_DATA))
+        while not pdf_gen._inflight:
+            await asyncio.sleep(0.001)
+        others = asyncio.gather(*(pdf_gen.generate_pdf_async(TEST_DATA) for _ in range(3)))
+        # Cancelled once the others share the render it started
+        while pdf_gen.coalesced < 3:
+            await asyncio.sleep(0.001)
+        first.cancel()
+        release.set()
+        return await others
+
+    try:
+        buffers = asyncio.run(scenario())
+    finally:
+        pdf_gen.shutdown()
+
+    assert len(renders) == 1 and pdf_gen.coalesced == 3
+    assert len({buffer.getvalue() for buffer in buffers}) == 1
+    assert not pdf_gen._inflight
+
+
+def test_superseded_queued_render_never_starts():
+    """A render whose every waiter was cancelled is dropped while it waits for a worker."""
+    executor = RenderExecutor(max_workers=1, max_queue=4, timeout=30)
+    pdf_gen = PDFGenerator(executor, cache=ReportCache(max_entries=0))
+    renders = []
+    render_bytes = pdf_gen._render_bytes
+
+    def counting_render(data, template):
+        renders.append(data['units'][0]['occupancy_rate'])
+        return render_bytes(data, template)
+
+    pdf_gen._render_bytes = counting_render
+    release = threading.Event()
+    newer = dict(TEST_DATA, units=[dict(TEST_DATA['units'][0], occupancy_rate=90.0)])
+
+    async def scenario():
+        await pdf_gen.warm_up()
+        busy = asyncio.ensure_future(executor.run(release.wait, 5))
+        superseded = asyncio.ensure_future(pdf_gen.generate_pdf_async(TEST_DATA))
+        while executor.pending < 2:
+            await asyncio.sleep(0.001)
+        superseded.cancel()
+        while executor.pending > 1:
+            await asyncio.sleep(0.001)
+        release.set()
+        await busy
+        return await pdf_gen.generate_pdf_async(newer)
+
+    try:
+        latest = asyncio.run(scenario())
+    finally:
+        pdf_gen.shutdown()
+
+    assert latest.getvalue().startswith(b'%PDF')
+    assert renders == [90.0] and executor.pending == 0
+    assert not pdf_gen._inflight and not pdf_gen._waiters
+
+
+def test_process_workers_render_only_the_resolved_template():
+    """Process workers render the bot's templates, and refuse ones they cannot load."""
+    pdf_gen = PDFGenerator(RenderExecutor('process', max_workers=1, max_queue=4, timeout=60),
+                           cache=ReportCache())
+    pdf_gen.register_template('custom', DefaultTemplate())
+
+    async def scenario():
+        default = await pdf_gen.generate_pdf_async(TEST_DATA)
+        try:
+            await pdf_gen.generate_pdf_async(dict(TEST_DATA, units=TEST_DATA['units'][:1]), 'custom')
+            raise AssertionError("Expected TemplateUnavailableError")
+        except TemplateUnavailableError:
+            pass
+        return default
+
+    try:
+        default = asyncio.run(scenario())
+    finally:
+        pdf_gen.shutdown()
+
+    assert default.getvalue().startswith(b'%PDF')
+    # Only the report rendered with the template it was requested with is cached
+    assert pdf_gen.cache.stats()['entries'] == 1
+
+
+if __name__ == '__main__':
+    test_generate_pdf_async()
+    test_backpressure_and_timeout()
+    test_identical_renders_are_coalesced()
+    test_superseded_queued_render_never_starts()
+    test_process_workers_render_only_the_resolved_template()
+    print("\nTest result: PASSED")
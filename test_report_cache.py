@@ -0,0 +1,56 @@
+import time
+from pdf_generator import PDFGenerator
+from report_cache import LRUCache, ReportCache
+
+TEST_DATA = {
+    'units': [
+        {'name': 'UTI HSJ', 'total_beds': 20, 'occupancy_rate': 100.00},
+        {'name': 'Geriatria', 'total_beds': 33, 'occupancy_rate': 87.87},
+    ],
+    'date': time.strftime('%d/%m/%Y'),
+}
+
+
+def test_repeat_report_hits_cache():
+    """Same parsed data and template return the stored bytes."""
+    pdf_gen = PDFGenerator()
+    first = pdf_gen.generate_pdf(TEST_DATA).getvalue()
+    # Key order must not matter
+    reordered = {'date': TEST_DATA['date'], 'units': list(TEST_DATA['units'])}
+    second = pdf_gen.generate_pdf(reordered).getvalue()
+
+    stats = pdf_gen.cache.stats()
+    print(f"Cache stats: {stats}")
+    assert first == second
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+
+def test_lru_limits_and_expiry():
+    """Entries are evicted by count, size and expiry time."""
+    cache = LRUCache(max_entries=2, max_bytes=10)
+    future = time.time() + 60
+    cache.put('a', b'1234', future)
+    cache.put('b', b'1234', future)
+    cache.get('a')
+    cache.put('c', b'1234', future)  # evicts 'b', least recently used
+    assert cache.get('b') is None and cache.get('a') == b'1234'
+
+    cache.put('d', b'12345678', future)  # size limit leaves only 'd'
+    assert len(cache) == 1 and cache.get('d') is not None
+
+    cache.put('e', b'1', time.time() - 1)
+    assert cache.get('e') is None
+
+
+def test_expiry_bounded_by_report_date():
+    """Reports from past days expire immediately."""
+    cache = ReportCache(ttl=3600)
+    assert cache.expiry_for({'date': '01/01/2020'}) < time.time()
+    assert cache.expiry_for({}) <= time.time() + 3600
+
+
+if __name__ == '__main__':
+    test_repeat_report_hits_cache()
+    test_lru_limits_and_expiry()
+    test_expiry_bounded_by_report_date()
+    print("\nTest result: PASSED")
@@ -0,0 +1,64 @@
+from hospital_parser import HospitalDataParser
+from pdf_generator import PDFGenerator
+from report_cache import ReportCache
+from report_model import CLINICAL, ICU, normalize_report
+
+DETAILED_MESSAGE = """🏥 Hospital de Urgência
+🟢 UTI HUERB 1 (17 leitos)
+Internados: 15
+Vagas: 1
+Leitos bloqueados: 1
+🟢 Clínica Médica
+Internados: 28
+Vagas: 2
+
+🏥 Hospital Santa Juliana
+🟢 UTI HSJ (20 leitos)
+Internados: 20"""
+
+
+def test_simple_format_totals():
+    """Simple bulletins get per-unit figures and per-kind totals."""
+    report = normalize_report({
+        'units': [
+            {'name': 'UTI HSJ', 'total_beds': 20, 'occupancy_rate': 100.00},
+            {'name': 'Geriatria', 'total_beds': 33, 'occupancy_rate': 87.87},
+        ],
+        'date': '01/02/2025',
+    })
+    assert not report.is_detailed and report.date == '01/02/2025'
+    geriatria = report.units[1]
+    assert (geriatria.occupied_beds, geriatria.available_beds) == (29, 4)
+    summary = report.summary
+    assert summary.icu.occupied_beds == 20 and summary.clinical.occupied_beds == 29
+    assert (summary.total.total_beds, summary.total.occupied_beds) == (53, 49)
+    # Capacities of simple bulletins are the known unit sizes
+    assert (summary.clinical_capacity, summary.icu_capacity) == (123, 84)
+    assert summary.available_clinical == 123 - 29
+
+
+def test_detailed_format_totals():
+    """Detailed bulletins keep their hospitals, each with its own totals."""
+    report = normalize_report(HospitalDataParser.parse_message(DETAILED_MESSAGE))
+    assert report.is_detailed
+    urgencia, santa_juliana = report.hospitals
+    assert [unit.name for unit in urgencia.units] == ['UTI HUERB 1', 'Clínica Médica']
+    assert (urgencia.totals.total_beds, urgencia.totals.occupied_beds, urgencia.totals.blocked_beds) == (47, 43, 1)
+    assert santa_juliana.totals.occupancy_rate == 100.0
+    assert (report.summary.icu_capacity, report.summary.clinical_capacity) == (37, 30)
+    assert len(report.units) == 3 and report.summary.total.occupied_beds == 63
+    assert [unit.kind for unit in report.units] == [ICU, CLINICAL, ICU]
+
+
+def test_detailed_format_renders():
+    """Detailed bulletins render end to end."""
+    data = HospitalDataParser.parse_message(DETAILED_MESSAGE)
+    pdf = PDFGenerator(cache=ReportCache(max_entries=0)).generate_pdf(data).getvalue()
+    assert pdf.startswith(b'%PDF')
+
+
+if __name__ == '__main__':
+    test_simple_format_totals()
+    test_detailed_format_totals()
+    test_detailed_format_renders()
+    print("\nTest result: PASSED")
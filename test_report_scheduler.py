@@ -0,0 +1,125 @@
+import asyncio
+import io
+import tempfile
+import os
+from telegram.error import Forbidden, NetworkError
+from report_scheduler import ReportScheduler
+from state_backend import SQLiteBackend
+from subscriptions import SubscriptionStore
+
+TEST_DATA = {
+    'units': [
+        {'name': 'UTI HSJ', 'total_beds': 20, 'occupancy_rate': 100.00},
+        {'name': 'Geriatria', 'total_beds': 33, 'occupancy_rate': 87.87},
+    ],
+    'date': '01/02/2025'
+}
+
+
+class _CountingGenerator:
+    def __init__(self):
+        self.renders = []
+
+    async def generate_pdf_async(self, data, template_name=None):
+        self.renders.append(template_name)
+        return io.BytesIO(f"%PDF {template_name}".encode())
+
+
+class _FakeSender:
+    """Records deliveries; chats can have blocked the bot or be unreachable."""
+
+    def __init__(self, blocked=(), failing=()):
+        self.sent = []
+        self.blocked = set(blocked)
+        self.failing = set(failing)
+
+    async def __call__(self, bot, chat_id, pdf_buffer):
+        if chat_id in self.blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        if chat_id in self.failing:
+            raise NetworkError("Timed out")
+        self.sent.append((chat_id, pdf_buffer.getvalue()))
+
+
+def _scheduler(tmpdir, sender, generator):
+    subscriptions = SubscriptionStore(SQLiteBackend(os.path.join(tmpdir, 'state.sqlite3')))
+    return ReportScheduler(generator, subscriptions, sender, delay=0, publishers={100}), subscriptions
+
+
+def test_fan_out_renders_once_per_template():
+    """Each template is rendered once and every subscriber gets the report once per day."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        generator, sender = _CountingGenerator(), _FakeSender()
+        scheduler, subscriptions = _scheduler(tmpdir, sender, generator)
+        for chat_id in (1, 2, 3):
+            subscriptions.subscribe(chat_id)
+        subscriptions.subscribe(4, 'modern')
+        context = type('Context', (), {'bot': object(), 'job_queue': None})()
+
+        async def scenario():
+            # Only publishers' bulletins are broadcast, and only those with units
+            assert not scheduler.bulletin_ingested(TEST_DATA, context, 200, delivered_chat=2)
+            assert not scheduler.bulletin_ingested({'hospitals': [{'name': 'obrigado', 'units': []}]},
+                                                   context, 100)
+            assert scheduler._task is None
+            # Chat 1 sent the bulletin and already got the default report
+            assert scheduler.bulletin_ingested(TEST_DATA, context, 100, delivered_chat=1)
+            await scheduler._task
+            return await scheduler.fan_out(context.bot)
+
+        second = asyncio.run(scenario())
+
+        assert sorted(generator.renders, key=str) == [None, 'modern']
+        assert sorted(chat_id for chat_id, _ in sender.sent) == [2, 3, 4]
+        assert dict(sender.sent)[4] == b'%PDF modern'
+        assert second == {'sent': 0, 'failed': 0, 'renders': 0}
+        # Deliveries are visible to other processes and survive a restart
+        restarted = SubscriptionStore(SQLiteBackend(subscriptions.backend.path))
+        assert restarted.pending(ReportScheduler.bulletin_digest(TEST_DATA)) == {}
+        restarted.backend.close()
+        subscriptions.backend.close()
+        print(f"Fanned out to {len(sender.sent)} chats with {len(generator.renders)} renders")
+
+
+def test_fan_out_failed_and_blocked_chats():
+    """Failed chats stay pending and chats that blocked the bot are unsubscribed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        sender = _FakeSender(blocked=[2], failing=[3])
+        scheduler, subscriptions = _scheduler(tmpdir, sender, _CountingGenerator())
+        for chat_id in (1, 2, 3):
+            subscriptions.subscribe(chat_id)
+        scheduler._latest = TEST_DATA
+
+        stats = asyncio.run(scheduler.fan_out(object()))
+
+        assert stats == {'sent': 1, 'failed': 2, 'renders': 1}
+        assert [chat_id for chat_id, _ in sender.sent] == [1]
+        assert 2 not in subscriptions and len(subscriptions) == 2
+        assert subscriptions.pending(ReportScheduler.bulletin_digest(TEST_DATA)) == {None: [3]}
+        subscriptions.backend.close()
+
+
+def test_corrected_bulletin_is_delivered_again():
+    """A bulletin with new content on the same day reaches chats that got the earlier one."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        sender = _FakeSender()
+        scheduler, subscriptions = _scheduler(tmpdir, sender, _CountingGenerator())
+        subscriptions.subscribe(1)
+        corrected = dict(TEST_DATA, units=[dict(TEST_DATA['units'][0], occupancy_rate=95.0)])
+
+        async def scenario():
+            stats = []
+            for data in (TEST_DATA, TEST_DATA, corrected):
+                scheduler._latest = data
+                stats.append((await scheduler.fan_out(object()))['sent'])
+            return stats
+
+        assert asyncio.run(scenario()) == [1, 0, 1]
+        subscriptions.backend.close()
+
+
+if __name__ == '__main__':
+    test_fan_out_renders_once_per_template()
+    test_fan_out_failed_and_blocked_chats()
+    test_corrected_bulletin_is_delivered_again()
+    print("\nTest result: PASSED")
@@ -0,0 +1,33 @@
+import os
+import tempfile
+from report_store import ReportStore
+
+
+def test_reports_survive_restart_and_deduplicate():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'reports.sqlite3')
+        store = ReportStore(path, memory_entries=1)
+        store.put('1', b'%PDF same report')
+        store.put('2', b'%PDF same report')
+        store.put('3', b'%PDF other report')
+        assert store.blob_count() == 2
+        store.close()
+
+        # A new process sees the same reports
+        store = ReportStore(path)
+        assert store.get('1') == b'%PDF same report'
+        assert '2' in store and '4' not in store
+        assert store.get('4') is None
+
+        # Replacing and deleting drop blobs nobody references
+        store.put('3', b'%PDF newer report')
+        store.delete('1')
+        store.delete('2')
+        assert store.blob_count() == 1
+        assert store.get('3') == b'%PDF newer report'
+        store.close()
+
+
+if __name__ == '__main__':
+    test_reports_survive_restart_and_deduplicate()
+    print("\nTest result: PASSED")
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_CHILD = """
+import sys
+import bot
+hospital_bot = bot.HospitalBot()
+bot.build_application(hospital_bot, token='123456:fake', api_url=None)
+print(sorted(name for name in ('reportlab', 'sendgrid', 'templates.template_manager') if name in sys.modules))
+hospital_bot.pdf_generator.generate_pdf({'units': [{'name': 'UTI', 'total_beds': 10, 'occupancy_rate': 50.0}]})
+print('reportlab' in sys.modules)
+hospital_bot.user_reports.close()
+hospital_bot.history.close()
+hospital_bot.state.close()
+"""
+
+
+def test_bot_starts_without_renderer_or_email_backends():
+    """Starting the bot loads neither reportlab nor sendgrid, and needs no email credentials."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(os.environ, DATA_DIR=data_dir)
+        env.pop('SENDGRID_API_KEY', None)
+        result = subprocess.run([sys.executable, '-c', _CHILD], cwd=ROOT, env=env,
+                                capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split('\n')[:2] == ['[]', 'True']
+
+
+if __name__ == '__main__':
+    test_bot_starts_without_renderer_or_email_backends()
+    print("\nTest result: PASSED")
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import time
+from report_store import BackendReportStore
+from state_backend import SharedDict, SQLiteBackend
+
+
+def test_sqlite_backend_is_shared_between_connections():
+    """Two backends on one file, like two bot processes, see each other's writes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'state.sqlite3')
+        first, second = SQLiteBackend(path), SQLiteBackend(path)
+        try:
+            first.set('a', b'1')
+            first.set('short', b'2', ttl=0.05)
+            assert second.get('a') == b'1' and second.get('short') == b'2'
+            time.sleep(0.1)
+            assert second.get('short') is None
+            second.delete('a')
+            assert first.get('a') is None
+
+            templates_a = SharedDict(first, 'user_templates')
+            templates_b = SharedDict(second, 'user_templates')
+            templates_a['42'] = 'trend'
+            assert templates_b.get('42') == 'trend' and len(templates_b) == 1
+            del templates_b['42']
+            assert '42' not in templates_a
+            assert not second.hdel('user_templates', '42')
+        finally:
+            first.close()
+            second.close()
+
+
+def test_backend_report_store():
+    """Reports kept in the backend are deduplicated by content and shared."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'state.sqlite3')
+        backend = SQLiteBackend(path)
+        other = SQLiteBackend(path)
+        try:
+            store = BackendReportStore(backend)
+            first = store.put('1', b'%PDF same report')
+            assert store.put('2', b'%PDF same report') == first
+
+            # Another process, without the in-memory copy, reads it from the backend
+            remote = BackendReportStore(other)
+            assert remote.get('2') == b'%PDF same report'
+            assert '1' in remote and '3' not in remote
+            remote.delete('1')
+            assert store.get('1') is None
+        finally:
+            backend.close()
+            other.close()
+
+
+if __name__ == '__main__':
+    test_sqlite_backend_is_shared_between_connections()
+    test_backend_report_store()
+    print("\nTest result: PASSED")
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from telegram.error import RetryAfter
+from telegram_dispatcher import BROADCAST, INTERACTIVE, TelegramDispatcher
+
+
+class _FakeStatusMessage:
+    chat_id = 1
+    message_id = 10
+
+    def __init__(self):
+        self.edits = []
+        self.deleted = False
+
+    async def edit_text(self, text):
+        self.edits.append(text)
+        return self
+
+    async def delete(self):
+        self.deleted = True
+        return True
+
+
+def test_rate_limits_and_priorities():
+    """Calls are paced per chat and globally, urgent calls first."""
+    dispatcher = TelegramDispatcher(global_rate=50, chat_rate=10, chat_burst=1)
+    calls = []
+
+    def call(label):
+        async def run():
+            calls.append((label, time.monotonic()))
+            return label
+        return run
+
+    async def scenario():
+        broadcast = [dispatcher.send(100 + n, call(f"broadcast {n}"), BROADCAST) for n in range(3)]
+        same_chat = [dispatcher.send(1, call(f"chat {n}"), INTERACTIVE) for n in range(3)]
+        try:
+            return await asyncio.gather(*broadcast, *same_chat)
+        finally:
+            await dispatcher.close()
+
+    started = time.monotonic()
+    results = asyncio.run(scenario())
+    assert results[3:] == ['chat 0', 'chat 1', 'chat 2']
+    order = [label for label, _ in calls]
+    # The interactive chat goes first; its later calls wait for tokens
+    # while the broadcasts to other chats proceed
+    assert order[0] == 'chat 0'
+    assert order.index('broadcast 0') < order.index('chat 1')
+    chat_times = [at for label, at in calls if label.startswith('chat')]
+    assert chat_times[2] - chat_times[0] >= 0.18
+    print(f"Dispatched {len(calls)} calls in {time.monotonic() - started:.2f}s")
+
+
+def test_retry_after_pauses_and_retries():
+    """A RetryAfter answer pauses the queue and the call is retried."""
+    dispatcher = TelegramDispatcher(max_attempts=3)
+    attempts = []
+
+    async def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise RetryAfter(0)
+        return 'sent'
+
+    async def always_limited():
+        raise RetryAfter(0)
+
+    async def scenario():
+        try:
+            assert await dispatcher.send(1, flaky) == 'sent'
+            try:
+                await dispatcher.send(2, always_limited)
+                raise AssertionError("Expected RetryAfter")
+            except RetryAfter:
+                pass
+        finally:
+            await dispatcher.close()
+
+    asyncio.run(scenario())
+    assert len(attempts) == 2
+
+
+def test_status_edits_are_coalesced():
+    """Only the latest pending edit of a status message is sent, and none after delete."""
+    # One call per chat every 50 ms, so the second edit waits in the queue
+    dispatcher = TelegramDispatcher(chat_rate=20, chat_burst=1)
+    message = _FakeStatusMessage()
+
+    async def scenario():
+        try:
+            await asyncio.gather(*(dispatcher.edit_status(message, f"Etapa {n}") for n in range(5)))
+            pending = asyncio.ensure_future(dispatcher.edit_status(message, "Nunca enviado"))
+            await asyncio.sleep(0)
+            await dispatcher.delete_status(message)
+            assert await pending is None
+        finally:
+            await dispatcher.close()
+
+    asyncio.run(scenario())
+    assert message.edits == ["Etapa 4"]
+    assert message.deleted
+
+
+if __name__ == '__main__':
+    test_rate_limits_and_priorities()
+    test_retry_after_pauses_and_retries()
+    test_status_edits_are_coalesced()
+    print("\nTest result: PASSED")
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from config import TEMPLATES
+from pdf_generator import PDFGenerator
+from render_executor import RenderExecutor
+from report_cache import ReportCache
+from templates.default_template import DefaultTemplate
+from templates.styles import style_registry
+from templates.template_manager import TemplateManager
+from templates.trend_template import TrendTemplate
+from timeseries_store import TimeSeriesStore
+
+RENDERS = 2000
+
+
+class _Recording:
+    """Records which template rendered which bulletin."""
+
+    def generate_pdf(self, data):
+        with self.lock:
+            self.rendered[data['units'][0]['name']] = self.label
+        return super().generate_pdf(data)
+
+
+class _RecordingDefault(_Recording, DefaultTemplate):
+    """Default template that records its renders."""
+
+
+class _RecordingTrend(_Recording, TrendTemplate):
+    """Trend template that records its renders."""
+
+
+def _template(cls, label, rendered, lock, **kwargs):
+    template = cls(**kwargs)
+    template.label, template.rendered, template.lock = label, rendered, lock
+    return template
+
+
+def test_templates_resolve_per_request():
+    """Registering or choosing a template never changes what other renders get."""
+    manager = TemplateManager()
+    default = manager.get_template()
+    assert manager.get_template('trend') is not default
+    assert manager.get_template('missing') is default and 'missing' not in manager
+
+    before = manager.templates
+    manager.register_template('other', DefaultTemplate())
+    assert 'other' in manager and 'other' not in before
+    assert manager.get_template(None) is default and manager.get_template('default') is default
+
+
+def test_concurrent_renders_with_mixed_templates():
+    """Thousands of concurrent renders each use their own user's template."""
+    rendered, lock = {}, threading.Lock()
+    with tempfile.TemporaryDirectory() as tmp:
+        history = TimeSeriesStore(os.path.join(tmp, 'occupancy.sqlite3'))
+        pdf_gen = PDFGenerator(RenderExecutor(max_workers=8, max_queue=RENDERS, timeout=None),
+                               cache=ReportCache(max_entries=0))
+        pdf_gen.register_template('default', _template(_RecordingDefault, 'default', rendered, lock))
+        pdf_gen.register_template('trend', _template(_RecordingTrend, 'trend', rendered, lock,
+                                                     history=history))
+        # Users without a choice get the default; the rest alternate between templates
+        user_templates = {user: (None, 'default', 'trend')[user % 3] for user in range(RENDERS)}
+
+        async def render(user):
+            data = {'units': [{'name': f'Unidade {user}', 'total_beds': 10 + user % 7,
+                               'occupancy_rate': float(user % 101)}]}
+            if user % 100 == 0:
+                # Registering templates meanwhile must not disturb renders in flight
+                pdf_gen.register_template(f'extra-{user}', DefaultTemplate())
+            return await pdf_gen.generate_pdf_async(data, user_templates[user])
+
+        async def scenario():
+            return await asyncio.gather(*(render(user) for user in range(RENDERS)))
+
+        try:
+            buffers = asyncio.run(scenario())
+        finally:
+            pdf_gen.shutdown()
+            history.close()
+
+    assert all(buffer.getvalue().startswith(b'%PDF') for buffer in buffers)
+    assert len(rendered) == RENDERS
+    for user, template_name in user_templates.items():
+        assert rendered[f'Unidade {user}'] == (template_name or 'default'), user
+    print(f"Rendered {RENDERS} reports with mixed templates")
+
+
+_PLUGIN = """
+from templates.default_template import DefaultTemplate
+from templates.styles import style_registry
+
+
+class WideTemplate(DefaultTemplate):
+    \"\"\"{doc}\"\"\"
+
+    name = 'wide'
+"""
+
+
+def _write_plugin(path, source, mtime):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(source)
+    os.utime(path, (mtime, mtime))
+
+
+def test_plugins_are_discovered_and_hot_reloaded():
+    """Template modules in the plugin directory are loaded once and again only when they change."""
+    data = {'units': [{'name': 'UTI HSJ', 'total_beds': 20, 'occupancy_rate': 100.0}]}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'wide_template.py')
+        _write_plugin(path, _PLUGIN.format(doc='Wide layout.'), 1_700_000_000)
+        manager = TemplateManager(dict(TEMPLATES, directory=tmp, reload_interval=0))
+        manager.register_template('custom', DefaultTemplate())
+        wide = manager.get_template('wide')
+        assert manager.list_templates()['wide'] == 'Wide layout.'
+        assert {'default', 'trend', 'wide', 'custom'} <= set(manager.templates)
+        key = ReportCache.make_key(data, wide)
+        styles = len(style_registry)
+
+        # Touched but unchanged: same instance
+        os.utime(path, (1_700_000_100, 1_700_000_100))
+        assert not manager.reload() and manager.get_template('wide') is wide
+
+        _write_plugin(path, _PLUGIN.format(doc='Wider layout.'), 1_700_000_200)
+        assert manager.reload()
+        reloaded = manager.get_template('wide')
+        assert reloaded is not wide and reloaded.__doc__ == 'Wider layout.'
+        assert ReportCache.make_key(data, reloaded) != key
+        assert reloaded.generate_pdf(data).getvalue().startswith(b'%PDF')
+        # The new revision's styles replace the old ones instead of adding to them
+        assert len(style_registry) == styles and wide.styles is not reloaded.styles
+        assert 'custom' in manager
+
+        # A broken edit keeps the last working version
+        _write_plugin(path, 'class Broken(:\n', 1_700_000_300)
+        assert manager.reload() and manager.get_template('wide') is reloaded
+
+        os.remove(path)
+        assert manager.reload() and 'wide' not in manager
+        assert manager.get_template('wide') is manager.get_template()
+
+
+def test_first_async_render_loads_templates_off_the_loop():
+    """A render requested before the warm-up finished loads the templates in a worker thread."""
+    loaded_in = []
+    load = TemplateManager.__init__
+
+    def recording_init(self, *args, **kwargs):
+        loaded_in.append(threading.current_thread())
+        load(self, *args, **kwargs)
+
+    pdf_gen = PDFGenerator(RenderExecutor(max_workers=1, max_queue=1, timeout=None),
+                           cache=ReportCache(max_entries=0))
+    data = {'units': [{'name': 'UTI HSJ', 'total_beds': 20, 'occupancy_rate': 100.0}]}
+
+    async def scenario():
+        return threading.current_thread(), await pdf_gen.generate_pdf_async(data)
+
+    TemplateManager.__init__ = recording_init
+    try:
+        loop_thread, buffer = asyncio.run(scenario())
+    finally:
+        TemplateManager.__init__ = load
+        pdf_gen.shutdown()
+    assert buffer.getvalue().startswith(b'%PDF')
+    assert len(loaded_in) == 1 and loaded_in[0] is not loop_thread
+
+
+def test_plugins_reload_in_background():
+    """Changed modules are picked up by the watcher thread; lookups only read the snapshot."""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TemplateManager(dict(TEMPLATES, directory=tmp, reload_interval=0.05))
+        try:
+            scans = []
+            scan = manager._scan
+            manager._scan = lambda: scans.append(threading.current_thread()) or scan()
+            _write_plugin(os.path.join(tmp, 'wide_template.py'), _PLUGIN.format(doc='Wide layout.'),
+                          1_700_000_000)
+            deadline = time.monotonic() + 5
+            while 'wide' not in manager and time.monotonic() < deadline:
+                manager.get_template('wide')
+                time.sleep(0.01)
+            assert 'wide' in manager
+            assert scans and threading.current_thread() not in scans
+        finally:
+            manager.close()
+        assert manager._watcher is None
+
+
+if __name__ == '__main__':
+    test_templates_resolve_per_request()
+    test_concurrent_renders_with_mixed_templates()
+    test_plugins_are_discovered_and_hot_reloaded()
+    test_first_async_render_loads_templates_off_the_loop()
+    test_plugins_reload_in_background()
+    print("\nTest result: PASSED")
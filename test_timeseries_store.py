@@ -0,0 +1,79 @@
+import os
+import tempfile
+from datetime import date, timedelta
+from hospital_parser import HospitalDataParser
+from timeseries_store import TimeSeriesStore
+
+
+def _bulletin(uti_hsj_rate):
+    return {
+        'units': [
+            {'name': 'UTI HSJ', 'total_beds': 20, 'occupancy_rate': uti_hsj_rate},
+            {'name': 'Geriatria', 'total_beds': 33, 'occupancy_rate': 87.87},
+        ]
+    }
+
+
+def test_range_queries_over_ingested_days():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'occupancy.sqlite3')
+        store = TimeSeriesStore(path)
+        today = date(2025, 3, 31)
+        for offset in range(120):
+            store.ingest(_bulletin(offset % 11 * 10), day=today - timedelta(days=offset))
+        # A later bulletin for the same day replaces the earlier one
+        store.ingest(_bulletin(100.0), day=today)
+        store.close()
+
+        store = TimeSeriesStore(path)
+        points = store.last_days('UTI HSJ', 90, today=today)
+        assert len(points) == 90
+        assert points[0].day == today - timedelta(days=89) and points[-1].day == today
+        assert points[-1].occupied_beds == 20 and points[-1].occupancy_rate == 100.0
+        assert store.series('Geriatria', date(2025, 3, 1), date(2025, 3, 3))[0].occupied_beds == 29
+        assert store.series('UTI HSJ', date(2020, 1, 1), date(2020, 12, 31)) == []
+        assert set(store.day(today)) == {('', 'UTI HSJ'), ('', 'Geriatria')}
+        store.close()
+
+
+def test_detailed_bulletins_keep_hospitals_apart():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TimeSeriesStore(os.path.join(tmp, 'occupancy.sqlite3'))
+        data = HospitalDataParser.parse_message(
+            "🏥 Hospital A\n🟢 UTI HSJ (20 leitos)\nInternados: 18\n"
+            "🏥 Hospital B\n🟢 UTI HSJ (10 leitos)\nInternados: 4"
+        )
+        assert store.ingest(data, day=date(2025, 1, 1)) == 2
+        assert store.units() == [('Hospital A', 'UTI HSJ'), ('Hospital B', 'UTI HSJ')]
+        point, = store.series('UTI HSJ', date(2025, 1, 1), date(2025, 1, 1), hospital='Hospital B')
+        assert (point.total_beds, point.occupied_beds) == (10, 4)
+        store.close()
+
+
+def test_repeated_bulletin_keeps_revision():
+    """Ingesting the same bulletin again changes nothing, so cached trend reports stay valid."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TimeSeriesStore(os.path.join(tmp, 'occupancy.sqlite3'))
+        day = date(2025, 1, 1)
+        assert store.ingest(_bulletin(50.0), day=day) == 2
+        revision = store.revision
+        assert store.ingest(_bulletin(50.0), day=day) == 0
+        assert store.ingest(_bulletin(50.0), day=day) == 0
+        assert store.revision == revision
+        assert store.ingest(_bulletin(60.0), day=day) == 1
+        assert store.revision == revision + 1
+
+        # The cached revision follows writes made by another process
+        other = TimeSeriesStore(store.path)
+        assert other.revision == revision + 1
+        assert other.ingest(_bulletin(70.0), day=day) == 1
+        assert store.revision == revision + 2
+        other.close()
+        store.close()
+
+
+if __name__ == '__main__':
+    test_range_queries_over_ingested_days()
+    test_detailed_bulletins_keep_hospitals_apart()
+    test_repeated_bulletin_keeps_revision()
+    print("\nTest result: PASSED")
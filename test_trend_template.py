@@ -0,0 +1,102 @@
+import asyncio
+import os
+import tempfile
+import threading
+from datetime import date, timedelta
+from pdf_generator import PDFGenerator
+from report_cache import ReportCache
+from templates.trend_template import TrendTemplate
+from timeseries_store import DAY, TOTAL, WEEK, TimeSeriesStore
+
+
+def _bulletin(uti_rate, geriatria_rate, day=None):
+    data = {
+        'units': [
+            {'name': 'UTI HSJ', 'total_beds': 20, 'occupancy_rate': uti_rate},
+            {'name': 'Geriatria', 'total_beds': 10, 'occupancy_rate': geriatria_rate},
+        ]
+    }
+    if day:
+        data['date'] = day.strftime('%d/%m/%Y')
+    return data
+
+
+def test_rollups_follow_ingested_bulletins():
+    """Daily and weekly rollups are kept up to date, including same-day corrections."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'occupancy.sqlite3')
+        store = TimeSeriesStore(path)
+        monday = date(2025, 3, 3)
+        store.ingest(_bulletin(50, 100), day=monday)
+        store.ingest(_bulletin(100, 100), day=monday + timedelta(days=1))
+        store.ingest(_bulletin(100, 0), day=monday + timedelta(days=1))  # correction
+
+        daily = store.rollups(DAY, monday, monday + timedelta(days=6))
+        assert [rollup.occupied_beds for rollup in daily['icu']] == [10, 20]
+        assert [rollup.occupied_beds for rollup in daily['clinical']] == [10, 0]
+        week, = store.rollups(WEEK, monday, monday)[TOTAL]
+        assert (week.total_beds, week.occupied_beds, week.days) == (60, 40, 2)
+        assert store.revision == 3
+        store._db.execute("DELETE FROM rollups")
+        store.close()
+
+        # History recorded without rollups gets them on open
+        store = TimeSeriesStore(path)
+        assert store.rollups(WEEK, monday, monday)[TOTAL][0].occupied_beds == 40
+        store.close()
+
+
+def test_trend_report_renders_and_invalidates_cache():
+    """Trend reports render from the history and are re-rendered when it changes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TimeSeriesStore(os.path.join(tmp, 'occupancy.sqlite3'))
+        generator = PDFGenerator(cache=ReportCache())
+        generator.register_template('trend_test', TrendTemplate(store))
+        today = date.today()
+
+        data = _bulletin(80, 50, today)
+        assert generator.generate_pdf(data, 'trend_test').getvalue().startswith(b'%PDF')  # no history yet
+        for offset in range(20):
+            store.ingest(_bulletin(offset * 5, 50), day=today - timedelta(days=offset))
+        generator.generate_pdf(data, 'trend_test')
+        generator.generate_pdf(data, 'trend_test')
+        stats = generator.cache.stats()
+        assert (stats['misses'], stats['hits']) == (2, 1)
+        store.close()
+
+
+class _RecordingTrend(TrendTemplate):
+    """Records the threads its cache token is computed in."""
+
+    def cache_token(self, data):
+        self.token_threads.append(threading.current_thread())
+        return super().cache_token(data)
+
+
+def test_trend_cache_key_is_computed_off_the_loop():
+    """The history revision behind trend cache keys is never queried on the event loop."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TimeSeriesStore(os.path.join(tmp, 'occupancy.sqlite3'))
+        template = _RecordingTrend(store)
+        template.token_threads = []
+        generator = PDFGenerator(cache=ReportCache(), history=store)
+        generator.register_template('trend_test', template)
+        assert generator.template_manager.get_template('trend').history is store
+
+        async def scenario():
+            await generator.generate_pdf_async(_bulletin(80, 50, date.today()), 'trend_test')
+            return threading.current_thread()
+
+        try:
+            loop_thread = asyncio.run(scenario())
+        finally:
+            generator.shutdown()
+            store.close()
+        assert template.token_threads and loop_thread not in template.token_threads
+
+
+if __name__ == '__main__':
+    test_rollups_follow_ingested_bulletins()
+    test_trend_report_renders_and_invalidates_cache()
+    test_trend_cache_key_is_computed_off_the_loop()
+    print("\nTest result: PASSED")
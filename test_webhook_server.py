@@ -0,0 +1,166 @@
+import asyncio
+import json
+import webhook_server
+from shard_router import ShardRouter, update_chat_id
+from webhook_server import WebhookServer
+
+UPDATE = {
+    'update_id': 1,
+    'message': {
+        'message_id': 7,
+        'date': 1738368000,
+        'chat': {'id': 42, 'type': 'private'},
+        'text': 'UTI HSJ (20 leitos) - 100,00%',
+    },
+}
+
+
+class _FakeApplication:
+    bot = None
+
+    def __init__(self):
+        self.update_queue = asyncio.Queue()
+
+
+async def _request(port, method, path, body=b'', headers=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(body)}",
+             "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+def test_webhook_queues_updates():
+    """Valid updates reach the update queue; bad requests are rejected."""
+    application = _FakeApplication()
+    server = WebhookServer(application, '/telegram', secret_token='s3cret', host='127.0.0.1', port=0)
+    body = json.dumps(UPDATE).encode()
+    secret = {'X-Telegram-Bot-Api-Secret-Token': 's3cret'}
+
+    async def scenario():
+        await server.start()
+        try:
+            return [
+                await _request(server.port, 'POST', '/telegram', body, secret),
+                await _request(server.port, 'POST', '/telegram', body, {'X-Telegram-Bot-Api-Secret-Token': 'x'}),
+                await _request(server.port, 'POST', '/telegram', b'not json', secret),
+                await _request(server.port, 'GET', '/telegram'),
+                await _request(server.port, 'POST', '/other', body, secret),
+                await _request(server.port, 'GET', '/healthz'),
+            ]
+        finally:
+            await server.stop()
+
+    statuses = asyncio.run(scenario())
+    assert statuses == [200, 403, 400, 405, 404, 200]
+    assert application.update_queue.qsize() == 1 and server.received == 1
+    update = application.update_queue.get_nowait()
+    assert update.message.chat.id == 42 and update.message.text.startswith('UTI HSJ')
+
+
+def test_webhook_keep_alive():
+    """Several updates are accepted on one connection."""
+    application = _FakeApplication()
+    server = WebhookServer(application, '/telegram', host='127.0.0.1', port=0)
+
+    async def scenario():
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            for update_id in range(1, 4):
+                body = json.dumps(dict(UPDATE, update_id=update_id)).encode()
+                writer.write(f"POST /telegram HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+                await writer.drain()
+                assert (await reader.readline()).startswith(b'HTTP/1.1 200')
+                while await reader.readline() != b'\r\n':
+                    pass
+                await reader.readexactly(2)
+            writer.close()
+        finally:
+            await server.stop()
+
+    asyncio.run(scenario())
+    assert [application.update_queue.get_nowait().update_id for _ in range(3)] == [1, 2, 3]
+
+
+def test_slow_and_oversized_requests_are_dropped():
+    """A request that is not received in time, or has too many headers, closes the connection."""
+    server = WebhookServer(_FakeApplication(), '/telegram', host='127.0.0.1', port=0)
+    timeout = webhook_server.REQUEST_TIMEOUT
+    webhook_server.REQUEST_TIMEOUT = 0.2
+
+    async def scenario():
+        await server.start()
+        try:
+            # Request line sent, headers trickling in and never finished
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            writer.write(b"POST /telegram HTTP/1.1\r\nContent-Length: 10\r\n")
+            await writer.drain()
+            slow = await asyncio.wait_for(reader.read(), 2)
+            writer.close()
+
+            many = {f'X-Header-{i}': 'x' for i in range(webhook_server.MAX_HEADERS + 1)}
+            return slow, await _request(server.port, 'GET', '/healthz', headers=many)
+        finally:
+            await server.stop()
+
+    try:
+        slow, status = asyncio.run(scenario())
+    finally:
+        webhook_server.REQUEST_TIMEOUT = timeout
+    assert slow == b'' and status == 431
+
+
+def test_router_shards_updates_by_chat():
+    """Each chat's updates reach the same worker; unreachable workers get a 503."""
+    applications = [_FakeApplication(), _FakeApplication()]
+    workers = [WebhookServer(app, '/telegram', secret_token='s3cret', host='127.0.0.1', port=0)
+               for app in applications]
+    secret = {'X-Telegram-Bot-Api-Secret-Token': 's3cret'}
+
+    def update(update_id, chat_id):
+        message = dict(UPDATE['message'], chat={'id': chat_id, 'type': 'private'})
+        return json.dumps({'update_id': update_id, 'message': message}).encode()
+
+    async def scenario():
+        for worker in workers:
+            await worker.start()
+        urls = [f"http://127.0.0.1:{worker.port}/telegram" for worker in workers]
+        router = ShardRouter(urls, '/telegram', secret_token='s3cret', host='127.0.0.1', port=0)
+        await router.start()
+        try:
+            statuses = [await _request(router.port, 'POST', '/telegram', update(i, chat_id), secret)
+                        for i, chat_id in enumerate([10, 11, 12, 10, -5])]
+        finally:
+            await router.stop()
+            await asyncio.sleep(0.01)  # let workers see the router's connections close
+            for worker in workers:
+                await worker.stop()
+
+        # Nothing listens on a stopped worker's port any more
+        router = ShardRouter([urls[0]], '/telegram', secret_token='s3cret', host='127.0.0.1', port=0)
+        await router.start()
+        try:
+            statuses.append(await _request(router.port, 'POST', '/telegram', update(9, 11), secret))
+        finally:
+            await router.stop()
+        return statuses
+
+    assert asyncio.run(scenario()) == [200] * 5 + [503]
+    chats = [[app.update_queue.get_nowait().message.chat.id for _ in range(app.update_queue.qsize())]
+             for app in applications]
+    assert chats == [[10, 12, 10], [11, -5]]
+    assert update_chat_id({'update_id': 1, 'callback_query': {'from': {'id': 7}, 'message': {'chat': {'id': 8}}}}) == 8
+    assert update_chat_id({'update_id': 1, 'inline_query': {'from': {'id': 7}}}) == 7
+
+
+if __name__ == '__main__':
+    test_webhook_queues_updates()
+    test_webhook_keep_alive()
+    test_slow_and_oversized_requests_are_dropped()
+    test_router_shards_updates_by_chat()
+    print("\nTest result: PASSED")
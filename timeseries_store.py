@@ -0,0 +1,298 @@
+"""Historical occupancy per unit and day, kept for trend reports."""
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from report_model import CLINICAL, ICU, OccupancyReport, normalize_report, unit_kind
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    hospital TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    UNIQUE (hospital, unit)
+);
+CREATE TABLE IF NOT EXISTS points (
+    series_id INTEGER NOT NULL REFERENCES series(id),
+    day INTEGER NOT NULL,
+    total_beds INTEGER NOT NULL,
+    occupied_beds INTEGER NOT NULL,
+    available_beds INTEGER NOT NULL,
+    blocked_beds INTEGER NOT NULL,
+    PRIMARY KEY (series_id, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS points_day ON points(day);
+CREATE TABLE IF NOT EXISTS rollups (
+    period TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    total_beds INTEGER NOT NULL,
+    occupied_beds INTEGER NOT NULL,
+    days INTEGER NOT NULL,
+    PRIMARY KEY (period, start, kind)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+DAY = 'day'
+WEEK = 'week'
+TOTAL = 'total'
+ROLLUP_KINDS = (CLINICAL, ICU, TOTAL)
+
+
+class OccupancyPoint(NamedTuple):
+    """Occupancy of one unit on one day."""
+
+    day: date
+    total_beds: int
+    occupied_beds: int
+    available_beds: int
+    blocked_beds: int
+
+    @property
+    def occupancy_rate(self) -> float:
+        return self.occupied_beds / self.total_beds * 100 if self.total_beds else 0.0
+
+
+class Rollup(NamedTuple):
+    """Beds summed over the units of one category and the days of one period."""
+
+    start: date
+    total_beds: int
+    occupied_beds: int
+    days: int
+
+    @property
+    def occupancy_rate(self) -> float:
+        return self.occupied_beds / self.total_beds * 100 if self.total_beds else 0.0
+
+
+def week_start(day: date) -> date:
+    """Monday of the week containing ``day``."""
+    return day - timedelta(days=day.weekday())
+
+
+def report_day(report: OccupancyReport) -> date:
+    """Day a report refers to: its bulletin date, or today when it has none."""
+    if report.date:
+        try:
+            return datetime.strptime(report.date, '%d/%m/%Y').date()
+        except ValueError:
+            pass
+    return date.today()
+
+
+class TimeSeriesStore:
+    """
+    Daily occupancy per (hospital, unit) in SQLite.
+
+    Each unit gets a small integer series id; points are clustered by
+    (series, day) in a WITHOUT ROWID table, so a unit's history is one
+    contiguous range scan. Days are stored as ordinals. Ingesting a report
+    for a day that already has data replaces it, so the last bulletin of a
+    day wins and re-sending a message is harmless. Units of simple
+    bulletins are stored with an empty hospital name.
+
+    Daily and weekly rollups per category (clinical, ICU and total) are
+    updated as bulletins are ingested, so trend charts read a handful of
+    rows instead of aggregating the history on every render.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._series_ids: Dict[Tuple[str, str], int] = {}
+        self._revision: Optional[int] = None  # cached until this or another connection writes
+        self._data_version: Optional[int] = None
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._backfill_rollups()
+
+    def _series_id(self, hospital: str, unit: str) -> int:
+        key = (hospital, unit)
+        series_id = self._series_ids.get(key)
+        if series_id is None:
+            self._db.execute("INSERT OR IGNORE INTO series (hospital, unit) VALUES (?, ?)", key)
+            series_id = self._db.execute(
+                "SELECT id FROM series WHERE hospital = ? AND unit = ?", key
+            ).fetchone()[0]
+            self._series_ids[key] = series_id
+        return series_id
+
+    def ingest(self, data: Union[Dict, OccupancyReport], day: Optional[date] = None) -> int:
+        """
+        Append a parsed bulletin to the history.
+
+        Args:
+            data: Parser output or a normalized report
+            day: Day the bulletin refers to; defaults to its date, or today
+
+        Returns:
+            Number of unit points added or changed; 0 when the bulletin
+            repeats what is already stored
+        """
+        report = normalize_report(data)
+        ordinal = (day or report_day(report)).toordinal()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = [
+                    (self._series_id(unit.hospital or '', unit.name), ordinal, unit.total_beds,
+                     unit.occupied_beds, unit.available_beds, unit.blocked_beds)
+                    for unit in report.units
+                ]
+                before = self._db.total_changes
+                # Rows equal to the stored ones are left alone, so a repeated
+                # bulletin changes neither the rollups nor the revision
+                self._db.executemany(
+                    "INSERT INTO points (series_id, day, total_beds, occupied_beds, "
+                    "available_beds, blocked_beds) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (series_id, day) DO UPDATE SET "
+                    "total_beds = excluded.total_beds, occupied_beds = excluded.occupied_beds, "
+                    "available_beds = excluded.available_beds, blocked_beds = excluded.blocked_beds "
+                    "WHERE total_beds != excluded.total_beds OR occupied_beds != excluded.occupied_beds "
+                    "OR available_beds != excluded.available_beds OR blocked_beds != excluded.blocked_beds",
+                    rows
+                )
+                changed = self._db.total_changes - before
+                if changed:
+                    self._update_rollups(ordinal)
+                self._db.execute("COMMIT")
+                if changed:
+                    self._revision = None
+            except Exception:
+                self._db.execute("ROLLBACK")
+                # Series ids created in the rolled back transaction are gone
+                self._series_ids.clear()
+                raise
+        return changed
+
+    def _update_rollups(self, ordinal: int) -> None:
+        """Recompute the rollups of one day and of its week; runs inside the ingest transaction."""
+        totals = {kind: [0, 0] for kind in ROLLUP_KINDS}
+        for unit, total_beds, occupied_beds in self._db.execute(
+            "SELECT s.unit, p.total_beds, p.occupied_beds "
+            "FROM points p JOIN series s ON s.id = p.series_id WHERE p.day = ?", (ordinal,)
+        ):
+            for kind in (unit_kind(unit), TOTAL):
+                totals[kind][0] += total_beds
+                totals[kind][1] += occupied_beds
+        self._db.executemany(
+            "INSERT OR REPLACE INTO rollups (period, start, kind, total_beds, occupied_beds, days) "
+            "VALUES (?, ?, ?, ?, ?, 1)",
+            [(DAY, ordinal, kind, total, occupied) for kind, (total, occupied) in totals.items()]
+        )
+
+        start = week_start(date.fromordinal(ordinal)).toordinal()
+        self._db.execute(
+            "INSERT OR REPLACE INTO rollups (period, start, kind, total_beds, occupied_beds, days) "
+            "SELECT ?, ?, kind, SUM(total_beds), SUM(occupied_beds), COUNT(*) FROM rollups "
+            "WHERE period = ? AND start BETWEEN ? AND ? GROUP BY kind",
+            (WEEK, start, DAY, start, start + 6)
+        )
+        self._db.execute(
+            "INSERT INTO meta (key, value) VALUES ('revision', 1) "
+            "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+        )
+
+    def _backfill_rollups(self) -> None:
+        """Build rollups for history recorded before they existed."""
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM rollups LIMIT 1").fetchone():
+                return
+            days = [row[0] for row in self._db.execute("SELECT DISTINCT day FROM points ORDER BY day")]
+            if not days:
+                return
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for ordinal in days:
+                    self._update_rollups(ordinal)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    @property
+    def revision(self) -> int:
+        """
+        Counter bumped by every ingest that changes stored points; changes whenever the rollups do.
+
+        Cached between writes: data_version only changes when another
+        connection, e.g. another bot process, commits.
+        """
+        with self._lock:
+            data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+            if self._revision is None or data_version != self._data_version:
+                row = self._db.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+                self._revision = row[0] if row else 0
+                self._data_version = data_version
+            return self._revision
+
+    def rollups(self, period: str, start: date, end: date) -> Dict[str, List[Rollup]]:
+        """
+        Rollups whose period starts between ``start`` and ``end`` inclusive.
+
+        Args:
+            period: DAY or WEEK
+            start: First day of the range
+            end: Last day of the range
+
+        Returns:
+            Dict mapping 'clinical', 'icu' and 'total' to rollups, oldest first
+        """
+        result: Dict[str, List[Rollup]] = {kind: [] for kind in ROLLUP_KINDS}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT kind, start, total_beds, occupied_beds, days FROM rollups "
+                "WHERE period = ? AND start BETWEEN ? AND ? ORDER BY start",
+                (period, start.toordinal(), end.toordinal())
+            ).fetchall()
+        for kind, ordinal, total_beds, occupied_beds, days in rows:
+            result.setdefault(kind, []).append(Rollup(date.fromordinal(ordinal), total_beds, occupied_beds, days))
+        return result
+
+    def series(self, unit: str, start: date, end: date, hospital: str = '') -> List[OccupancyPoint]:
+        """Points of one unit between ``start`` and ``end`` inclusive, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT p.day, p.total_beds, p.occupied_beds, p.available_beds, p.blocked_beds "
+                "FROM points p JOIN series s ON s.id = p.series_id "
+                "WHERE s.hospital = ? AND s.unit = ? AND p.day BETWEEN ? AND ? ORDER BY p.day",
+                (hospital, unit, start.toordinal(), end.toordinal())
+            ).fetchall()
+        return [OccupancyPoint(date.fromordinal(row[0]), *row[1:]) for row in rows]
+
+    def last_days(self, unit: str, days: int, hospital: str = '',
+                  today: Optional[date] = None) -> List[OccupancyPoint]:
+        """Points of one unit over the last ``days`` days, e.g. 'UTI HSJ' over 90 days."""
+        today = today or date.today()
+        return self.series(unit, today - timedelta(days=days - 1), today, hospital)
+
+    def day(self, day: date) -> Dict[Tuple[str, str], OccupancyPoint]:
+        """Every unit's point on one day, keyed by (hospital, unit)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT s.hospital, s.unit, p.day, p.total_beds, p.occupied_beds, "
+                "p.available_beds, p.blocked_beds "
+                "FROM points p JOIN series s ON s.id = p.series_id WHERE p.day = ?",
+                (day.toordinal(),)
+            ).fetchall()
+        return {(row[0], row[1]): OccupancyPoint(date.fromordinal(row[2]), *row[3:]) for row in rows}
+
+    def units(self) -> List[Tuple[str, str]]:
+        """Every (hospital, unit) with recorded history."""
+        with self._lock:
+            return self._db.execute("SELECT hospital, unit FROM series ORDER BY hospital, unit").fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -1,18 +1,32 @@
 """Utility functions for parsing hospital data."""
 
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+# Patterns compiled once at import time
+PERCENTAGE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+BEDS_RE = re.compile(r'\((\d+)\s*(?:leitos?)?\)')
+SIMPLE_LINE_RE = re.compile(r'(.+?)\s*\((\d+)\s*leitos?\)\s*-\s*(\d+[.,]\d+)%')
+NUMBER_RE = re.compile(r'\d+')
+DETAIL_KEYWORD_RE = re.compile(r'internados|ocupados|vaga|bloqueado')
+
+# Detail keyword -> unit field, in order of precedence
+DETAIL_FIELDS = (
+    ('internados', 'occupied_beds'),
+    ('ocupados', 'occupied_beds'),
+    ('vaga', 'available_beds'),
+    ('bloqueado', 'blocked_beds'),
+)
+
 def parse_percentage(text: str) -> float:
     """Extract percentage value from text."""
-    text = text.replace(',', '.')
-    match = re.search(r'(\d+(?:\.\d+)?)\s*%', text)
+    match = PERCENTAGE_RE.search(text.replace(',', '.'))
     return float(match.group(1)) if match else 0.0
 
 def parse_beds(text: str) -> Tuple[int, int]:
     """Extract total beds count from text in parentheses."""
-    match = re.search(r'\((\d+)\s*(?:leitos?)?\)', text)
+    match = BEDS_RE.search(text)
     return (int(match.group(1)), 0) if match else (0, 0)
 
 def clean_text(text: str) -> str:
@@ -39,66 +53,137 @@ ICU_UNITS = {
 TOTAL_CLINICAL_BEDS = sum(CLINICAL_UNITS.values())  # 123 leitos
 TOTAL_ICU_BEDS = sum(ICU_UNITS.values())  # 84 leitos
 
+def is_icu_unit(name: str) -> bool:
+    """Classify a unit by the known unit lists, falling back to its name."""
+    if name in ICU_UNITS:
+        return True
+    if name in CLINICAL_UNITS:
+        return False
+    return 'UTI' in name
+
+# Display names used in bulletins -> canonical unit names
+UNIT_MAPPINGS = {
+    'UTI 1': 'UTI HUERB 1',
+    'UTI 2': 'UTI HUERB 2',
+    'UTI INTO': 'UTI INTO',
+    'UTI HSJ': 'UTI HSJ',
+    'UTI FUNDAÇÃO': 'UTI Fundhacrê',
+    'UTI Pediátrica': 'UTI Pediátrica',
+    'UCI Pediátrica': 'UCI Pediátrica',
+    'Enf. Pediátrica': 'Enfermaria Pediátrica',
+    'Geriatria': 'Geriatria',
+    'Clinica médica': 'Clínica Médica'
+}
+
+def parse_bulletin(text: str) -> Dict:
+    """
+    Parse a bulletin in either format with a single pass over its lines.
+
+    The message is treated as simple format when any line mentions
+    'leitos' and a percentage, otherwise as the detailed 🏥 format.
+    """
+    is_simple, units, hospitals = _scan(text)
+    if is_simple:
+        return _build_simple_result(units)
+    return {'hospitals': hospitals}
+
 def parse_simple_format(text: str) -> Dict:
     """Parse simplified format with unit names and percentages."""
+    return _build_simple_result(_scan(text, detailed=False)[1])
+
+def extract_hospital_data(text: str) -> Dict:
+    """Extract structured hospital data from text."""
+    return {'hospitals': _scan(text, simple=False)[2]}
+
+def _scan(text: str, simple: bool = True, detailed: bool = True) -> Tuple[bool, List[Dict], List[Dict]]:
+    """
+    Tokenize the message once, collecting records for the requested formats.
+
+    Returns:
+        Tuple of (simple format detected, simple units, detailed hospitals)
+    """
+    is_simple = False
     units = []
-    stats = {
-        'clinical_beds': TOTAL_CLINICAL_BEDS,
-        'icu_beds': TOTAL_ICU_BEDS,
-        'occupied_clinical': 0,
-        'occupied_icu': 0
-    }
+    hospitals = []
+    hospital_units = None
+    unit = None
+    awaiting_name = True  # text before the first 🏥 is a section too
 
-    # Update unit mappings for new names
-    unit_mappings = {
-        'UTI 1': 'UTI HUERB 1',
-        'UTI 2': 'UTI HUERB 2',
-        'UTI INTO': 'UTI INTO',
-        'UTI HSJ': 'UTI HSJ',
-        'UTI FUNDAÇÃO': 'UTI Fundhacrê',
-        'UTI Pediátrica': 'UTI Pediátrica',
-        'UCI Pediátrica': 'UCI Pediátrica',
-        'Enf. Pediátrica': 'Enfermaria Pediátrica',
-        'Geriatria': 'Geriatria',
-        'Clinica médica': 'Clínica Médica'
-    }
+    for raw_line in text.split('\n'):
+        line = raw_line.strip()
+        if not line:
+            continue
 
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
+        if simple:
+            if not is_simple and 'leitos' in line and '%' in line:
+                is_simple = True
+                # Detailed records are discarded once the simple format is detected
+                detailed = False
+            parsed = _parse_simple_line(line)
+            if parsed:
+                units.append(parsed)
 
-    for line in lines:
-        # Extract parts using regex for more robust parsing
-        match = re.match(r'(.+?)\s*\((\d+)\s*leitos?\)\s*-\s*(\d+[.,]\d+)%', line)
-        if not match:
+        if not detailed:
             continue
 
-        display_name, total_beds, occupancy = match.groups()
-        name = unit_mappings.get(display_name.strip(), display_name.strip())
+        for index, fragment in enumerate(line.split('🏥') if '🏥' in line else (line,)):
+            if index:
+                awaiting_name = True
+            fragment = fragment.strip()
+            if not fragment:
+                continue
+            if awaiting_name:
+                hospital_units = []
+                unit = None
+                hospitals.append({'name': clean_text(fragment), 'units': hospital_units})
+                awaiting_name = False
+            elif '🟢' in fragment:
+                unit = _create_new_unit(fragment)
+                hospital_units.append(unit)
+            elif unit is not None:
+                _update_unit_stats(unit, fragment)
+
+    return is_simple, units, hospitals
+
+def _parse_simple_line(line: str) -> Optional[Dict]:
+    """Parse one 'Unidade (N leitos) - P%' line into a unit record."""
+    if '(' not in line or '%' not in line:
+        return None
+    match = SIMPLE_LINE_RE.match(line)
+    if not match:
+        return None
 
-        total_beds = int(total_beds)
-        occupancy_rate = float(occupancy.replace(',', '.'))
+    display_name, total_beds, occupancy = match.groups()
+    display_name = display_name.strip()
+    total_beds = int(total_beds)
+    occupancy_rate = float(occupancy.replace(',', '.'))
 
-        # Calculate occupied and available beds
-        occupied_beds = int(round(total_beds * occupancy_rate / 100))
-        available_beds = total_beds - occupied_beds
+    # Calculate occupied and available beds
+    occupied_beds = int(round(total_beds * occupancy_rate / 100))
 
+    return {
+        'name': UNIT_MAPPINGS.get(display_name, display_name),
+        'total_beds': total_beds,
+        'occupancy_rate': occupancy_rate,
+        'occupied_beds': occupied_beds,
+        'available_beds': total_beds - occupied_beds
+    }
+
+def _build_simple_result(units: List[Dict]) -> Dict:
+    """Build the simple format result with its summary statistics."""
+    stats = {
+        'clinical_beds': TOTAL_CLINICAL_BEDS,
+        'icu_beds': TOTAL_ICU_BEDS,
+        'occupied_clinical': 0,
+        'occupied_icu': 0
+    }
+
+    for unit in units:
         # Determine if it's a clinical or ICU unit
-        is_clinical = name in CLINICAL_UNITS
-
-        unit = {
-            'name': name,
-            'total_beds': total_beds,
-            'occupancy_rate': occupancy_rate,
-            'occupied_beds': occupied_beds,
-            'available_beds': available_beds
-        }
-
-        # Update statistics
-        if is_clinical:
-            stats['occupied_clinical'] += occupied_beds
+        if is_icu_unit(unit['name']):
+            stats['occupied_icu'] += unit['occupied_beds']
         else:
-            stats['occupied_icu'] += occupied_beds
-
-        units.append(unit)
+            stats['occupied_clinical'] += unit['occupied_beds']
 
     return {
         'units': units,
@@ -121,42 +206,10 @@ def _generate_summary(stats: Dict) -> Dict:
                          (stats['occupied_clinical'] + stats['occupied_icu'])
     }
 
-def extract_hospital_data(text: str) -> Dict:
-    """Extract structured hospital data from text."""
-    hospitals = []
-
-    for section in (s.strip() for s in text.split('🏥') if s.strip()):
-        lines = section.split('\n')
-        hospital = {
-            'name': clean_text(lines[0]),
-            'units': _parse_hospital_units(lines[1:])
-        }
-        hospitals.append(hospital)
-
-    return {'hospitals': hospitals}
-
-def _parse_hospital_units(lines: List[str]) -> List[Dict]:
-    """Parse hospital unit information from lines of text."""
-    units = []
-    current_unit = None
-
-    for line in (l.strip() for l in lines if l.strip()):
-        if '🟢' in line:
-            if current_unit:
-                units.append(current_unit)
-            current_unit = _create_new_unit(line)
-        elif current_unit:
-            _update_unit_stats(current_unit, line)
-
-    if current_unit:
-        units.append(current_unit)
-
-    return units
-
 def _create_new_unit(line: str) -> Dict:
     """Create new unit dictionary from unit header line."""
     total_beds, _ = parse_beds(line)
-    name = clean_text(line.replace('🟢', ''))
+    name = clean_text(BEDS_RE.sub('', line.replace('🟢', '')))
 
     # Se não houver total de leitos especificado, usar os valores corretos do dicionário
     if total_beds == 0:
@@ -176,19 +229,17 @@ def _create_new_unit(line: str) -> Dict:
 
 def _update_unit_stats(unit: Dict, line: str) -> None:
     """Update unit statistics based on detail line."""
-    line_lower = line.lower()
-    match = re.search(r'(\d+)', line)
+    match = NUMBER_RE.search(line)
 
     if not match:
         return
 
-    value = int(match.group(1))
+    value = int(match.group())
+    keywords = DETAIL_KEYWORD_RE.findall(line.lower())
 
-    if any(x in line_lower for x in ['internados', 'ocupados']):
-        unit['occupied_beds'] = value
-    elif 'vaga' in line_lower:
-        unit['available_beds'] = value
-    elif 'bloqueado' in line_lower:
-        unit['blocked_beds'] = value
+    for keyword, field in DETAIL_FIELDS:
+        if keyword in keywords:
+            unit[field] = value
+            break
 
-    unit['details'].append(line)
\ No newline at end of file
+    unit['details'].append(line)
@@ -0,0 +1,178 @@
+"""Minimal asyncio HTTP server that receives Telegram updates by webhook."""
+import asyncio
+import hmac
+import json
+import logging
+from typing import Dict, Optional, Tuple
+
+from telegram import Update
+
+from instrumentation import log_event
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY = 1024 * 1024  # Telegram updates are far smaller; reject anything bigger
+MAX_HEADERS = 64  # header lines per request
+MAX_HEADER_BYTES = 16 * 1024  # request line plus headers
+REQUEST_TIMEOUT = 30.0  # seconds to receive a whole request, including an idle keep-alive wait
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+            405: 'Method Not Allowed', 413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+            503: 'Service Unavailable'}
+
+
+class _RequestTooLarge(Exception):
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status = status
+
+
+class HTTPServer:
+    """
+    Keep-alive HTTP/1.1 server on asyncio streams.
+
+    Handles the small JSON requests exchanged with the Bot API and nothing
+    more: no chunked bodies, TLS or pipelining. Subclasses implement
+    :meth:`handle`. TLS is expected to end at the load balancer or
+    reverse proxy in front of it.
+    """
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 8443):
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def handle(self, method: str, path: str, headers: Dict[str, str],
+                     body: bytes) -> Tuple[int, bytes]:
+        """Answer one request with a status code and a JSON body."""
+        raise NotImplementedError
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        # Port 0 binds a free port; report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    @staticmethod
+    async def _read_request(
+        reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, str, Dict[str, str], bytes]]:
+        """
+        Read one request; None when the client closed the connection.
+
+        Raises:
+            _RequestTooLarge: If the headers or the body exceed the limits
+        """
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, path, version = request_line.decode('latin-1').split(' ', 2)
+        headers = {}
+        size = len(request_line)
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            size += len(line)
+            if len(headers) >= MAX_HEADERS or size > MAX_HEADER_BYTES:
+                raise _RequestTooLarge(431)
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY:
+            raise _RequestTooLarge(413)
+        body = await reader.readexactly(length) if length else b''
+        return method, path, version, headers, body
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                # One deadline for the whole request, so a slow client cannot hold the connection
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), REQUEST_TIMEOUT)
+                except _RequestTooLarge as e:
+                    await self._respond(writer, e.status, b'{}', close=True)
+                    break
+                if request is None:
+                    break
+                method, path, version, headers, body = request
+
+                try:
+                    status, payload = await self.handle(method, path.split('?', 1)[0], headers, body)
+                except Exception as e:
+                    logger.error(f"Error handling {method} {path}: {e!r}")
+                    status, payload = 503, b'{}'
+                close = (headers.get('connection', '').lower() == 'close'
+                         or version.strip() == 'HTTP/1.0')
+                await self._respond(writer, status, payload, close)
+                if close:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: bytes, close: bool) -> None:
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode('latin-1') + payload
+        )
+        await writer.drain()
+
+
+class WebhookServer(HTTPServer):
+    """
+    Receives updates POSTed by Telegram and puts them on the application's
+    update queue, where the dispatcher processes them like polled updates.
+
+    ``GET /healthz`` answers 200 for load balancer health checks. When a
+    secret token is configured, requests without the matching
+    ``X-Telegram-Bot-Api-Secret-Token`` header are rejected.
+    """
+
+    def __init__(self, application, path: str = '/telegram', secret_token: Optional[str] = None,
+                 host: str = '0.0.0.0', port: int = 8443):
+        super().__init__(host, port)
+        self.application = application
+        self.path = path
+        self.secret_token = secret_token
+        self.received = 0
+
+    async def handle(self, method: str, path: str, headers: Dict[str, str],
+                     body: bytes) -> Tuple[int, bytes]:
+        if path == '/healthz':
+            return 200, b'{"ok":true}'
+        if path != self.path:
+            return 404, b'{}'
+        if method != 'POST':
+            return 405, b'{}'
+        if self.secret_token and not hmac.compare_digest(
+            headers.get('x-telegram-bot-api-secret-token', ''), self.secret_token
+        ):
+            log_event(logger, logging.WARNING, 'webhook_rejected', reason='secret_token')
+            return 403, b'{}'
+
+        try:
+            payload = json.loads(body)
+            status = await self.deliver(payload, body)
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            log_event(logger, logging.WARNING, 'webhook_rejected', reason='payload', error=repr(e))
+            return 400, b'{}'
+        if status == 200:
+            self.received += 1
+        return status, b'{}'
+
+    async def deliver(self, payload: Dict, body: bytes) -> int:
+        """Hand a decoded update over for processing and return the HTTP status to answer."""
+        update = Update.de_json(payload, self.application.bot)
+        await self.application.update_queue.put(update)
+        return 200